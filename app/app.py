@@ -1,16 +1,20 @@
-from flask import Flask, request, jsonify, abort
+from flask import Flask, Response, request, jsonify, abort, g
 import json
 import os
+import threading
+import time
 from dotenv import load_dotenv
 from pathlib import Path
 from uuid import uuid4, UUID
 from flask_cors import CORS
 from utils.text_sampler.text_sampler import sample_text_phoneme
-from utils.storage.storage import save_data, get_audio_path, save_audio_wav
+from utils.storage.storage import save_data, save_audio_buffer_async
+from utils.audio.audio import AudioBuffer
 from utils.speech_rate.speech_rate import get_speech_rate, get_phoneme_rate
-from model.bert.inference import Classifier
+from utils.jobs.jobs import JobManager, JobQueueFull
+from utils.metrics.metrics import ENABLED as METRICS_ENABLED, REGISTRY, gauge, histogram, stage
 from model.agent.main_agent import get_agent_response
-from model.agent.chatbot import respond
+from model.agent.chatbot import respond, respond_stream
 
 app = Flask(__name__)
 CORS(app)
@@ -19,12 +23,139 @@ load_dotenv(override= True)
 question_path = Path(os.environ.get("QUESTIONS_PATH", "./data/background/questions.json"))
 question_json = json.loads(question_path.read_text(encoding= "utf-8"))
 
+# The classifier stack (torch, transformers, librosa) takes seconds to import and load, so it is
+# built on a background thread and the lightweight routes are served while it warms up.
+MODEL_WARMUP = os.environ.get("MODEL_WARMUP", "1") == "1"
+MODEL_LOAD_TIMEOUT = float(os.environ.get("MODEL_LOAD_TIMEOUT", 120))
 
-text_path = Path(os.environ.get("USER_TEXT_FILE", "./data/background/questions.json"))
-text_json = json.loads(text_path.read_text(encoding="utf-8"))
+models = {}
+models_ready = threading.Event()
+models_lock = threading.Lock()
+model_thread = None
+startup = {"status": "not started", "started_at": time.monotonic()}
+
+
+def load_models():
+
+    """Import the inference stack, build the classifier and scheduler and run one warm-up forward pass."""
+    try:
+        startup["status"] = "loading"
+        start = time.perf_counter()
+        from model.bert.inference import Classifier
+        from model.bert.mel_cache import MelCache
+        from model.bert.scheduler import InferenceScheduler
+        startup["import_s"] = time.perf_counter() - start
+
+        mel_cache_dir = os.environ.get("MEL_CACHE_DIR")
+        mel_cache = MelCache(mel_cache_dir, max_bytes= int(float(os.environ.get("MEL_CACHE_MAX_MB", 2048)) * 1024**2)) if mel_cache_dir else None
+        classifier = Classifier(os.environ.get("BERT_MODEL_FILE", "./data/models/best_model.pt"), mel_cache= mel_cache)
+        startup["load_s"] = time.perf_counter() - start
+
+        startup["status"] = "warming up"
+        classifier.warm_up()
+        scheduler = InferenceScheduler(
+            classifier,
+            max_batch_size= int(os.environ.get("INFERENCE_MAX_BATCH_SIZE", 32)),
+            max_wait_ms= float(os.environ.get("INFERENCE_MAX_WAIT_MS", 5))
+        )
+        models.update(classifier= classifier, scheduler= scheduler)
+        startup["warmup_s"] = time.perf_counter() - start
+        startup["status"] = "ready"
+    except Exception as e:
+        startup["status"] = f"failed: {e!r}"
+        raise
+    finally:
+        models_ready.set()
+
+
+def start_model_loading():
+
+    """Start load_models on a daemon thread; safe to call more than once."""
+    global model_thread
+    with models_lock:
+        if model_thread is None:
+            model_thread = threading.Thread(target= load_models, name= "model-warmup", daemon= True)
+            model_thread.start()
+
+
+def get_models():
+
+    """Return (classifier, scheduler), waiting up to MODEL_LOAD_TIMEOUT for the warm-up to finish."""
+    start_model_loading()
+    if not models_ready.wait(MODEL_LOAD_TIMEOUT):
+        abort(503, description = "Model is still loading, check /ready and retry")
+    if "classifier" not in models:
+        abort(503, description = f"Model failed to load: {startup['status']}")
+    return models["classifier"], models["scheduler"]
+
+
+# /upload?mode=job runs the assessment here and answers 202 right after the audio is saved
+jobs = JobManager(
+    max_workers= int(os.environ.get("JOB_WORKERS", 2)),
+    max_pending= int(os.environ.get("JOB_MAX_PENDING", 64)),
+    ttl= float(os.environ.get("JOB_TTL", 3600))
+)
+UPLOAD_MODE = os.environ.get("UPLOAD_MODE", "sync")
+gauge("jobs_pending", "Assessment jobs queued or running").set_function(jobs.pending)
+gauge("model_ready", "1 once the classifier is loaded and warm").set_function(lambda: float("classifier" in models))
+SSE_HEARTBEAT = 15
+
+streams = {}
+streams_lock = threading.Lock()
+STREAM_IDLE_TIMEOUT = float(os.environ.get("STREAM_IDLE_TIMEOUT", 600))
+STREAM_MAX_SECONDS = float(os.environ.get("STREAM_MAX_SECONDS", 600))
+gauge("assessment_streams_open", "Streaming assessments started and not yet finished").set_function(lambda: len(streams))
+
+GENDERS = ('male', 'female', 'm', 'f','أنثى','ذكر')
+
+HTTP_SECONDS = histogram("http_request_seconds", "Seconds until the response headers, per route", labels= ("method", "endpoint", "status"))
+HTTP_IN_FLIGHT = gauge("http_requests_in_flight", "Requests being handled")
+
+if METRICS_ENABLED:
+
+    @app.before_request
+    def start_timer():
+
+        g.request_start = time.perf_counter()
+        HTTP_IN_FLIGHT.inc()
+
+    @app.after_request
+    def record_request(response):
+
+        if "request_start" in g:
+            endpoint = request.url_rule.rule if request.url_rule else "unmatched"  # route templates keep label cardinality bounded
+            HTTP_SECONDS.observe(time.perf_counter() - g.request_start, method= request.method, endpoint= endpoint, status= response.status_code)
+        return response
+
+    @app.teardown_request
+    def end_request(error):
+
+        if "request_start" in g:
+            HTTP_IN_FLIGHT.dec()
+
+
+@app.route("/metrics", methods = ['GET'])
+def metrics():
+
+    """Prometheus text exposition of the stage histograms, agent call timings, queue depths and in-flight gauges."""
+    if not METRICS_ENABLED:
+        abort(404, description = "Metrics are disabled (METRICS=0)")
+    return Response(REGISTRY.render(), mimetype= "text/plain; version=0.0.4")
+
+
+@app.route("/ready", methods = ['GET'])
+def ready():
+
+    """200 once the classifier is loaded and warm, 503 while it is loading or if loading failed."""
+    body = {
+        "ready": "classifier" in models,
+        "status": startup["status"],
+        "uptime_s": time.monotonic() - startup["started_at"],
+    }
+    body.update({k: v for k, v in startup.items() if k.endswith("_s")})
+
+    return jsonify({"data": body}), 200 if body["ready"] else 503
 
-classifier = Classifier(os.environ.get("BERT_MODEL_FILE", "./data/models/best_model.pt"))
-request_id = len(os.listdir("./data/audio/"))
 
 @app.route("/questions", methods = ['GET'])
 def get_questions():
@@ -36,63 +167,58 @@ def get_questions():
 @app.route("/request_text", methods = ['GET'])
 def request_text():
 
-    """REQUEST URL: ADRESS:PORT/request_text?lang=<LANGUAGE HERE>"""
+    """REQUEST URL: ADRESS:PORT/request_text?lang=<LANGUAGE HERE>[&seed=<INT>] (a seed always returns the same passage)"""
 
     lang = request.args.get('lang', 'en')
+    seed = request.args.get('seed')
     
     if lang not in ["en", "ar"]:
         abort(404, description = f"Language {lang} not in ('en', 'ar')")
-    
-    return jsonify(sample_text_phoneme(lang = lang))
 
+    if seed is not None:
+        if not seed.isdecimal():
+            abort(400, description = f"Seed {seed} is not a non-negative integer")
+        seed = int(seed)
+    
+    return jsonify(sample_text_phoneme(lang = lang, seed = seed))
 
 
-@app.route('/upload', methods=['POST'])
-def upload():
-
-    """"""
-    # questions_path = Path(os.environ.get("BACKGROUND_ANSWER_STORAGE_DIR", "./data/background/background/")) / "questions.json"
-    lang = request.args.get('lang', 'en')
-    
-    if lang not in ["en", "ar"]:
-        abort(400, description = f"Language {lang} not in ('en', 'ar')")
 
-    wav_file = request.files.get('audio_file')
-    print(type(wav_file), "_____")
-    response = request.form.get('data')
+def parse_assessment(response):
 
+    """Validate the 'data' form field of an assessment and return (data, text, phonemes, gender)."""
     if response is None:
         abort(400, description="Missing 'data' in form")
-    
-    if wav_file is None:
-        abort(400, description= "Missing 'audio_file' wav file")
-        
+
     response_json = json.loads(response)
     data = response_json.get('data')
     text = response_json.get('text')
     phonemes = response_json.get('phonemes')
     gender = data.get('0')
 
-    if gender.lower() not in ('male', 'female', 'm', 'f','أنثى','ذكر'):
+    if gender.lower() not in GENDERS:
 
         abort(400, description = f"Gender provided {gender} not in ('male', 'female', 'm', 'f')")
 
-    
-    request_id = uuid4()
+    return data, text, phonemes, gender
 
-    save_data(uuid = request_id, data = data)
-    save_audio_wav(uuid = request_id, audio_wav = wav_file)
 
-    speech_rate = get_speech_rate(wav_file_path= get_audio_path(request_id), text= text)
-    phoneme_rate = get_phoneme_rate(wav_file_path= get_audio_path(request_id), phonemes= phonemes)
+def get_rates(audio, text, phonemes):
+
+    with stage("rates"):
+        speech_rate = get_speech_rate(wav_file_path= audio, text= text)
+        phoneme_rate = get_phoneme_rate(wav_file_path= audio, phonemes= phonemes)
 
     if speech_rate == 0:
         abort(400, description = "Text not attached with request")
     
     if phoneme_rate == 0:
         abort(400, description = "Could not extract phonemes from provided text.") 
-    
-    dysarthria_prob = classifier.predict(get_audio_path(request_id), gender= gender)
+
+    return speech_rate, phoneme_rate
+
+
+def build_assessment(request_id, data, speech_rate, phoneme_rate, dysarthria_prob, use_cache= True):
 
     data['speech_rate'] = speech_rate
     data['phoneme_rate'] = phoneme_rate
@@ -102,19 +228,224 @@ def upload():
     for key in questions:
         questions[key]["answer"] = data[key]
     
-    agent_response = get_agent_response(uuid = request_id, data = data)
-    response = {
-        "data":
-        {
-            "id": str(request_id),
-            "agent_response" : agent_response,
-            "speech_rate" : data['speech_rate'],
-            "phoneme_rate": data['phoneme_rate'],
-            "dysarthria_prob": data['dysarthria_prob']
-        }
+    with stage("report"):
+        agent_response = get_agent_response(uuid = request_id, data = data, use_cache = use_cache)
+    return {
+        "id": str(request_id),
+        "agent_response" : agent_response,
+        "speech_rate" : data['speech_rate'],
+        "phoneme_rate": data['phoneme_rate'],
+        "dysarthria_prob": data['dysarthria_prob']
     }
+
+
+def assessment_response(request_id, data, speech_rate, phoneme_rate, dysarthria_prob, use_cache= True):
+
+    return jsonify({"data": build_assessment(request_id, data, speech_rate, phoneme_rate, dysarthria_prob, use_cache)})
+
+
+def run_assessment(job, request_id, audio, data, text, phonemes, gender, use_cache):
+
+    """Job version of /upload: each metric is published as soon as it exists, the agent report last."""
+    speech_rate, phoneme_rate = get_rates(audio, text, phonemes)
+    job.update("rates", speech_rate= speech_rate, phoneme_rate= phoneme_rate)
+
+    _, scheduler = get_models()
+    with stage("classify"):
+        dysarthria_prob = scheduler.predict(audio, gender= gender)
+    job.update("classified", dysarthria_prob= dysarthria_prob)
+
+    return build_assessment(request_id, data, speech_rate, phoneme_rate, dysarthria_prob, use_cache)
+
+
+@app.route('/upload', methods=['POST'])
+def upload():
+
+    """?mode=job (or UPLOAD_MODE=job) answers 202 with a job id once the audio is saved; poll /jobs/<id> or stream /jobs/<id>/events."""
+    # questions_path = Path(os.environ.get("BACKGROUND_ANSWER_STORAGE_DIR", "./data/background/background/")) / "questions.json"
+    lang = request.args.get('lang', 'en')
+    mode = request.args.get('mode', UPLOAD_MODE)
+    use_cache = request.args.get('cache', '1') != '0'  # ?cache=0 always asks the LLM for a fresh report
+    
+    if lang not in ["en", "ar"]:
+        abort(400, description = f"Language {lang} not in ('en', 'ar')")
+
+    if mode not in ["sync", "job"]:
+        abort(400, description = f"Mode {mode} not in ('sync', 'job')")
+
+    wav_file = request.files.get('audio_file')
+    print(type(wav_file), "_____")
+    response = request.form.get('data')
+
+    if response is None:
+        abort(400, description="Missing 'data' in form")
+    
+    if wav_file is None:
+        abort(400, description= "Missing 'audio_file' wav file")
+        
+    data, text, phonemes, gender = parse_assessment(response)
+    
+    request_id = uuid4()
+
+    # decoded once; rates, mel features and the saved file all come from this buffer
+    with stage("decode"):
+        audio = AudioBuffer.from_upload(wav_file.read())
+
+    if mode == "sync":
+        _, scheduler = get_models()  # may abort(503); nothing is persisted for a request that can't be scored
+
+    save_data(uuid = request_id, data = data)
+    save_audio_buffer_async(uuid = request_id, audio = audio)
+
+    if mode == "job":
+        try:
+            jobs.submit(str(request_id), run_assessment, request_id, audio, data, text, phonemes, gender, use_cache)
+        except JobQueueFull as e:
+            abort(503, description = f"Too many assessments in progress ({e}), retry shortly")
+
+        return jsonify({"data": {
+            "id": str(request_id),
+            "status": "queued",
+            "status_url": f"/jobs/{request_id}",
+            "events_url": f"/jobs/{request_id}/events"
+        }}), 202
+
+    speech_rate, phoneme_rate = get_rates(audio, text, phonemes)
+    
+    with stage("classify"):
+        dysarthria_prob = scheduler.predict(audio, gender= gender)
+
+    return assessment_response(request_id, data, speech_rate, phoneme_rate, dysarthria_prob, use_cache)
+
+
+def get_job(job_id):
+
+    job = jobs.get(job_id)
+    if job is None:
+        abort(404, description = f"Job {job_id} not found")
+    return job
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+
+    """Status ('queued', 'running', 'rates', 'classified', 'done' or 'failed') plus every result field available so far."""
+    return jsonify({"data": get_job(job_id).snapshot()})
+
+
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+
+    """Server-sent events, one per status change, ending after 'done' or 'failed'. Resumes from Last-Event-ID."""
+    job = get_job(job_id)
+    last_event_id = request.headers.get('Last-Event-ID', '')
+    if last_event_id and not last_event_id.isdecimal():
+        abort(400, description = f"Last-Event-ID {last_event_id} is not an event id sent by this stream")
+    start = int(last_event_id) + 1 if last_event_id else 0
+
+    def stream():
+        index = start
+        while True:
+            events = job.events_since(index, timeout= SSE_HEARTBEAT)
+            if not events:
+                yield ": keep-alive\n\n"
+                continue
+            for event in events:
+                yield f"id: {index}\nevent: {event['status']}\ndata: {json.dumps(event, ensure_ascii= False)}\n\n"
+                index += 1
+            if events[-1]['status'] in ("done", "failed"):
+                return
+
+    return Response(stream(), mimetype= "text/event-stream", headers= {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+def reap_idle_streams():
+
+    """Drop streams nobody fed for STREAM_IDLE_TIMEOUT; call with streams_lock held."""
+    now = time.monotonic()
+    for key in [k for k, s in streams.items() if now - s.last_active > STREAM_IDLE_TIMEOUT]:
+        del streams[key]
+
+
+def get_stream(stream_id):
+
+    with streams_lock:
+        reap_idle_streams()
+        session = streams.get(stream_id)
+    if session is None:
+        abort(404, description = f"Stream {stream_id} not found")
+    return session
+
+
+@app.route('/stream/start', methods=['POST'])
+def stream_start():
+
+    """Open a streaming assessment. JSON body: {"gender": ...}. Returns the id used by the /stream/<id>/ routes."""
+    body = request.get_json(silent= True) or {}
+    gender = body.get('gender')
+
+    if gender is None or gender.lower() not in GENDERS:
+        abort(400, description = f"Gender provided {gender} not in ('male', 'female', 'm', 'f')")
+
+    from model.bert.streaming import StreamingSession
+    classifier, _ = get_models()
+
+    stream_id = str(uuid4())
+    with streams_lock:
+        reap_idle_streams()
+        streams[stream_id] = StreamingSession(classifier, gender, max_seconds= STREAM_MAX_SECONDS)
+
+    return jsonify({"data": {"id": stream_id}})
+
+
+@app.route('/stream/<stream_id>/chunk', methods=['POST'])
+def stream_chunk(stream_id):
+
+    """Body: raw 16-bit mono PCM at 16kHz, in any chunk size (chunked transfer encoding is fine)."""
+    from model.bert.streaming import StreamTooLong
+    session = get_stream(stream_id)
+
+    try:
+        prob = session.feed(request.get_data())
+    except StreamTooLong as e:
+        abort(413, description = str(e))
+    except RuntimeError as e:
+        abort(409, description = str(e))
+
+    return jsonify({"data": {
+        "duration": session.duration,
+        "windows": session.windows_scored,
+        "dysarthria_prob": prob
+    }})
+
+
+@app.route('/stream/<stream_id>/finish', methods=['POST'])
+def stream_finish(stream_id):
+
+    """Close a stream. Form field 'data' is the same as for /upload; the response matches /upload's."""
+    lang = request.args.get('lang', 'en')
     
-    return jsonify(response)
+    if lang not in ["en", "ar"]:
+        abort(400, description = f"Language {lang} not in ('en', 'ar')")
+
+    session = get_stream(stream_id)
+    data, text, phonemes, gender = parse_assessment(request.form.get('data'))
+
+    with stage("classify"):
+        dysarthria_prob = session.finish()
+
+    # get_rates can abort(400); the stream stays open until it succeeds, so the client can retry finish
+    audio = AudioBuffer.from_pcm(session.pcm)
+    speech_rate, phoneme_rate = get_rates(audio, text, phonemes)
+    with streams_lock:
+        streams.pop(stream_id, None)
+
+    request_id = UUID(stream_id)
+    save_data(uuid = request_id, data = data)
+    save_audio_buffer_async(uuid = request_id, audio = audio)
+
+    return assessment_response(request_id, data, speech_rate, phoneme_rate, dysarthria_prob)
+
 
 @app.route('/chatbot', methods=['POST'])
 def chatbot():
@@ -134,9 +465,45 @@ def chatbot():
     except Exception as e:
         return jsonify({"data": str(e)}), 500
 
+
+def sse(event, data):
+
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii= False)}\n\n"
+
+
+@app.route('/chatbot/stream', methods=['POST'])
+def chatbot_stream():
+
+    """Same body as /chatbot. Server-sent events: 'delta' {"text"} as the reply is generated, then 'done' {"data"} with the stored response, or 'error'."""
+    data = request.get_json(silent= True)
+
+    if not data or 'uuid' not in data or 'message' not in data:
+        return jsonify({"data": "Missing 'uuid' or 'message' in request body"}), 400
+
+    try:
+        uuid = UUID(data['uuid'])
+    except ValueError as e:
+        return jsonify({"data": str(e)}), 400
+    user_query = data['message']
+
+    def stream():
+        try:
+            for kind, payload in respond_stream(uuid=uuid, user_text=user_query):
+                yield sse("delta", {"text": payload}) if kind == "delta" else sse("done", {"data": payload})
+        except Exception as e:
+            yield sse("error", {"data": str(e)})
+
+    return Response(stream(), mimetype= "text/event-stream", headers= {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
     
 
 
 if __name__ == "__main__":
 
+    # debug=True re-runs this file in a reloader child; only the child that serves requests loads the model
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        start_model_loading()
     app.run(port= 5000, debug= True)
+
+elif MODEL_WARMUP:
+    start_model_loading()
@@ -0,0 +1,47 @@
+import argparse
+import time
+
+import numpy as np
+import torch
+
+from model.bert.data import SR
+from model.bert.frontend import MelFrontend
+from model.bert.inference import mel_from_waveform
+
+
+# Per-core throughput of the librosa mel recipe against MelFrontend on a batch of synthetic clips.
+# Parity between the two is covered by tests/test_frontend.py.
+
+
+def throughput(fn, audio_s, repeats):
+    fn()  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return audio_s * repeats / (time.perf_counter() - start)
+
+
+def benchmark():
+    parser = argparse.ArgumentParser(description='Seconds of audio per second turned into mels by the librosa and torch frontends')
+    parser.add_argument('--n_mels', type=int, default=80)
+    parser.add_argument('--batch', type=int, default=16, help='clips per frontend call')
+    parser.add_argument('--seconds', type=float, default=10.0, help='length of each clip')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--threads', type=int, default=1, help='torch intra-op threads')
+
+    args = parser.parse_args()
+    torch.set_num_threads(args.threads)
+
+    frontend = MelFrontend(n_mels=args.n_mels)
+    rng = np.random.default_rng(0)
+    batch = torch.from_numpy(rng.standard_normal((args.batch, int(SR * args.seconds))).astype(np.float32) * 0.1)
+    audio_s = args.batch * args.seconds
+
+    librosa_rate = throughput(lambda: [mel_from_waveform(y, n_mels=args.n_mels) for y in batch.numpy()], audio_s, args.repeats)
+    torch_rate = throughput(lambda: frontend(batch), audio_s, args.repeats)
+    print(f"librosa: {librosa_rate:8.1f} s of audio per second ({args.threads} thread(s))")
+    print(f"torch:   {torch_rate:8.1f} s of audio per second ({args.threads} thread(s), batch of {args.batch} x {args.seconds:g} s)")
+
+
+if __name__ == "__main__":
+    benchmark()
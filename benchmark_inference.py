@@ -0,0 +1,189 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import torch
+
+from model.bert.frontend import MelFrontend
+from model.bert.inference import Classifier, SR, load_mel_for_inference, slide_windows, unfold_windows, score_windows
+from model.bert.runtime import GraphModel
+from utils.audio.audio import AudioBuffer
+
+
+# Stage timings of model/bert/inference.py, each measured on its own:
+#   load_mel[librosa] / load_mel[torch]   wav file -> normalized mel
+#   slide_windows / unfold_windows        mel -> windows
+#   forward                               one SpectrogramBERTClassifier call per (batch size, window frames)
+#   score_windows                         every window of a clip (the model cost of one request)
+#   predict                               Classifier.predict end to end
+# over synthetic clips of several durations and the RIFF WAVs in data/audio.
+# A --baseline JSON turns the run into a regression check.
+
+
+def measure(fn, repeats, warmup):
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(1000 * (time.perf_counter() - start))
+    return {"median_ms": statistics.median(times), "min_ms": min(times), "mean_ms": statistics.fmean(times),
+            "max_ms": max(times), "repeats": repeats}
+
+
+def synthetic_clips(durations, out_dir):
+    """WAV files of low-level noise, `durations` seconds long; returns {name: path}."""
+    rng = np.random.default_rng(0)
+    clips = {}
+    for seconds in durations:
+        y = (rng.standard_normal(int(SR * seconds)) * 0.1 * 32767).astype(np.int16)
+        path = Path(out_dir) / f"synthetic_{seconds:g}s.wav"
+        path.write_bytes(AudioBuffer.from_pcm(y.tobytes(), SR).wav_bytes())
+        clips[f"synthetic_{seconds:g}s"] = str(path)
+    return clips
+
+
+def real_clips(audio_dir, limit):
+    """RIFF WAVs in `audio_dir` (some uploads are WebM under a .wav name and are skipped)."""
+    paths = [str(p) for p in sorted(Path(audio_dir).glob("*.wav")) if p.read_bytes()[:4] == b"RIFF"]
+    return paths[:limit] if limit else paths
+
+
+def run(args):
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    classifier = Classifier(args.model_path, precision=args.precision, backend=args.backend, frontend=args.frontend)
+    torch_frontend = classifier.frontend or MelFrontend(n_mels=classifier.n_mels).to(classifier.device)
+    results = {}
+
+    def stage(name, fn, per=1):
+        if args.stages and not any(s in name for s in args.stages):
+            return
+        r = measure(fn, args.repeats, args.warmup)
+        if per > 1:  # a pass over several clips; report per clip
+            r = {k: v / per if k.endswith("_ms") else v for k, v in r.items()} | {"clips": per}
+        results[name] = r
+        print(f"{name:<42} median {r['median_ms']:>9.2f} ms  min {r['min_ms']:>9.2f} ms")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        clips = synthetic_clips(args.durations, tmp)
+        for name, path in clips.items():
+            stage(f"load_mel[librosa]/{name}", lambda: load_mel_for_inference(path, n_mels=classifier.n_mels))
+            stage(f"load_mel[torch]/{name}", lambda: load_mel_for_inference(path, n_mels=classifier.n_mels, frontend=torch_frontend))
+            mel = load_mel_for_inference(path, n_mels=classifier.n_mels, frontend=classifier.frontend)
+            stage(f"slide_windows/{name}", lambda: slide_windows(mel, classifier.window_T, classifier.hop_T))
+            stage(f"unfold_windows/{name}", lambda: unfold_windows(mel, classifier.window_T, classifier.hop_T))
+            windows = unfold_windows(mel, classifier.window_T, classifier.hop_T)
+            genders = torch.ones(windows.shape[0])
+            stage(f"score_windows/{name}", lambda: score_windows(classifier.model, windows, genders, classifier.device, classifier.batch_size))
+            stage(f"predict/{name}", lambda: classifier.predict(path, "male"))
+
+        window_frames = args.window_frames
+        if isinstance(classifier.model, GraphModel):  # exported graphs only take windows of the frames they were traced with
+            window_frames = [classifier.model.window_T]
+            skipped = [f for f in args.window_frames if f != classifier.model.window_T]
+            if skipped:
+                print(f"note: {classifier.backend} graph is fixed at {classifier.model.window_T} frames; skipping forward at frames={skipped}")
+        for batch in args.batch_sizes:
+            for frames in window_frames:
+                X = torch.randn(batch, classifier.n_mels, frames, device=classifier.device)
+                lengths = torch.full((batch,), frames, dtype=torch.long, device=classifier.device)
+                gender = torch.ones(batch, 1, device=classifier.device)
+
+                @torch.no_grad()
+                def forward():
+                    classifier.model(X, lengths=lengths, gender=gender)
+                    if classifier.device.type == "cuda":
+                        torch.cuda.synchronize()
+                stage(f"forward/batch={batch},frames={frames}", forward)
+
+    paths = real_clips(args.audio_dir, args.limit_audio)
+    if paths:
+        stage("load_mel[librosa]/data_audio", lambda: [load_mel_for_inference(p, n_mels=classifier.n_mels) for p in paths], per=len(paths))
+        stage("load_mel[torch]/data_audio", lambda: [load_mel_for_inference(p, n_mels=classifier.n_mels, frontend=torch_frontend) for p in paths], per=len(paths))
+        stage("predict/data_audio", lambda: [classifier.predict(p, "male") for p in paths], per=len(paths))
+
+    return {
+        "environment": {
+            "python": platform.python_version(), "torch": torch.__version__, "machine": platform.machine(),
+            "cpu_count": os.cpu_count(), "threads": torch.get_num_threads(), "device": str(classifier.device),
+            "backend": classifier.backend, "precision": classifier.precision,
+            "frontend": "librosa" if classifier.frontend is None else "torch",
+        },
+        "config": {k: v for k, v in vars(args).items() if k not in ("baseline", "current", "out_json")},
+        "created": time.time(),
+        "stages": results,
+    }
+
+
+def compare(baseline, current, threshold, min_delta_ms):
+    """Print median-vs-median per stage; returns the stages slower than baseline by more than `threshold` (and `min_delta_ms`)."""
+    if baseline["environment"] != current["environment"]:
+        print(f"warning: environments differ\n  baseline {baseline['environment']}\n  current  {current['environment']}")
+
+    regressions = []
+    print(f"\n{'stage':<42} {'baseline ms':>12} {'current ms':>12} {'change':>8}")
+    for name in sorted(set(baseline["stages"]) | set(current["stages"])):
+        if name not in baseline["stages"] or name not in current["stages"]:
+            print(f"{name:<42} {'only in ' + ('current' if name in current['stages'] else 'baseline'):>34}")
+            continue
+        old, new = baseline["stages"][name]["median_ms"], current["stages"][name]["median_ms"]
+        change = new / old - 1
+        regressed = change > threshold and new - old > min_delta_ms
+        if regressed:
+            regressions.append(name)
+        print(f"{name:<42} {old:>12.2f} {new:>12.2f} {100 * change:>+7.1f}%{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def benchmark():
+    parser = argparse.ArgumentParser(description='Per-stage inference benchmark; with --baseline, exits non-zero when a stage regresses')
+    parser.add_argument('--model_path', type=str, default='./data/models/best_model.pt')
+    parser.add_argument('--backend', type=str, default=None, help='torch, torchscript or onnx (default: CLASSIFIER_BACKEND)')
+    parser.add_argument('--precision', type=str, default=None, help='default: CLASSIFIER_PRECISION')
+    parser.add_argument('--frontend', type=str, default=None, help='torch or librosa (default: CLASSIFIER_FRONTEND); load_mel is timed with both either way')
+    parser.add_argument('--audio_dir', type=str, default='./data/audio')
+    parser.add_argument('--limit_audio', type=int, default=None, help='only use the first N WAVs of --audio_dir')
+    parser.add_argument('--durations', type=float, nargs='+', default=[5, 15, 30, 60, 120], help='synthetic clip lengths in seconds')
+    parser.add_argument('--batch_sizes', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--window_frames', type=int, nargs='+', default=[64, 128, 256], help='mel frames per window for the forward stage (graph backends: only the exported window)')
+    parser.add_argument('--stages', type=str, nargs='+', default=None, help='only run stages whose name contains one of these')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--threads', type=int, default=None, help='torch intra-op threads (default: torch default)')
+    parser.add_argument('--out_json', type=str, default=None)
+    parser.add_argument('--baseline', type=str, default=None, help='earlier --out_json to compare against')
+    parser.add_argument('--current', type=str, default=None, help='compare this --out_json with --baseline instead of running')
+    parser.add_argument('--threshold', type=float, default=0.10, help='allowed slowdown of a stage median (0.10 = 10%%)')
+    parser.add_argument('--min_delta_ms', type=float, default=0.5, help='ignore slowdowns smaller than this (timer noise)')
+
+    args = parser.parse_args()
+
+    if args.current:
+        if not args.baseline:
+            parser.error("--current needs --baseline")
+        current = json.loads(Path(args.current).read_text(encoding="utf-8"))
+    else:
+        current = run(args)
+        if args.out_json:
+            with open(args.out_json, "w", encoding="utf-8") as f:
+                json.dump(current, f, indent=4)
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = compare(baseline, current, args.threshold, args.min_delta_ms)
+        for name in regressions:
+            print(f"FAIL: {name} regressed by more than {100 * args.threshold:.0f}%")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,81 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+
+HEAVY_MODULES = ("torch", "transformers", "librosa", "openai")
+
+# Runs in a fresh interpreter so nothing is already imported or cached.
+CHILD = r"""
+import json, sys, time
+start = time.perf_counter()
+import app.app as A
+import_ms = 1000 * (time.perf_counter() - start)
+eager = [m for m in HEAVY if m in sys.modules] if not WARMUP else []
+
+client = A.app.test_client()
+first = {}
+for route in ("/questions", "/request_text?lang=en", "/ready"):
+    t = time.perf_counter()
+    status = client.get(route).status_code
+    first[route] = {"status": status, "ms": 1000 * (time.perf_counter() - t)}
+
+ready_s = None
+if WARMUP:
+    while client.get("/ready").status_code != 200 and A.startup["status"] in ("not started", "loading", "warming up"):
+        time.sleep(0.05)
+    ready_s = time.perf_counter() - start
+print(json.dumps({"import_ms": import_ms, "eager_heavy_imports": eager, "first_request": first,
+                  "ready_s": ready_s, "status": A.startup["status"]}))
+"""
+
+
+def run_child(warmup):
+    env = dict(os.environ, MODEL_WARMUP="1" if warmup else "0")
+    code = f"HEAVY = {HEAVY_MODULES!r}\nWARMUP = {warmup!r}\n" + CHILD
+    out = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def benchmark():
+    parser = argparse.ArgumentParser(description='Import time and time-to-ready of the Flask backend; exits non-zero when over budget')
+    parser.add_argument('--max_import_ms', type=float, default=1500, help='fail if `import app.app` takes longer than this (median)')
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--skip_warmup', action='store_true', help='only measure the import, without loading the model')
+    parser.add_argument('--out_json', type=str, default=None)
+
+    args = parser.parse_args()
+
+    cold = [run_child(warmup=False) for _ in range(args.repeats)]
+    import_ms = sorted(r["import_ms"] for r in cold)[len(cold) // 2]
+    eager = sorted({m for r in cold for m in r["eager_heavy_imports"]})
+    print(f"import app.app: {import_ms:.0f} ms median of {args.repeats} (budget {args.max_import_ms:.0f} ms)")
+    for route, r in cold[-1]["first_request"].items():
+        print(f"  first GET {route:<22} {r['status']}  {r['ms']:.1f} ms")
+
+    report = {"import_ms": import_ms, "cold": cold}
+    if not args.skip_warmup:
+        warm = run_child(warmup=True)
+        report["warm"] = warm
+        print(f"with warm-up: import {warm['import_ms']:.0f} ms, "
+              f"first GET /questions {warm['first_request']['/questions']['ms']:.1f} ms, "
+              f"/ready after {warm['ready_s']:.1f} s ({warm['status']})")
+
+    if args.out_json:
+        with open(args.out_json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4)
+
+    failures = []
+    if eager:
+        failures.append(f"heavy modules imported at import time: {', '.join(eager)}")
+    if import_ms > args.max_import_ms:
+        failures.append(f"import took {import_ms:.0f} ms > {args.max_import_ms:.0f} ms")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    benchmark()
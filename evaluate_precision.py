@@ -0,0 +1,95 @@
+import argparse
+import io
+import json
+import time
+
+import pandas as pd
+import torch
+from tqdm import tqdm
+
+from model.bert.inference import Classifier, PRECISIONS, SR, HOP, classify_long_clip, load_mel_for_inference, gender_to_value
+
+
+def weights_mb(model):
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.getbuffer().nbytes / 1024**2
+
+
+def evaluate():
+    parser = argparse.ArgumentParser(description='Accuracy delta, latency and weight size of each Classifier precision mode on a held-out CSV')
+    parser.add_argument('--data_csv', type=str, required=True, help='held-out CSV in the train.py --data_csv format')
+    parser.add_argument('--model_path', type=str, default='./data/models/best_model.pt')
+    parser.add_argument('--precisions', type=str, nargs='+', default=list(PRECISIONS), choices=PRECISIONS)
+    parser.add_argument('--threads', type=int, default=None, help='torch intra-op threads (default: torch default)')
+    parser.add_argument('--limit', type=int, default=None, help='only use the first N rows')
+    parser.add_argument('--out_json', type=str, default=None)
+
+    args = parser.parse_args()
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    df = pd.read_csv(args.data_csv)
+    if args.limit:
+        df = df.head(args.limit)
+    labels = [0 if label == 'non_dysarthria' else 1 for label in df.iloc[:, 0]]
+    genders = [gender_to_value(gender) for gender in df.iloc[:, 1]]
+
+    # features are shared by every mode so only the model cost is compared
+    reference = Classifier(args.model_path, precision="fp32")
+    mels = [load_mel_for_inference(wav_file, n_mels=reference.n_mels, frontend=reference.frontend) for wav_file in tqdm(df.iloc[:, 2], desc="Mels")]
+    audio_frames = sum(mel.shape[-1] for mel in mels)
+
+    results = {}
+    for precision in ["fp32"] + [p for p in args.precisions if p != "fp32"]:
+        classifier = reference if precision == "fp32" else Classifier(args.model_path, precision=precision)
+        classify_long_clip(classifier.model, mels[0], genders[0], classifier.window_T, classifier.hop_T, classifier.device)  # warm-up
+
+        preds, probs = [], []
+        start = time.perf_counter()
+        for mel, gender in tqdm(zip(mels, genders), total=len(mels), desc=precision):
+            pred, _, mean_probs = classify_long_clip(
+                classifier.model, mel, gender, classifier.window_T, classifier.hop_T, classifier.device,
+                batch_size=classifier.batch_size,
+            )
+            preds.append(pred)
+            probs.append(mean_probs[0, 1].item())
+        elapsed = time.perf_counter() - start
+
+        results[precision] = {
+            "accuracy": sum(int(p == y) for p, y in zip(preds, labels)) / len(labels),
+            "preds": preds,
+            "probs": probs,
+            "ms_per_clip": 1000 * elapsed / len(mels),
+            "ms_per_second_of_audio": 1000 * elapsed / (audio_frames * HOP / SR),
+            "weights_mb": weights_mb(classifier.model),
+        }
+
+    base = results["fp32"]
+    print(f"\n{'mode':<6} {'acc':>7} {'Δacc':>8} {'agree':>7} {'mean|Δp|':>9} {'max|Δp|':>9} {'ms/clip':>9} {'speedup':>8} {'weights MB':>11}")
+    report = {}
+    for precision, r in results.items():
+        deltas = [abs(p - q) for p, q in zip(r["probs"], base["probs"])]
+        report[precision] = {
+            "accuracy": r["accuracy"],
+            "accuracy_delta": r["accuracy"] - base["accuracy"],
+            "agreement_with_fp32": sum(int(p == q) for p, q in zip(r["preds"], base["preds"])) / len(labels),
+            "mean_abs_prob_delta": sum(deltas) / len(deltas),
+            "max_abs_prob_delta": max(deltas),
+            "ms_per_clip": r["ms_per_clip"],
+            "ms_per_second_of_audio": r["ms_per_second_of_audio"],
+            "speedup_vs_fp32": base["ms_per_clip"] / r["ms_per_clip"],
+            "weights_mb": r["weights_mb"],
+        }
+        m = report[precision]
+        print(f"{precision:<6} {m['accuracy']:>7.4f} {m['accuracy_delta']:>+8.4f} {m['agreement_with_fp32']:>7.4f} "
+              f"{m['mean_abs_prob_delta']:>9.5f} {m['max_abs_prob_delta']:>9.5f} {m['ms_per_clip']:>9.1f} "
+              f"{m['speedup_vs_fp32']:>7.2f}x {m['weights_mb']:>11.1f}")
+
+    if args.out_json:
+        with open(args.out_json, "w", encoding="utf-8") as f:
+            json.dump({"rows": len(labels), "threads": torch.get_num_threads(), "modes": report}, f, indent=4)
+
+
+if __name__ == "__main__":
+    evaluate()
@@ -0,0 +1,46 @@
+import argparse
+import time
+
+import torch
+
+from model.bert.inference import load_model
+from model.bert.runtime import export_graph, GraphModel
+
+
+def export():
+    parser = argparse.ArgumentParser(description='Export a SpectrogramBERTClassifier checkpoint to a TorchScript or ONNX graph for Classifier(backend=...)')
+    parser.add_argument('--model_path', type=str, default='./data/models/best_model.pt')
+    parser.add_argument('--format', type=str, default='onnx', choices=['onnx', 'torchscript'])
+    parser.add_argument('--out', type=str, required=True, help='graph file to write; its config goes to <out>.json')
+    parser.add_argument('--n_mels', type=int, default=80)
+    parser.add_argument('--window_T', type=int, default=128, help='fixed window length baked into the graph')
+
+    args = parser.parse_args()
+
+    model = load_model(args.model_path, n_mels=args.n_mels, num_classes=2)
+    export_graph(model, args.out, args.format, n_mels=args.n_mels, window_T=args.window_T)
+
+    # sanity check the graph against eager PyTorch and compare batch-1 latency
+    graph = GraphModel(args.out, args.format)
+    gender = torch.ones(1, 1)
+    with torch.no_grad():
+        for batch in (1, 7):
+            mel = torch.randn(batch, args.n_mels, args.window_T)
+            lengths = torch.full((batch,), args.window_T)
+            diff = (graph(mel, lengths=lengths, gender=gender.expand(batch, 1)) - model(mel, lengths=lengths, gender=gender.expand(batch, 1))).abs().max()
+            print(f"batch {batch}: max |graph - eager| = {diff.item():.2e}")
+
+        mel = torch.randn(1, args.n_mels, args.window_T)
+        lengths = torch.full((1,), args.window_T)
+        for name, fn in (("eager", model), (args.format, graph)):
+            fn(mel, lengths=lengths, gender=gender)
+            start = time.perf_counter()
+            for _ in range(20):
+                fn(mel, lengths=lengths, gender=gender)
+            print(f"{name:<12} {1000 * (time.perf_counter() - start) / 20:7.2f} ms per window at batch size 1")
+
+    print(f"Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    export()
@@ -0,0 +1,245 @@
+import argparse
+import itertools
+import json
+import math
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List
+
+import requests
+
+
+# Replays assessment sessions against a running backend:
+#   GET /questions, GET /request_text, POST /upload (a recording from data/audio with the answers of a
+#   real respondent from data/background/user_responses), then a few /chatbot (or /chatbot/stream) turns.
+# Run the backend against local_llm_server.py (OPENAI_BASE_URL) to take the network out of the numbers.
+# requests comes from the bench dependency group: uv run --group bench python load_test.py ...
+
+GENDERS = ('male', 'female', 'm', 'f', 'أنثى', 'ذكر')
+CHAT_MESSAGES = (
+    "Can you explain my speech rate result?",
+    "What exercises should I start with?",
+    "How long until I see improvement?",
+    "Is my dysarthria probability something to worry about?",
+    "ما هي أهم التوصيات بالنسبة لي؟",
+    "Can you give me a daily practice plan?",
+)
+
+
+def percentile(values: List[float], q: float) -> float:
+
+    """Nearest-rank percentile of `values` (q in 0..100)."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def load_sessions(audio_dir: Path, answers_dir: Path, question_keys: List[str]) -> List[Dict]:
+
+    """(wav bytes, answers) pairs; only answers covering every question with a usable gender are kept."""
+    recordings = []
+    for wav in sorted(audio_dir.glob("*.wav")):
+        content = wav.read_bytes()
+        if content[:4] == b"RIFF":  # some uploads were stored as WebM under a .wav name
+            recordings.append((wav.name, content))
+
+    answers = []
+    for file in sorted(answers_dir.glob("*.json")):
+        data = json.loads(file.read_text(encoding= "utf-8"))
+        gender = data.get("0")
+        if isinstance(gender, str) and gender.lower() in GENDERS and all(key in data for key in question_keys):
+            answers.append({key: data[key] for key in question_keys})
+
+    if not recordings or not answers:
+        raise SystemExit(f"Nothing to replay: {len(recordings)} RIFF recordings in {audio_dir}, "
+                         f"{len(answers)} complete answer sets in {answers_dir}")
+    # every recording and every answer set is used at least once
+    count = max(len(recordings), len(answers))
+    return [{"audio": recordings[i % len(recordings)], "answers": answers[i % len(answers)]} for i in range(count)]
+
+
+class Recorder:
+
+    def __init__(self):
+
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.ttft = defaultdict(list)
+
+    def record(self, endpoint: str, seconds: float, ok: bool, ttft: float | None = None) -> None:
+
+        with self._lock:
+            if ok:
+                self.latencies[endpoint].append(seconds)
+                if ttft is not None:
+                    self.ttft[endpoint].append(ttft)
+            else:
+                self.errors[endpoint] += 1
+
+    def report(self, elapsed: float) -> Dict[str, Dict]:
+
+        report = {}
+        for endpoint in sorted(set(self.latencies) | set(self.errors)):
+            values = self.latencies[endpoint]
+            row = {"count": len(values), "errors": self.errors[endpoint], "throughput_rps": len(values) / elapsed}
+            if values:
+                row.update({f"p{q}_ms": 1000 * percentile(values, q) for q in (50, 95, 99)})
+                row["mean_ms"] = 1000 * sum(values) / len(values)
+            if self.ttft[endpoint]:
+                row.update({f"ttft_p{q}_ms": 1000 * percentile(self.ttft[endpoint], q) for q in (50, 95, 99)})
+            report[endpoint] = row
+        return report
+
+
+class Session:
+
+    def __init__(self, base_url: str, recorder: Recorder, timeout: float):
+
+        self.base_url = base_url.rstrip("/")
+        self.recorder = recorder
+        self.timeout = timeout
+        self.http = requests.Session()
+
+    def timed(self, endpoint: str, method: str, path: str, **kwargs) -> requests.Response | None:
+
+        start = time.perf_counter()
+        try:
+            response = self.http.request(method, self.base_url + path, timeout= self.timeout, **kwargs)
+            ok = response.ok
+        except requests.RequestException as e:
+            print(f"{endpoint}: {e}", file= sys.stderr)
+            response, ok = None, False
+        self.recorder.record(endpoint, time.perf_counter() - start, ok)
+        if response is not None and not ok:
+            print(f"{endpoint}: {response.status_code} {response.text[:200]}", file= sys.stderr)
+        return response if ok else None
+
+    def upload(self, session: Dict, lang: str, mode: str, cache: bool) -> str | None:
+
+        sample = self.timed("GET /request_text", "GET", f"/request_text?lang={lang}")
+        if sample is None:
+            return None
+        sample = sample.json()["data"]
+        form = {"data": json.dumps({"data": session["answers"], "text": sample["text"], "phonemes": sample["phonemes"]}, ensure_ascii= False)}
+        name, audio = session["audio"]
+        query = f"/upload?lang={lang}&mode={mode}" + ("" if cache else "&cache=0")
+
+        if mode == "sync":
+            response = self.timed("POST /upload", "POST", query, data= form, files= {"audio_file": (name, audio, "audio/wav")})
+            return response.json()["data"]["id"] if response is not None else None
+
+        # job mode: the endpoint latency is the 202, the end-to-end time is until the job is done
+        start = time.perf_counter()
+        response = self.timed("POST /upload?mode=job", "POST", query, data= form, files= {"audio_file": (name, audio, "audio/wav")})
+        if response is None:
+            return None
+        job = response.json()["data"]
+        while True:
+            status = self.http.get(self.base_url + job["status_url"], timeout= self.timeout).json()["data"]
+            if status["status"] in ("done", "failed"):
+                break
+            time.sleep(0.2)
+        self.recorder.record("upload job (end to end)", time.perf_counter() - start, status["status"] == "done")
+        return job["id"] if status["status"] == "done" else None
+
+    def chat(self, uuid: str, message: str, stream: bool) -> None:
+
+        if not stream:
+            self.timed("POST /chatbot", "POST", "/chatbot", json= {"uuid": uuid, "message": message})
+            return
+
+        start = time.perf_counter()
+        first, ok = None, False
+        try:
+            with self.http.post(self.base_url + "/chatbot/stream", json= {"uuid": uuid, "message": message},
+                                timeout= self.timeout, stream= True) as response:
+                event = None
+                for line in response.iter_lines(decode_unicode= True):
+                    if line.startswith("event: "):
+                        event = line[7:]
+                        if event == "delta" and first is None:
+                            first = time.perf_counter() - start
+                    elif line.startswith("data: ") and event in ("done", "error"):
+                        ok = event == "done"
+                        if not ok:
+                            print(f"POST /chatbot/stream: {line[6:200]}", file= sys.stderr)
+        except requests.RequestException as e:
+            print(f"POST /chatbot/stream: {e}", file= sys.stderr)
+        self.recorder.record("POST /chatbot/stream", time.perf_counter() - start, ok, ttft= first)
+
+    def run(self, session: Dict, args) -> None:
+
+        self.timed("GET /questions", "GET", "/questions")
+        uuid = self.upload(session, args.lang, args.upload_mode, not args.no_cache)
+        if uuid is None:
+            return
+        for message in random.sample(CHAT_MESSAGES, min(args.chat_turns, len(CHAT_MESSAGES))):
+            self.chat(uuid, message, args.stream)
+
+
+def load_test():
+    parser = argparse.ArgumentParser(description='Replay realistic assessment sessions against the backend and report latency percentiles per endpoint')
+    parser.add_argument('--base_url', type=str, default='http://127.0.0.1:5000')
+    parser.add_argument('--audio_dir', type=str, default='./data/audio')
+    parser.add_argument('--answers_dir', type=str, default='./data/background/user_responses')
+    parser.add_argument('--users', type=int, default=4, help='concurrent simulated users')
+    parser.add_argument('--sessions', type=int, default=20, help='total sessions to replay')
+    parser.add_argument('--chat_turns', type=int, default=3, help='chatbot messages per session')
+    parser.add_argument('--lang', type=str, default='en', choices=['en', 'ar'])
+    parser.add_argument('--upload_mode', type=str, default='sync', choices=['sync', 'job'])
+    parser.add_argument('--stream', action='store_true', help='use /chatbot/stream and also report time to first delta')
+    parser.add_argument('--no_cache', action='store_true', help='upload with ?cache=0 so every report reaches the LLM')
+    parser.add_argument('--timeout', type=float, default=300.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out_json', type=str, default=None)
+
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    keys = list(requests.get(args.base_url.rstrip("/") + "/questions", timeout= args.timeout).json()["data"])
+    sessions = load_sessions(Path(args.audio_dir), Path(args.answers_dir), keys)
+    random.shuffle(sessions)
+    queue = iter(itertools.islice(itertools.cycle(sessions), args.sessions))
+    queue_lock = threading.Lock()
+    recorder = Recorder()
+
+    def user():
+        client = Session(args.base_url, recorder, args.timeout)
+        while True:
+            with queue_lock:
+                session = next(queue, None)
+            if session is None:
+                return
+            client.run(session, args)
+
+    print(f"Replaying {args.sessions} sessions ({len(sessions)} distinct) with {args.users} users against {args.base_url}")
+    start = time.perf_counter()
+    threads = [threading.Thread(target= user) for _ in range(args.users)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    report = recorder.report(elapsed)
+    print(f"\n{'endpoint':<26} {'ok':>5} {'err':>4} {'req/s':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for endpoint, row in report.items():
+        print(f"{endpoint:<26} {row['count']:>5} {row['errors']:>4} {row['throughput_rps']:>7.2f} "
+              f"{row.get('p50_ms', float('nan')):>9.1f} {row.get('p95_ms', float('nan')):>9.1f} {row.get('p99_ms', float('nan')):>9.1f}")
+        if "ttft_p50_ms" in row:
+            print(f"{'  first delta':<26} {'':>5} {'':>4} {'':>7} {row['ttft_p50_ms']:>9.1f} {row['ttft_p95_ms']:>9.1f} {row['ttft_p99_ms']:>9.1f}")
+    print(f"\n{elapsed:.1f} s wall clock, {args.sessions / elapsed:.2f} sessions/s")
+
+    if args.out_json:
+        with open(args.out_json, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "elapsed_s": elapsed, "endpoints": report}, f, indent=4, ensure_ascii=False)
+
+    sys.exit(1 if any(row["errors"] for row in report.values()) else 0)
+
+
+if __name__ == "__main__":
+    load_test()
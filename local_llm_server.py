@@ -0,0 +1,212 @@
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterator
+
+from flask import Flask, Response, jsonify, request
+
+
+# Stand-in for the OpenAI Responses API (`responses.parse` and `responses.stream`) so /upload and
+# /chatbot can be load-tested offline. Point the backend at it with OPENAI_BASE_URL=http://127.0.0.1:8001/v1.
+
+EN_WORDS = ("speech", "rate", "fluency", "pause", "practice", "reading", "rhythm", "breathing", "articulation",
+            "clarity", "daily", "exercise", "slowly", "sentence", "sound", "voice", "therapy", "progress")
+AR_WORDS = ("الكلام", "سرعة", "الطلاقة", "تمرين", "القراءة", "التنفس", "النطق", "وضوح", "يومي", "الصوت", "تقدم", "جملة")
+
+
+def parse_latency(spec: str) -> Callable[[], float]:
+
+    """
+    Latency sampler in seconds from a spec string:
+    "fixed:S", "uniform:LOW,HIGH" or "lognormal:MEDIAN,SIGMA" (long right tail, like real LLM calls).
+    """
+    kind, _, params = spec.partition(":")
+    values = [float(v) for v in params.split(",") if v]
+    if kind == "fixed" and len(values) == 1:
+        return lambda: values[0]
+    if kind == "uniform" and len(values) == 2:
+        return lambda: random.uniform(values[0], values[1])
+    if kind == "lognormal" and len(values) == 2:
+        return lambda: random.lognormvariate(math.log(values[0]), values[1])
+    raise argparse.ArgumentTypeError(f"Bad latency spec {spec!r}; use fixed:S, uniform:LOW,HIGH or lognormal:MEDIAN,SIGMA")
+
+
+def words(pool, low: int, high: int) -> str:
+
+    return " ".join(random.choice(pool) for _ in range(random.randint(low, high)))
+
+
+def instance(schema: Dict[str, Any], defs: Dict[str, Any], name: str = "") -> Any:
+
+    """A random value valid under the (strict, pydantic-generated) JSON schema `schema`."""
+    if "$ref" in schema:
+        return instance(defs[schema["$ref"].split("/")[-1]], defs, name)
+    if "anyOf" in schema:
+        options = [s for s in schema["anyOf"] if s.get("type") != "null"] or schema["anyOf"]
+        return instance(options[0], defs, name)
+    if "const" in schema:
+        return schema["const"]
+    if "enum" in schema:
+        return random.choice(schema["enum"])
+
+    kind = schema.get("type")
+    if isinstance(kind, list):
+        kind = next((k for k in kind if k != "null"), "null")
+    if kind == "object":
+        return {key: instance(prop, defs, key) for key, prop in schema.get("properties", {}).items()}
+    if kind == "array":
+        count = random.randint(max(schema.get("minItems", 1), 1), min(schema.get("maxItems", 3), 3))
+        return [instance(schema.get("items", {}), defs, name) for _ in range(count)]
+    if kind == "string":
+        pool = AR_WORDS if name.endswith("_ar") else EN_WORDS
+        return words(pool, 20, 60) if name in ("response",) or name.startswith("overview") else words(pool, 4, 12)
+    if kind == "integer":
+        return random.randint(schema.get("minimum", 0), schema.get("maximum", 200))
+    if kind == "number":
+        return round(random.uniform(schema.get("minimum", 80.0), schema.get("maximum", 180.0)), 1)
+    if kind == "boolean":
+        return True
+    return None
+
+
+class Stats:
+
+    def __init__(self):
+
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.rejected = 0
+
+    def __enter__(self):
+
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        return self
+
+    def __exit__(self, *exc):
+
+        with self._lock:
+            self.in_flight -= 1
+
+    def snapshot(self) -> Dict[str, int]:
+
+        with self._lock:
+            return {"requests": self.requests, "in_flight": self.in_flight,
+                    "peak_in_flight": self.peak_in_flight, "rejected": self.rejected}
+
+
+def create_app(analysis_latency: Callable[[], float], chat_latency: Callable[[], float], ttft: Callable[[], float],
+               chars_per_s: float = 400.0, chunk_chars: int = 16, error_rate: float = 0.0) -> Flask:
+
+    app = Flask(__name__)
+    stats = Stats()
+
+    def response_object(body: Dict[str, Any], text: str, status: str) -> Dict[str, Any]:
+
+        message = {"id": f"msg_{uuid.uuid4().hex}", "type": "message", "role": "assistant", "status": status,
+                   "content": [{"type": "output_text", "text": text, "annotations": []}] if status == "completed" else []}
+        return {
+            "id": f"resp_{uuid.uuid4().hex}", "object": "response", "created_at": int(time.time()),
+            "status": status, "model": body.get("model", "local-stand-in"),
+            "output": [message] if status == "completed" else [],
+            "parallel_tool_calls": True, "tool_choice": "auto", "tools": body.get("tools", []),
+            "text": body.get("text", {}),
+            "usage": {"input_tokens": len(json.dumps(body.get("input", ""))) // 4, "input_tokens_details": {"cached_tokens": 0},
+                      "output_tokens": len(text) // 4, "output_tokens_details": {"reasoning_tokens": 0},
+                      "total_tokens": (len(json.dumps(body.get("input", ""))) + len(text)) // 4},
+        }
+
+    def stream_events(body: Dict[str, Any], text: str) -> Iterator[str]:
+
+        seq = iter(range(1 << 30))
+        created = response_object(body, "", "in_progress")
+        item_id = f"msg_{uuid.uuid4().hex}"
+        item = {"id": item_id, "type": "message", "role": "assistant", "status": "in_progress", "content": []}
+        part = {"type": "output_text", "text": "", "annotations": []}
+        where = {"item_id": item_id, "output_index": 0, "content_index": 0}
+
+        def event(kind, **data):
+            payload = {"type": kind, "sequence_number": next(seq), **data}
+            return f"event: {kind}\ndata: {json.dumps(payload, ensure_ascii= False)}\n\n"
+
+        yield event("response.created", response= created)
+        yield event("response.in_progress", response= created)
+        yield event("response.output_item.added", output_index= 0, item= item)
+        yield event("response.content_part.added", part= part, **where)
+        time.sleep(ttft())
+        for start in range(0, len(text), chunk_chars):
+            chunk = text[start:start + chunk_chars]
+            yield event("response.output_text.delta", delta= chunk, logprobs= [], **where)
+            time.sleep(len(chunk) / chars_per_s)
+        yield event("response.output_text.done", text= text, logprobs= [], **where)
+        yield event("response.content_part.done", part= dict(part, text= text), **where)
+        done = response_object(body, text, "completed")
+        done["output"][0]["id"] = item_id
+        yield event("response.output_item.done", output_index= 0, item= done["output"][0])
+        yield event("response.completed", response= done)
+
+    @app.route("/v1/responses", methods= ["POST"])
+    def responses():
+
+        body = request.get_json(force= True)
+        if error_rate and random.random() < error_rate:
+            with stats._lock:
+                stats.rejected += 1
+            return jsonify({"error": {"message": "Rate limit reached (injected)", "type": "requests", "code": "rate_limit_exceeded"}}), \
+                429, {"retry-after": "0.1"}
+
+        schema = body.get("text", {}).get("format", {}).get("schema")
+        if schema is None:
+            return jsonify({"error": {"message": "Only structured outputs (text.format json_schema) are supported", "type": "invalid_request_error"}}), 400
+        text = json.dumps(instance(schema, schema.get("$defs", {})), ensure_ascii= False)
+        is_analysis = "overview_en" in schema.get("properties", {})
+
+        if body.get("stream"):
+            def generate():
+                with stats:
+                    yield from stream_events(body, text)
+            return Response(generate(), mimetype= "text/event-stream")
+
+        with stats:
+            time.sleep((analysis_latency if is_analysis else chat_latency)())
+            return jsonify(response_object(body, text, "completed"))
+
+    @app.route("/stats", methods= ["GET"])
+    def get_stats():
+
+        return jsonify(stats.snapshot())
+
+    return app
+
+
+def serve():
+    parser = argparse.ArgumentParser(description='Local stand-in for the OpenAI Responses API returning schema-valid structured outputs')
+    parser.add_argument('--host', type=str, default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--analysis_latency', type=parse_latency, default='lognormal:8,0.35', help='latency of analyzer reports (overview_en schema)')
+    parser.add_argument('--chat_latency', type=parse_latency, default='lognormal:2,0.4', help='latency of non-streamed chatbot replies')
+    parser.add_argument('--ttft', type=parse_latency, default='lognormal:0.6,0.3', help='time to first token of streamed replies')
+    parser.add_argument('--chars_per_s', type=float, default=400.0, help='generation speed of streamed replies')
+    parser.add_argument('--chunk_chars', type=int, default=16, help='characters per streamed delta')
+    parser.add_argument('--error_rate', type=float, default=0.0, help='fraction of calls answered with 429 (to exercise retries)')
+    parser.add_argument('--seed', type=int, default=None)
+
+    args = parser.parse_args()
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    app = create_app(args.analysis_latency, args.chat_latency, args.ttft, args.chars_per_s, args.chunk_chars, args.error_rate)
+    print(f"Serving the Responses API stand-in on http://{args.host}:{args.port}/v1")
+    app.run(host= args.host, port= args.port, threaded= True)
+
+
+if __name__ == "__main__":
+    serve()
@@ -0,0 +1,70 @@
+import argparse
+import json
+from pathlib import Path
+
+from tqdm import tqdm
+
+from utils.audio.audio import AudioBuffer
+from utils.storage.backends import SQLiteBackend
+
+
+def migrate():
+    parser = argparse.ArgumentParser(description='Import the JSON file storage (sessions, conversations, chat summaries, audio metadata) into the SQLite backend')
+    parser.add_argument('--db', type=str, default='./data/storage.db')
+    parser.add_argument('--responses_dir', type=str, default='./data/background/user_responses')
+    parser.add_argument('--convo_dir', type=str, default='./data/agent_convo')
+    parser.add_argument('--audio_dir', type=str, default='./data/audio')
+    parser.add_argument('--skip_audio', action='store_true', help='do not index the metadata of existing WAV files')
+
+    args = parser.parse_args()
+    store = SQLiteBackend(args.db, audio_dir=args.audio_dir)
+    skipped = []
+
+    # re-running is safe: sessions are upserted and each conversation replaces its previous import
+    sessions = 0
+    for file in tqdm(sorted(Path(args.responses_dir).glob('*.json')), desc='Sessions'):
+        try:
+            store.save_data(file.stem, json.loads(file.read_text(encoding='utf-8')))
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            skipped.append(f"{file}: {e}")
+            continue
+        sessions += 1
+
+    messages = 0
+    convos = sorted(Path(args.convo_dir).glob('*.json'))
+    for file in tqdm(convos, desc='Conversations'):
+        try:
+            convo = json.loads(file.read_text(encoding='utf-8'))
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            skipped.append(f"{file}: {e}")
+            continue
+        messages += store.import_conversation(file.stem, convo, created=file.stat().st_mtime)
+
+    summaries = 0
+    for file in tqdm(sorted((Path(args.convo_dir) / 'summaries').glob('*.json')), desc='Chat summaries'):
+        try:
+            store.store_chat_summary(file.stem, json.loads(file.read_text(encoding='utf-8')))
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            skipped.append(f"{file}: {e}")
+            continue
+        summaries += 1
+
+    audio = 0
+    if not args.skip_audio:
+        for file in tqdm(sorted(Path(args.audio_dir).glob('*.wav')), desc='Audio'):
+            try:
+                buffer = AudioBuffer.from_wav_bytes(file.read_bytes())
+            except Exception as e:  # recordings saved under .wav in other containers (webm, ...)
+                skipped.append(f"{file}: {e}")
+                continue
+            store.record_audio(file.stem, buffer, str(file))
+            audio += 1
+
+    print(f"Imported {sessions} sessions, {messages} messages from {len(convos)} conversations, "
+          f"{summaries} chat summaries and {audio} audio files into {args.db}")
+    for line in skipped:
+        print(f"Skipped {line}")
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,165 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+# answers-dict fields holding measured values; everything else is a questionnaire answer
+METRIC_FIELDS = ("speech_rate", "phoneme_rate", "dysarthria_prob")
+
+
+def _bucket(value: float, width: float) -> float:
+
+    return round(round(float(value) / width) * width, 6)
+
+
+def _normalize(value: Any) -> Any:
+
+    if isinstance(value, str):
+        return " ".join(value.split()).casefold()
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+class AnalysisCache:
+
+    """
+    Disk-backed LRU/TTL cache of GPTAgent analysis reports.
+
+    The key is a sha256 of the canonicalized answers (whitespace- and
+    case-normalized, keys sorted) with speech rate, phoneme rate and dysarthria
+    probability snapped to buckets, plus a hash of the prompt and the model
+    version, so a prompt or model change never serves an old report. Profiles
+    that land in the same buckets share one report, including the numbers it
+    quotes; widen or narrow the buckets to trade hit rate against precision.
+
+    Each entry is one JSON file whose mtime is its creation time and whose atime
+    is its last use. The directory is kept under `max_entries` by deleting the
+    least recently used files, and entries created more than `ttl` seconds ago
+    are treated as misses and deleted however often they are read.
+
+    Example:
+        cache = AnalysisCache("./data/analysis_cache", ttl= 7 * 24 * 3600)
+        report = cache.get(key) or cache.put(key, agent.analyze_data(data))
+    """
+    def __init__(self, cache_dir: str | Path, max_entries: int = 10000, ttl: float = 7 * 24 * 3600,
+                 rate_bucket: float = 10.0, phoneme_rate_bucket: float = 25.0, prob_bucket: float = 0.05):
+
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents= True, exist_ok= True)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.rate_bucket = rate_bucket
+        self.phoneme_rate_bucket = phoneme_rate_bucket
+        self.prob_bucket = prob_bucket
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries = sum(1 for _ in self.cache_dir.glob("*.json"))
+
+    def key(self, data: Dict[str, Any], prompt: str, model_version: str) -> str:
+
+        answers = {k: v for k, v in data.items() if k not in METRIC_FIELDS}
+        prob = data.get("dysarthria_prob")
+        if isinstance(prob, (list, tuple)):  # Classifier.predict returns (pred, prob)
+            prob = prob[-1]
+        metrics = {
+            "speech_rate": _bucket(data["speech_rate"], self.rate_bucket) if data.get("speech_rate") is not None else None,
+            "phoneme_rate": _bucket(data["phoneme_rate"], self.phoneme_rate_bucket) if data.get("phoneme_rate") is not None else None,
+            "dysarthria_prob": _bucket(prob, self.prob_bucket) if prob is not None else None,
+        }
+        canonical = json.dumps({
+            "answers": _normalize(answers),
+            "metrics": metrics,
+            "prompt": hashlib.sha256(prompt.encode("utf-8")).hexdigest(),
+            "model": model_version,
+        }, sort_keys= True, ensure_ascii= False)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+
+        path = self.cache_dir / f"{key}.json"
+        try:
+            entry = json.loads(path.read_text(encoding= "utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        if time.time() - entry["created"] > self.ttl:
+            path.unlink(missing_ok= True)
+            with self._lock:
+                self.misses += 1
+                self.expired += 1
+                self._entries -= 1
+            return None
+
+        try:
+            os.utime(path, (time.time(), entry["created"]))  # atime drives LRU; mtime stays the creation time for the TTL
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return entry["response"]
+
+    def put(self, key: str, response: Dict[str, Any]) -> Dict[str, Any]:
+
+        path = self.cache_dir / f"{key}.json"
+        tmp = self.cache_dir / f".{key}.{uuid.uuid4().hex}.tmp"
+        existed = path.exists()
+        created = time.time()
+        tmp.write_text(json.dumps({"created": created, "response": response}, ensure_ascii= False), encoding= "utf-8")
+        os.utime(tmp, (created, created))
+        os.replace(tmp, path)  # atomic, so concurrent readers never see a partial entry
+        with self._lock:
+            self._entries += 0 if existed else 1
+            over = self._entries > self.max_entries
+        if over:
+            self.evict()
+        return response
+
+    def evict(self) -> None:
+
+        """Delete expired entries, then the least recently used ones until at most `max_entries` remain."""
+        now = time.time()
+        entries = []
+        for f in self.cache_dir.glob("*.json"):
+            try:
+                st = f.stat()
+            except FileNotFoundError:
+                continue  # removed by another process
+            entries.append((st.st_atime, st.st_mtime, f))
+        entries.sort(key= lambda e: e[0])
+
+        removed = 0
+        for _, created, f in entries:
+            if len(entries) - removed <= self.max_entries and now - created <= self.ttl:
+                continue
+            f.unlink(missing_ok= True)
+            removed += 1
+        with self._lock:
+            self.evictions += removed
+            self._entries = len(entries) - removed
+
+    def stats(self) -> Dict[str, Any]:
+
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "entries": self._entries,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
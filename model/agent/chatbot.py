@@ -1,14 +1,22 @@
 import json
-from typing import List, Dict, Any, cast
+import re
+from typing import List, Dict, Any, Iterator, Tuple, cast
 from pathlib import Path
 import os
+import threading
+import time
 from dotenv import load_dotenv
 from enum import Enum
-from openai import OpenAI
 from pydantic import BaseModel
 from uuid import UUID
 
+from model.agent.client import get_client_manager
 from utils.storage.storage import store_response, get_chat
+from model.agent.context import build_context
+from utils.metrics.metrics import histogram, stage
+
+AGENT_SECONDS = histogram("agent_call_seconds", "Seconds per LLM call made by an agent, retries and queueing included", labels= ("agent",))
+FIRST_DELTA_SECONDS = histogram("agent_first_delta_seconds", "Seconds until the first streamed chatbot text", labels= ("agent",))
 
 class Response(BaseModel):
 
@@ -16,6 +24,84 @@ class Response(BaseModel):
     response: str
 
 
+_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+
+def _hex4(digits: str) -> int:
+
+    """Value of the four hex digits of a \\u escape, or -1 if they aren't hex."""
+    try:
+        return int(digits, 16) if len(digits) == 4 and digits.isascii() and digits.isalnum() else -1
+    except ValueError:
+        return -1
+
+
+class JsonStringField:
+
+    """
+    Incrementally decodes one top-level string field out of streamed JSON text.
+
+    Structured output arrives as raw JSON deltas (`{"accepted_msg": true, "response": "Hel`...);
+    `feed` returns the newly decoded characters of the field's value, holding back
+    an escape sequence that is split across deltas. Unpaired surrogates and malformed
+    \\u escapes decode to U+FFFD instead of failing the stream.
+    """
+    def __init__(self, field: str):
+
+        self._start = re.compile(r'"%s"\s*:\s*"' % re.escape(field))
+        self._raw = ""
+        self._pos = None     # index in _raw of the next undecoded character of the value
+        self.done = False
+
+    def feed(self, delta: str) -> str:
+
+        self._raw += delta
+        if self._pos is None:
+            match = self._start.search(self._raw)
+            if match is None:
+                return ""
+            self._pos = match.end()
+        if self.done:
+            return ""
+
+        out = []
+        raw, i = self._raw, self._pos
+        while i < len(raw):
+            c = raw[i]
+            if c == '"':
+                self.done = True
+                i += 1
+                break
+            if c != '\\':
+                out.append(c)
+                i += 1
+                continue
+            if i + 1 >= len(raw):
+                break  # escape split across deltas
+            if raw[i + 1] != 'u':
+                out.append(_ESCAPES.get(raw[i + 1], raw[i + 1]))
+                i += 2
+                continue
+            if i + 6 > len(raw):
+                break
+            code = _hex4(raw[i + 2:i + 6])
+            if 0xD800 <= code < 0xDC00:  # high surrogate: wait for its pair
+                if i + 8 > len(raw) or (raw[i + 6:i + 8] == '\\u' and i + 12 > len(raw)):
+                    break
+                low = _hex4(raw[i + 8:i + 12]) if raw[i + 6:i + 8] == '\\u' else -1
+                if 0xDC00 <= low < 0xE000:
+                    code = 0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)
+                    i += 6
+                else:  # unpaired; whatever follows is decoded on its own
+                    code = 0xFFFD
+            elif 0xDC00 <= code < 0xE000 or code < 0:  # lone low surrogate or malformed escape
+                code = 0xFFFD
+            out.append(chr(code))
+            i += 6
+        self._pos = i
+        return "".join(out)
+
+
 
 class ChatBotAgent:
 
@@ -28,7 +114,7 @@ class ChatBotAgent:
         path = Path(main_prompt_path)
         assert path.exists(), f"Could not find path to main agent prompt provided in env as {main_prompt_path}"
 
-        self.client = OpenAI()
+        self.clients = get_client_manager()  # shared pooled client; openai itself is imported on the first call
         self.prompt = path.read_text(encoding= "utf-8")
         model_version = os.environ.get("MODEL_NAME")
         if model_version is None:
@@ -42,28 +128,78 @@ class ChatBotAgent:
     def respond(self, data: Dict | List[Dict]) -> Dict[str, List]:
 
         
-        response = self.client.responses.parse(
-        model= self.model_version,
-        tools= [
-            { "type": "web_search" },
-        ],
-        input=cast(Any, [
-            {
-                "role": "system",
-                "content": self.prompt
-            },
-            {"role": "user", "content": json.dumps(data, indent = 4)},
-        ]),
-        text_format=Response,
-        )
+        with AGENT_SECONDS.time(agent= "chat"):
+            response = self.clients.call(
+            lambda client: client.responses.parse,
+            model= self.model_version,
+            tools= [
+                { "type": "web_search" },
+            ],
+            input=cast(Any, [
+                {
+                    "role": "system",
+                    "content": self.prompt
+                },
+                {"role": "user", "content": json.dumps(data, ensure_ascii= False)},
+            ]),
+            text_format=Response,
+            )
 
         if response.output_parsed is not None:
             return response.output_parsed.model_dump()
         else:
             raise ValueError(f"Failed to parse response: output_parsed is {response.output_parsed}")
+
+    def respond_stream(self, data: Dict | List[Dict]) -> Iterator[Tuple[str, Any]]:
+
+        """Yields ("delta", text) for each piece of the "response" field as it is generated, then ("final", parsed Response dict)."""
+        field = JsonStringField("response")
+        start = time.perf_counter()
+        first = True
+        with self.clients.stream(
+            lambda client: client.responses.stream,
+            model= self.model_version,
+            tools= [
+                { "type": "web_search" },
+            ],
+            input=cast(Any, [
+                {
+                    "role": "system",
+                    "content": self.prompt
+                },
+                {"role": "user", "content": json.dumps(data, ensure_ascii= False)},
+            ]),
+            text_format=Response,
+        ) as stream:
+            for event in stream:
+                if event.type == "response.output_text.delta":
+                    text = field.feed(event.delta)
+                    if text:
+                        if first:
+                            FIRST_DELTA_SECONDS.observe(time.perf_counter() - start, agent= "chat_stream")
+                            first = False
+                        yield "delta", text
+            response = stream.get_final_response()
+        AGENT_SECONDS.observe(time.perf_counter() - start, agent= "chat_stream")
+
+        if response.output_parsed is None:
+            raise ValueError(f"Failed to parse response: output_parsed is {response.output_parsed}")
+        yield "final", response.output_parsed.model_dump()
     
-chatbot = ChatBotAgent()
-        
+_chatbot = None
+_chatbot_lock = threading.Lock()
+
+
+def get_chatbot() -> ChatBotAgent:
+
+    """Build the shared ChatBotAgent on first use instead of at import time."""
+    global _chatbot
+    with _chatbot_lock:
+        if _chatbot is None:
+            _chatbot = ChatBotAgent()
+    return _chatbot
+
+
 def respond(uuid: UUID, user_text: str) -> Dict:
 
     chat_history = get_chat(uuid)
@@ -76,7 +212,9 @@ def respond(uuid: UUID, user_text: str) -> Dict:
     
     chat_history.append({"user": user_text})
 
-    agent_response = chatbot.respond(chat_history)
+    with stage("chat_context"):
+        context = build_context(uuid, chat_history)
+    agent_response = get_chatbot().respond(context)
 
     store_response(uuid= uuid, is_agent= False, response= user_text)
     store_response(uuid= uuid, is_agent= True, response= agent_response)
@@ -84,6 +222,29 @@ def respond(uuid: UUID, user_text: str) -> Dict:
     return agent_response
 
 
+def respond_stream(uuid: UUID, user_text: str) -> Iterator[Tuple[str, Any]]:
+
+    """Streaming `respond`: ("delta", text) events, then ("final", response) once it is validated and stored."""
+    chat_history = get_chat(uuid)
+    if chat_history == [{}]:
+
+        yield "final", {
+            "accepted_msg": False,
+            "response": "Convo not initiated yet."
+        }
+        return
+
+    chat_history.append({"user": user_text})
+
+    with stage("chat_context"):
+        context = build_context(uuid, chat_history)
+    for kind, payload in get_chatbot().respond_stream(context):
+        if kind == "final":
+            store_response(uuid= uuid, is_agent= False, response= user_text)
+            store_response(uuid= uuid, is_agent= True, response= payload)
+        yield kind, payload
+
+
 if __name__ == "__main__":
 
     uuid = UUID("e4546b0e-d469-461f-b35a-4668aca5b9ee")
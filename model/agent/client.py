@@ -0,0 +1,225 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+from dotenv import load_dotenv
+
+from utils.metrics.metrics import counter, gauge
+
+
+load_dotenv(override= True)
+
+IN_FLIGHT = gauge("openai_requests_in_flight", "OpenAI calls holding an in-flight slot", labels= ("mode",))
+WAITING = gauge("openai_requests_waiting", "OpenAI calls queued for an in-flight slot", labels= ("mode",))
+RETRIES = counter("openai_retries_total", "OpenAI attempts that failed with a retryable error and were retried")
+
+
+class ClientManager:
+
+    """
+    One pooled OpenAI client (sync and async) shared by every agent.
+
+    - HTTP connections are pooled, so a burst of uploads reuses at most
+      `max_connections` keep-alive TLS connections instead of opening new ones.
+    - At most `max_in_flight` calls run at once (per mode; the asyncio limit is
+      per event loop); the rest wait for a slot.
+    - Every call has a `deadline` covering the wait for a slot, all attempts and
+      the backoff between them; each attempt is also capped at `timeout`.
+    - Connection errors, timeouts, 408/409/429 and 5xx are retried up to
+      `max_retries` times with full-jitter exponential backoff, honouring
+      Retry-After. The SDK's own retries are disabled so the two don't stack.
+
+    Example:
+        clients = get_client_manager()
+        response = clients.call(lambda c: c.responses.parse, model= "gpt-4o", input= [...], text_format= Response)
+        response = await clients.acall(lambda c: c.responses.parse, model= "gpt-4o", ...)
+    """
+    def __init__(self, max_connections: int = 20, max_in_flight: int = 8, timeout: float = 60.0, deadline: float = 120.0,
+                 max_retries: int = 3, backoff_base: float = 0.5, backoff_max: float = 8.0):
+
+        self.max_connections = max_connections
+        self.max_in_flight = max_in_flight
+        self.timeout = timeout
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._async_slots = {}  # event loop -> asyncio.Semaphore
+        self._lock = threading.Lock()
+        self._client = None
+        self._async_client = None
+
+    def _limits(self):
+
+        import httpx
+        return httpx.Limits(max_connections= self.max_connections, max_keepalive_connections= self.max_connections)
+
+    @property
+    def client(self):
+
+        with self._lock:
+            if self._client is None:
+                from openai import OpenAI, DefaultHttpxClient
+                self._client = OpenAI(max_retries= 0, timeout= self.timeout, http_client= DefaultHttpxClient(limits= self._limits()))
+            return self._client
+
+    @property
+    def async_client(self):
+
+        with self._lock:
+            if self._async_client is None:
+                from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+                self._async_client = AsyncOpenAI(max_retries= 0, timeout= self.timeout, http_client= DefaultAsyncHttpxClient(limits= self._limits()))
+            return self._async_client
+
+    def call(self, operation: Callable[[Any], Callable[..., Any]], deadline: Optional[float] = None, **kwargs) -> Any:
+
+        """Run `operation(client)(**kwargs)` under the in-flight limit, deadline and retry policy."""
+        end = time.monotonic() + (deadline or self.deadline)
+        with WAITING.track(mode= "sync"):
+            acquired = self._slots.acquire(timeout= max(0.0, end - time.monotonic()))
+        if not acquired:
+            raise TimeoutError(f"No free OpenAI slot within the {deadline or self.deadline:.0f}s deadline")
+        IN_FLIGHT.inc(mode= "sync")
+        try:
+            method = operation(self.client)
+            for attempt in range(self.max_retries + 1):
+                try:
+                    return method(**kwargs, timeout= self._attempt_timeout(end))
+                except Exception as e:
+                    delay = self._retry_delay(e, attempt, end)
+                    if delay is None:
+                        raise
+                time.sleep(delay)
+        finally:
+            IN_FLIGHT.dec(mode= "sync")
+            self._slots.release()
+
+    @contextmanager
+    def stream(self, operation: Callable[[Any], Callable[..., Any]], deadline: Optional[float] = None, **kwargs) -> Iterator[Any]:
+
+        """
+        Open `operation(client)(**kwargs)`, a streaming context manager such as
+        `responses.stream`, and yield the live stream. The in-flight slot is held
+        until the block exits. Retries (and the deadline) only cover opening the
+        stream; once events flow, `timeout` applies to each read.
+        """
+        end = time.monotonic() + (deadline or self.deadline)
+        with WAITING.track(mode= "sync"):
+            acquired = self._slots.acquire(timeout= max(0.0, end - time.monotonic()))
+        if not acquired:
+            raise TimeoutError(f"No free OpenAI slot within the {deadline or self.deadline:.0f}s deadline")
+        IN_FLIGHT.inc(mode= "sync")
+        try:
+            method = operation(self.client)
+            for attempt in range(self.max_retries + 1):
+                manager = method(**kwargs, timeout= self._attempt_timeout(end))
+                try:
+                    events = manager.__enter__()
+                    break
+                except Exception as e:
+                    delay = self._retry_delay(e, attempt, end)
+                    if delay is None:
+                        raise
+                time.sleep(delay)
+            try:
+                yield events
+            finally:
+                manager.__exit__(None, None, None)
+        finally:
+            IN_FLIGHT.dec(mode= "sync")
+            self._slots.release()
+
+    async def acall(self, operation: Callable[[Any], Callable[..., Any]], deadline: Optional[float] = None, **kwargs) -> Any:
+
+        """Async version of `call`, using the shared AsyncOpenAI client."""
+        end = time.monotonic() + (deadline or self.deadline)
+        slots = self._async_semaphore()
+        try:
+            with WAITING.track(mode= "async"):
+                await asyncio.wait_for(slots.acquire(), timeout= max(0.0, end - time.monotonic()))
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"No free OpenAI slot within the {deadline or self.deadline:.0f}s deadline") from None
+        IN_FLIGHT.inc(mode= "async")
+        try:
+            method = operation(self.async_client)
+            for attempt in range(self.max_retries + 1):
+                try:
+                    return await method(**kwargs, timeout= self._attempt_timeout(end))
+                except Exception as e:
+                    delay = self._retry_delay(e, attempt, end)
+                    if delay is None:
+                        raise
+                await asyncio.sleep(delay)
+        finally:
+            IN_FLIGHT.dec(mode= "async")
+            slots.release()
+
+    def _async_semaphore(self) -> asyncio.Semaphore:
+
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            for closed in [l for l in self._async_slots if l.is_closed()]:
+                del self._async_slots[closed]
+            if loop not in self._async_slots:
+                self._async_slots[loop] = asyncio.Semaphore(self.max_in_flight)
+            return self._async_slots[loop]
+
+    def _attempt_timeout(self, end: float) -> float:
+
+        remaining = end - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError("OpenAI call deadline exceeded")
+        return min(self.timeout, remaining)
+
+    def _retry_delay(self, error: Exception, attempt: int, end: float) -> Optional[float]:
+
+        """Seconds to wait before retrying `error`, or None if it should be raised."""
+        import openai
+
+        if isinstance(error, openai.APIStatusError):
+            if error.status_code not in (408, 409, 429) and error.status_code < 500:
+                return None
+        elif not isinstance(error, openai.APIConnectionError):  # includes APITimeoutError
+            return None
+        if attempt >= self.max_retries:
+            return None
+
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after is not None:
+            try:
+                delay = max(delay, float(retry_after))
+            except ValueError:
+                pass  # HTTP-date form; keep the jittered delay
+        if time.monotonic() + delay >= end:
+            return None
+        RETRIES.inc()
+        return delay
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_client_manager() -> ClientManager:
+
+    """The process-wide ClientManager, configured from the environment on first use."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = ClientManager(
+                max_connections= int(os.environ.get("OPENAI_MAX_CONNECTIONS", 20)),
+                max_in_flight= int(os.environ.get("OPENAI_MAX_IN_FLIGHT", 8)),
+                timeout= float(os.environ.get("OPENAI_TIMEOUT", 60)),
+                deadline= float(os.environ.get("OPENAI_DEADLINE", 120)),
+                max_retries= int(os.environ.get("OPENAI_MAX_RETRIES", 3))
+            )
+    return _manager
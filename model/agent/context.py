@@ -0,0 +1,180 @@
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from dotenv import load_dotenv
+
+from utils.storage.storage import get_chat_summary, store_chat_summary
+
+
+load_dotenv(override= True)
+
+CONTEXT_TOKENS = int(os.environ.get("CHATBOT_CONTEXT_TOKENS", 3000))
+RECENT_MESSAGES = int(os.environ.get("CHATBOT_RECENT_MESSAGES", 6))
+SUMMARY_LINE_CHARS = 240
+ARABIC = re.compile(r"[؀-ۿݐ-ݿࢠ-ࣿ]")
+SENTENCE_END = re.compile(r"[.!?؟…](?=\s)")
+
+_encoding = None
+
+
+def estimate_tokens(text: str) -> int:
+
+    """Token count of `text`: exact with tiktoken when installed, else ~4 UTF-8 bytes per token (~2 Arabic letters)."""
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except ImportError:
+            _encoding = False
+    if _encoding:
+        return len(_encoding.encode(text))
+    return (len(text.encode("utf-8")) + 3) // 4
+
+
+def detect_language(text: str) -> str:
+
+    letters = [c for c in text if c.isalpha()]
+    if not letters:
+        return "en"
+    return "ar" if sum(bool(ARABIC.match(c)) for c in letters) / len(letters) > 0.3 else "en"
+
+
+def _pick(report: Dict[str, Any], field: str, lang: str) -> Any:
+
+    """`field_<lang>` when the report has both languages, else the field itself."""
+    return report.get(f"{field}_{lang}", report.get(field))
+
+
+def summarize_report(report: Dict[str, Any], lang: str) -> Dict[str, Any]:
+
+    """
+    Compact, single-language view of the analyzer report.
+
+    Keeps the findings the chatbot refers back to (overview, speech rate,
+    disorders with their symptoms, root causes, prioritized recommendations and
+    tips) and drops the other language, per-disorder pointers and link lists.
+    """
+    severity = report.get("speech_rate_severity_ar" if lang == "ar" else "speech_rate_severity")
+    recommendations = report.get(f"recommendations_{lang}") or []
+    return {
+        "overview": _pick(report, "overview", lang),
+        "speech_rate_comparison": _pick(report, "speech_rate_comparison", lang),
+        "speech_rate_severity": severity,
+        "avg_class_wpm": report.get("avg_class_wpm"),
+        "disorders": [
+            {"name": d.get("disorder_name"), "symptoms": d.get("disorder_symptoms", []), "causes": d.get("disorder_lying_causes", [])}
+            for d in report.get(f"disorders_{lang}") or []
+        ],
+        "root_causes": [{"cause": c.get("cause"), "explanation": c.get("explanation")} for c in report.get(f"root_causes_{lang}") or []],
+        "recommendations": [
+            {"recommendation": r.get("recommendation"), "priority": r.get("priority"), "tips": r.get("tips", [])}
+            for r in recommendations
+        ],
+    }
+
+
+def _is_report(message: Dict) -> bool:
+
+    return isinstance(message.get("agent"), dict) and "overview_en" in message["agent"]
+
+
+def _text(message: Dict) -> Tuple[str, str]:
+
+    """(role, text) of a stored message; chatbot replies are stored as the whole structured Response."""
+    role, content = next(iter(message.items()))
+    if isinstance(content, dict):
+        content = content.get("response", json.dumps(content, ensure_ascii= False))
+    return role, str(content)
+
+
+def shorten(text: str, limit: int = SUMMARY_LINE_CHARS) -> str:
+
+    """
+    `text` cut to at most `limit` characters, ending with "…" when anything was dropped.
+
+    Cuts after the last complete sentence, or else at the last space, as long as that
+    keeps at least half of `limit`, so numbers and words are never split; only a
+    single run without spaces longer than that is cut mid-way.
+    """
+    if len(text) <= limit:
+        return text
+    head = text[:limit - 1]
+    floor = limit // 2
+    sentences = [m.end() for m in SENTENCE_END.finditer(text, 0, limit - 2)]
+    if sentences and sentences[-1] >= floor:
+        return text[:sentences[-1]] + " …"
+    space = head.rfind(" ")
+    if space >= floor:
+        return head[:space] + "…"
+    return head + "…"
+
+
+def _summary_line(message: Dict) -> str:
+
+    role, text = _text(message)
+    return f"{role}: {shorten(' '.join(text.split()))}"
+
+
+def _render(report: Optional[Dict], summary: List[str], recent: List[Dict]) -> List[Dict]:
+
+    context: List[Dict] = []
+    if report is not None:
+        context.append({"agent": report})
+    if summary:
+        context.append({"summary_of_earlier_turns": summary})
+    context.extend({role: text} for role, text in map(_text, recent))
+    return context
+
+
+def build_context(uuid: UUID, chat_history: List[Dict], max_tokens: int = CONTEXT_TOKENS,
+                  recent_messages: int = RECENT_MESSAGES) -> List[Dict]:
+
+    """
+    Chatbot input for `chat_history` (the stored conversation plus the new user message) under `max_tokens`.
+
+    The analyzer report is compacted to the language of the latest user message,
+    the last `recent_messages` messages are kept verbatim and older ones are
+    folded into a rolling summary. The summary is persisted per conversation
+    together with how many messages it covers, so each turn only summarizes the
+    messages that just aged out. If the result is still over budget, the oldest
+    summary lines are dropped; verbatim messages are only summarized when they
+    alone overflow the budget (the newest message is always kept).
+    """
+    messages = [m for m in chat_history if m]
+    report = None
+    if messages and _is_report(messages[0]):
+        lang = detect_language(_text(messages[-1])[1])
+        report = summarize_report(messages[0]["agent"], lang)
+        messages = messages[1:]
+
+    split = max(len(messages) - recent_messages, 0)
+    older, recent = messages[:split], messages[split:]
+    stored = get_chat_summary(uuid) or {"covered": 0, "lines": []}
+    summary = list(stored["lines"])
+    if stored["covered"] > len(older):  # history was rewritten; start over
+        summary, stored["covered"] = [], 0
+    if len(older) > stored["covered"]:
+        summary += [_summary_line(m) for m in older[stored["covered"]:]]
+        store_chat_summary(uuid, {"covered": len(older), "lines": summary})
+
+    def size(lines):
+        return estimate_tokens(json.dumps(_render(report, lines, recent), ensure_ascii= False))
+
+    # verbatim messages only give way when they alone overflow the budget; they then join the summary
+    while size([]) > max_tokens and len(recent) > 1:
+        summary.append(_summary_line(recent[0]))
+        recent = recent[1:]
+
+    # newest summary lines first, as many as fit
+    remaining = max_tokens - size(["-"])
+    kept = []
+    for line in reversed(summary):
+        remaining -= estimate_tokens(json.dumps(line, ensure_ascii= False)) + 1
+        if remaining < 0:
+            break
+        kept.append(line)
+    return _render(report, kept[::-1], recent)
@@ -2,16 +2,24 @@ import json
 from typing import List, Dict, Any, cast
 from pathlib import Path
 import os
+import threading
 from dotenv import load_dotenv
 from enum import Enum
-from openai import OpenAI
 from pydantic import BaseModel, field_serializer, Field
 from uuid import UUID
 
+from model.agent.client import get_client_manager
 from utils.storage.storage import store_response
+from model.agent.cache import AnalysisCache
+from utils.metrics.metrics import counter, histogram
 
 
 load_dotenv(override= True)
+
+ANALYSIS_CACHE = os.environ.get("ANALYSIS_CACHE", "1") == "1"
+
+AGENT_SECONDS = histogram("agent_call_seconds", "Seconds per LLM call made by an agent, retries and queueing included", labels= ("agent",))
+CACHE_LOOKUPS = counter("analysis_cache_lookups_total", "AnalysisCache lookups by result", labels= ("result",))
     
 class Disorder(BaseModel):
 
@@ -125,34 +133,58 @@ class GPTAgent:
         path = Path(main_prompt_path)
         assert path.exists(), f"Could not find path to main agent prompt provided in env as {main_prompt_path}"
 
-        self.client = OpenAI()
+        self.clients = get_client_manager()  # shared pooled client; openai itself is imported on the first call
         self.prompt = path.read_text(encoding= "utf-8")
         model_version = os.environ.get("MODEL_NAME")
         if model_version is None:
             raise ValueError("Environment variable 'MODEL_NAME' is not set.")
         self.model_version: str = model_version
 
+        self.cache = AnalysisCache(
+            os.environ.get("ANALYSIS_CACHE_DIR", "./data/analysis_cache"),
+            max_entries= int(os.environ.get("ANALYSIS_CACHE_MAX_ENTRIES", 10000)),
+            ttl= float(os.environ.get("ANALYSIS_CACHE_TTL", 7 * 24 * 3600)),
+            rate_bucket= float(os.environ.get("ANALYSIS_CACHE_RATE_BUCKET", 10)),
+            phoneme_rate_bucket= float(os.environ.get("ANALYSIS_CACHE_PHONEME_RATE_BUCKET", 25)),
+            prob_bucket= float(os.environ.get("ANALYSIS_CACHE_PROB_BUCKET", 0.05))
+        ) if ANALYSIS_CACHE else None
+
 
 
 
     
-    def analyze_data(self, data: Dict) -> Dict[str, List]:
+    def analyze_data(self, data: Dict, use_cache: bool = True) -> Dict[str, List]:
+
+        """Analysis report for `data`; repeat profiles are served from the AnalysisCache unless `use_cache` is False."""
+        if self.cache is None or not use_cache:
+            return self._analyze(data)
+
+        key = self.cache.key(data, self.prompt, self.model_version)
+        cached = self.cache.get(key)
+        CACHE_LOOKUPS.inc(result= "miss" if cached is None else "hit")
+        if cached is not None:
+            return cached
+        return self.cache.put(key, self._analyze(data))
+
+    def _analyze(self, data: Dict) -> Dict[str, List]:
 
         
-        response = self.client.responses.parse(
-        model= self.model_version,
-        tools= [
-            { "type": "web_search" },
-        ],
-        input=cast(Any, [
-            {
-                "role": "system",
-                "content": self.prompt
-            },
-            {"role": "user", "content": json.dumps(data, indent = 4)},
-        ]),
-        text_format=Response,
-        )
+        with AGENT_SECONDS.time(agent= "analysis"):
+            response = self.clients.call(
+            lambda client: client.responses.parse,
+            model= self.model_version,
+            tools= [
+                { "type": "web_search" },
+            ],
+            input=cast(Any, [
+                {
+                    "role": "system",
+                    "content": self.prompt
+                },
+                {"role": "user", "content": json.dumps(data, indent = 4)},
+            ]),
+            text_format=Response,
+            )
 
         if response.output_parsed is not None:
             return response.output_parsed.model_dump()
@@ -160,12 +192,23 @@ class GPTAgent:
             raise ValueError(f"Failed to parse response: output_parsed is {response.output_parsed}")
         
 
-analyzer_agent = GPTAgent()
+_analyzer_agent = None
+_analyzer_lock = threading.Lock()
+
+
+def get_analyzer_agent() -> GPTAgent:
+
+    """Build the shared GPTAgent on first use instead of at import time."""
+    global _analyzer_agent
+    with _analyzer_lock:
+        if _analyzer_agent is None:
+            _analyzer_agent = GPTAgent()
+    return _analyzer_agent
 
 
-def get_agent_response(uuid: UUID, data: Dict):
+def get_agent_response(uuid: UUID, data: Dict, use_cache: bool = True):
 
-    response =  analyzer_agent.analyze_data(data)
+    response =  get_analyzer_agent().analyze_data(data, use_cache= use_cache)
     store_response(uuid= uuid, is_agent= True, response= response)
     return response
 
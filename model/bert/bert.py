@@ -68,9 +68,7 @@ class SpectrogramBERTClassifier(nn.Module):
             patched_len = (lengths // self.patch_size) + 1
             max_len = tokens.size(1)
             patched_len = torch.clamp(patched_len, 1, max_len)
-            attention_mask = torch.zeros(B, max_len, dtype=torch.long, device=device)
-            for i, L in enumerate(patched_len):
-                attention_mask[i, : int(L.item())] = 1
+            attention_mask = (torch.arange(max_len, device=device)[None, :] < patched_len[:, None]).long()
 
         out = self.bert(inputs_embeds=tokens, attention_mask=attention_mask)
         pooled = out.pooler_output
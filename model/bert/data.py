@@ -12,7 +12,21 @@ HOP = 256
 FMIN = 20.0
 def FMAX(sr): return 0.45 * sr  # headroom under Nyquist to avoid empty filters
 
-def load_mel(wav_file, n_mels):
+def mel_params(n_mels, frontend=None):
+    """Everything that determines the mel features; used as part of the MelCache key.
+
+    The librosa recipe and MelFrontend agree only to a tolerance, so their features are cached apart.
+    """
+    return {"sr": SR, "n_fft": N_FFT, "hop": HOP, "n_mels": n_mels, "fmin": FMIN, "fmax": FMAX(SR),
+            "frontend": "librosa" if frontend is None else "torch"}
+
+
+def load_mel(wav_file, n_mels, cache=None, frontend=None):
+    if cache is not None:
+        return cache.get_or_compute(wav_file, mel_params(n_mels, frontend), lambda: load_mel(wav_file, n_mels, frontend=frontend))
+    if frontend is not None:  # MelFrontend: same recipe in torch
+        return frontend.load_mel(wav_file)
+
     y, sr = librosa.load(wav_file, sr=SR)  # resample consistently to 16k
     if len(y) < N_FFT:                      # avoid "n_fft too large" warnings
         y = np.pad(y, (0, N_FFT - len(y)))
@@ -49,10 +63,12 @@ def random_crop_or_pad(mel, window_T):
 
 class TrainWindowDataset(Dataset):
     """Outputs fixed-size windows (random crop or pad)."""
-    def __init__(self, df, n_mels=80, window_T=1024):
+    def __init__(self, df, n_mels=80, window_T=1024, cache=None, frontend=None):
         self.df = df.reset_index(drop=True)
         self.n_mels = n_mels
         self.window_T = window_T
+        self.cache = cache
+        self.frontend = frontend
 
     def __len__(self):
         return len(self.df)
@@ -64,16 +80,21 @@ class TrainWindowDataset(Dataset):
         label = 0 if label_str == 'non_dysarthria' else 1
         gender = 0.0 if gender_str == 'female' else 1.0
 
-        mel = load_mel(wav_file, self.n_mels)
+        mel = self.load(wav_file)
         mel = random_crop_or_pad(mel, self.window_T)
         return mel, int(label), float(gender)
 
+    def load(self, wav_file):
+        return load_mel(wav_file, self.n_mels, cache=self.cache, frontend=self.frontend)
+
 
 class FullClipDataset(Dataset):
     """Emits full mel spectrograms (variable length) for eval/inference."""
-    def __init__(self, df, n_mels=80):
+    def __init__(self, df, n_mels=80, cache=None, frontend=None):
         self.df = df.reset_index(drop=True)
         self.n_mels = n_mels
+        self.cache = cache
+        self.frontend = frontend
 
     def __len__(self):
         return len(self.df)
@@ -85,5 +106,33 @@ class FullClipDataset(Dataset):
         label = 0 if label_str == 'non_dysarthria' else 1
         gender = 0.0 if gender_str == 'female' else 1.0
 
-        mel = load_mel(wav_file, self.n_mels)
+        mel = self.load(wav_file)
         return mel, int(label), float(gender), wav_file
+
+    def load(self, wav_file):
+        return load_mel(wav_file, self.n_mels, cache=self.cache, frontend=self.frontend)
+
+
+class StoreTrainWindowDataset(TrainWindowDataset):
+    """TrainWindowDataset reading precomputed mels from a MelStore instead of decoding audio."""
+    def __init__(self, df, store, window_T=1024):
+        super().__init__(df, n_mels=store.n_mels, window_T=window_T)
+        self.store = store
+
+    def __getitem__(self, idx):
+        mel, label, gender = super().__getitem__(idx)
+        return mel.float(), label, gender  # the crop is a view of the shard; only the window is read
+
+    def load(self, wav_file):
+        return self.store.get(wav_file)
+
+
+class StoreFullClipDataset(FullClipDataset):
+    """FullClipDataset reading precomputed mels from a MelStore instead of decoding audio."""
+    def __init__(self, df, store):
+        super().__init__(df, n_mels=store.n_mels)
+        self.store = store
+
+    def load(self, wav_file):
+        return self.store.get(wav_file).float()
+
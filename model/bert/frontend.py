@@ -0,0 +1,96 @@
+import librosa
+import numpy as np
+import soundfile as sf
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+from model.bert.data import SR, N_FFT, HOP, FMIN, FMAX
+from utils.audio.audio import AudioBuffer
+
+
+AMIN = 1e-10    # librosa.power_to_db defaults
+TOP_DB = 80.0
+
+
+def load_waveform(wav_file):
+    """Decode a clip (path or AudioBuffer) to mono float32 at SR, matching `librosa.load(wav_file, sr=SR)`."""
+    if isinstance(wav_file, AudioBuffer):
+        return wav_file.waveform(SR)
+    try:
+        y, sr = sf.read(wav_file, dtype="float32", always_2d=True)
+    except sf.LibsndfileError:
+        y, _ = librosa.load(wav_file, sr=SR)  # containers libsndfile can't read (webm, m4a, ...)
+        return y
+    y = y.mean(axis=1) if y.shape[1] > 1 else y[:, 0]
+    if sr != SR:
+        y = librosa.resample(y, orig_sr=sr, target_sr=SR, res_type="soxr_hq")
+    return y
+
+
+class MelFrontend(nn.Module):
+    """
+    Torch implementation of the `load_mel` recipe, vectorized over a batch of waveforms.
+
+    Computes the same power mel-spectrogram (`torch.stft` with a cached Hann window
+    and librosa's slaney filterbank as a buffer), `power_to_db(ref=np.max)` and
+    per-utterance normalization as `model/bert/data.py`, using only the frames that
+    belong to each clip for the max/mean/std.
+
+    Example:
+        frontend = MelFrontend(n_mels=80)
+        mel, frames = frontend(waveforms, lengths)  # [B, n_mels, T], [B]
+    """
+    def __init__(self, n_mels=80):
+        super().__init__()
+        self.n_mels = n_mels
+        fb = librosa.filters.mel(sr=SR, n_fft=N_FFT, n_mels=n_mels, fmin=FMIN, fmax=FMAX(SR))
+        self.register_buffer("mel_fb", torch.from_numpy(fb), persistent=False)                       # [n_mels, N_FFT // 2 + 1]
+        self.register_buffer("window", torch.hann_window(N_FFT, periodic=True), persistent=False)   # same as scipy "hann"
+
+    @torch.no_grad()
+    def forward(self, waveforms, lengths=None):
+        """
+        waveforms: [B, N] float32 at SR, right-padded with zeros.
+        lengths:   [B] number of valid samples per clip (defaults to N for every clip).
+        Returns the normalized mel_db [B, n_mels, T] and the number of valid frames per clip [B].
+        """
+        B, N = waveforms.shape
+        device = waveforms.device
+        if lengths is None:
+            lengths = torch.full((B,), N, dtype=torch.long, device=device)
+        lengths = torch.clamp(lengths.to(device), min=N_FFT)  # load_mel pads clips shorter than N_FFT
+        if N < N_FFT:
+            waveforms = F.pad(waveforms, (0, N_FFT - N))
+
+        spec = torch.stft(
+            waveforms, n_fft=N_FFT, hop_length=HOP, win_length=N_FFT,
+            window=self.window, center=True, pad_mode="constant", return_complex=True,
+        )
+        power = spec.real.square() + spec.imag.square()                  # [B, N_FFT // 2 + 1, T]
+        mel = torch.matmul(self.mel_fb, power)                            # [B, n_mels, T]
+
+        frames = lengths // HOP + 1
+        T = mel.shape[-1]
+        valid = (torch.arange(T, device=device)[None, :] < frames[:, None]).unsqueeze(1)  # [B, 1, T]
+
+        ref = mel.masked_fill(~valid, 0.0).amax(dim=(1, 2), keepdim=True)
+        mel_db = 10.0 * torch.log10(torch.clamp(mel, min=AMIN)) - 10.0 * torch.log10(torch.clamp(ref, min=AMIN))
+        mel_db = torch.maximum(mel_db, mel_db.masked_fill(~valid, -torch.inf).amax(dim=(1, 2), keepdim=True) - TOP_DB)
+
+        count = (frames * self.n_mels).to(mel_db.dtype).view(B, 1, 1)
+        mel_db = mel_db.masked_fill(~valid, 0.0)
+        mean = mel_db.sum(dim=(1, 2), keepdim=True) / count
+        var = ((mel_db - mean).masked_fill(~valid, 0.0).square()).sum(dim=(1, 2), keepdim=True) / count
+        mel_db = (mel_db - mean) / (var.sqrt() + 1e-6)
+        return mel_db.masked_fill(~valid, 0.0), frames
+
+    def mel(self, y):
+        """Normalized mel_db [n_mels, T] of a single waveform (NumPy or tensor)."""
+        y = torch.as_tensor(y, dtype=torch.float32, device=self.window.device)
+        mel, frames = self(y.unsqueeze(0))
+        return mel[0, :, :int(frames[0])].cpu()
+
+    def load_mel(self, wav_file):
+        return self.mel(load_waveform(wav_file))
+
@@ -1,9 +1,14 @@
 from model.bert.bert import SpectrogramBERTClassifier
+from model.bert.data import mel_params
+from model.bert.frontend import MelFrontend, load_waveform
+from model.bert.runtime import BACKENDS, GraphModel
+from utils.audio.audio import AudioBuffer
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
 import numpy as np
 import librosa
+import os
 
 
 SR = 16000
@@ -11,9 +16,24 @@ N_FFT = 1024
 HOP = 256
 FMIN = 20.0
 def FMAX(sr): return 0.45 * sr  # headroom under Nyquist to avoid empty filters
+PRECISIONS = ("fp32", "int8", "bf16", "fp16")
 
-def load_mel_for_inference(wav_file, n_mels=80):
+
+def load_mel_for_inference(wav_file, n_mels=80, cache=None, frontend=None):
+    if cache is not None:
+        return cache.get_or_compute(wav_file, mel_params(n_mels, frontend), lambda: load_mel_for_inference(wav_file, n_mels, frontend=frontend))
+    if frontend is not None:  # MelFrontend: same recipe in torch
+        return frontend.load_mel(wav_file)
+
+    if isinstance(wav_file, AudioBuffer):  # already decoded upload
+        return mel_from_waveform(wav_file.waveform(SR), n_mels=n_mels)
     y, sr = librosa.load(wav_file, sr=SR)
+    return mel_from_waveform(y, n_mels=n_mels)
+
+
+def mel_from_waveform(y, n_mels=80):
+    """librosa mel recipe for a mono float32 waveform already at SR."""
+    sr = SR
     if len(y) < N_FFT:
         y = np.pad(y, (0, N_FFT - len(y)))
 
@@ -50,49 +70,210 @@ def slide_windows(mel, window_T, hop_T):
     return windows
 
 
+def unfold_windows(mel, window_T, hop_T):
+    """Stack every sliding window of `mel` into one [N, n_mels, window_T] tensor.
+
+    Produces the same windows as `slide_windows`, but the full windows are a
+    strided `unfold` view of `mel` and only the trailing partial window is padded.
+    """
+    n_mels, T = mel.shape
+    if T <= window_T:
+        return F.pad(mel, (0, window_T - T)).unsqueeze(0)
+    windows = mel.unfold(1, window_T, hop_T).permute(1, 0, 2)   # [N_full, n_mels, window_T] view
+    if (windows.shape[0] - 1) * hop_T + window_T == T:
+        return windows
+    tail_start = windows.shape[0] * hop_T
+    tail = F.pad(mel[:, tail_start:], (0, window_T - (T - tail_start)))
+    return torch.cat([windows, tail.unsqueeze(0)], dim=0)
+
+
 @torch.no_grad()
-def classify_long_clip(model, mel, gender, window_T, hop_T, device, criterion=None, y=None):
-    windows = slide_windows(mel, window_T, hop_T)
-    probs_list, losses = [], []
-    g = torch.tensor([[gender]], dtype=torch.float32, device=device)
-    for w in windows:
-        X = w.to(device)                                   # [1, n_mels, window_T]
-        lengths = torch.tensor([X.shape[-1]], device=device)
-        logits = model(X, lengths=lengths, gender=g)       # [1, 2]
-        probs = torch.softmax(logits, dim=-1)              # [1, 2]
-        probs_list.append(probs)
-        if criterion is not None and y is not None:
-            losses.append(criterion(logits, torch.tensor([y], device=device)))
-    mean_probs = torch.stack(probs_list).mean(0)           # [1, 2]
-    mean_loss  = torch.stack(losses).mean().item() if losses else None
+def score_windows(model, windows, genders, device, batch_size=None):
+    """Logits [N, 2] for windows [N, n_mels, window_T] with per-window genders [N].
+
+    Windows are scored in a single forward pass, or in chunks of `batch_size`
+    windows when it is set (bounds peak memory on very long clips).
+    """
+    N = windows.shape[0]
+    chunk = N if not batch_size else batch_size
+    logits_list = []
+    for start in range(0, N, chunk):
+        X = windows[start:start + chunk].to(device)        # [B, n_mels, window_T]
+        B = X.shape[0]
+        lengths = torch.full((B,), X.shape[-1], dtype=torch.long, device=device)
+        g = genders[start:start + chunk].to(device, dtype=torch.float32).view(B, 1)
+        logits_list.append(model(X, lengths=lengths, gender=g))   # [B, 2]
+    return torch.cat(logits_list, dim=0)
+
+
+@torch.no_grad()
+def classify_long_clip(model, mel, gender, window_T, hop_T, device, criterion=None, y=None, batch_size=None):
+    """Score every window of a clip and average the window probabilities."""
+    windows = unfold_windows(mel, window_T, hop_T)         # [N, n_mels, window_T]
+    N = windows.shape[0]
+    logits = score_windows(model, windows, torch.full((N,), gender), device, batch_size)  # [N, 2]
+    probs = torch.softmax(logits, dim=-1)                  # [N, 2]
+    mean_probs = probs.mean(0, keepdim=True)               # [1, 2]
+    mean_loss = None
+    if criterion is not None and y is not None:
+        mean_loss = criterion(logits, torch.full((N,), y, dtype=torch.long, device=device)).item()
     pred = mean_probs.argmax(dim=1).item()
     return pred, mean_loss, mean_probs
 
 
+def gender_to_value(gender):
+    return 1.0 if str(gender).lower() in ('male', 'm', 'ذكر') else 0.0
+
+
 class Classifier:
     """
     Example:
         classifier = Classifier("./model/bert/runs/123456/best_model.pt")
         pred = classifier.predict("clip.wav", gender="male")
     """
-    def __init__(self, model_path, n_mels=80, window_T=128, hop_T=64):
+    def __init__(self, model_path, n_mels=80, window_T=128, hop_T=64, batch_size=None, mel_cache=None, frontend=None, precision=None, backend=None):
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        self.model = load_model(model_path, n_mels=n_mels, num_classes=2).to(self.device)
+        self.precision = precision or os.environ.get("CLASSIFIER_PRECISION", "fp32")
+        self.backend = backend or os.environ.get("CLASSIFIER_BACKEND", "torch")
+        if self.backend not in BACKENDS:
+            raise ValueError(f"backend must be one of {BACKENDS}, got {self.backend}")
+
+        if self.backend == "torch":
+            model = load_model(model_path, n_mels=n_mels, num_classes=2).to(self.device)
+            self.model = with_precision(model, self.precision)
+        else:
+            # model_path is a graph written by export_model.py
+            if self.precision != "fp32":
+                raise ValueError(f"precision {self.precision} is only available with the torch backend")
+            self.device = torch.device("cpu")
+            self.model = GraphModel(model_path, self.backend)
+            if (self.model.n_mels, self.model.window_T) != (n_mels, window_T):
+                raise ValueError(f"Graph was exported for n_mels={self.model.n_mels}, window_T={self.model.window_T}")
         self.n_mels = n_mels
         self.window_T = window_T
         self.hop_T = hop_T
+        self.batch_size = batch_size  # windows per forward pass; None scores the whole clip at once
+        self.mel_cache = mel_cache    # optional MelCache shared with training
+        frontend = frontend or os.environ.get("CLASSIFIER_FRONTEND", "librosa")  # the released model was trained on librosa features
+        if frontend not in ("torch", "librosa"):
+            raise ValueError(f"frontend must be 'torch' or 'librosa', got {frontend}")
+        self.frontend = MelFrontend(n_mels=n_mels).to(self.device) if frontend == "torch" else None
 
     def predict(self, wav_file, gender):
-        mel = load_mel_for_inference(wav_file, n_mels=self.n_mels)  # [M, T]
-        gender_value = 1.0 if str(gender).lower() in ('male', 'm', 'ذكر') else 0.0
+        mel = load_mel_for_inference(wav_file, n_mels=self.n_mels, cache=self.mel_cache, frontend=self.frontend)  # [M, T]
+        gender_value = gender_to_value(gender)
 
         pred, _, probs = classify_long_clip(
             self.model, mel, gender_value,
             window_T=self.window_T, hop_T=self.hop_T,
-            device=self.device
+            device=self.device, batch_size=self.batch_size
         )
         return float(pred), probs.cpu().numpy().tolist()[0][1] # return prob of class 1 (dysarthria)
 
+    def warm_up(self, seconds=2.0):
+        """Push a clip of noise through the frontend and model so the first real request doesn't pay for lazy initialization."""
+        y = np.random.default_rng(0).standard_normal(int(SR * seconds)).astype(np.float32) * 0.1
+        self.predict_batch([y], ["male"])
+
+    def predict_batch(self, inputs, genders, bucket_size=8):
+        """
+        Score many clips at once; returns [(pred, prob), ...] in input order, matching `predict`.
+
+        `inputs` holds wav paths, AudioBuffers and/or mono float32 waveforms at SR. Clips are sorted
+        by length and padded only within buckets of `bucket_size` for the mel frontend,
+        then the windows of every clip are scored together.
+        """
+        if len(inputs) != len(genders):
+            raise ValueError(f"Got {len(inputs)} inputs but {len(genders)} genders")
+        if len(inputs) == 0:
+            return []
+
+        mels = self._batch_mels(inputs, bucket_size)
+        windows = [unfold_windows(mel, self.window_T, self.hop_T) for mel in mels]
+        counts = [w.shape[0] for w in windows]
+        window_genders = torch.cat([torch.full((n,), gender_to_value(g)) for n, g in zip(counts, genders)])
+
+        logits = score_windows(self.model, torch.cat(windows), window_genders, self.device, self.batch_size)
+        probs = torch.softmax(logits, dim=-1).cpu()
+
+        results = []
+        for clip_probs in torch.split(probs, counts):
+            mean_probs = clip_probs.mean(0)
+            results.append((float(mean_probs.argmax().item()), mean_probs[1].item()))
+        return results
+
+    def _batch_mels(self, inputs, bucket_size):
+        mels = [None] * len(inputs)
+        keys = [None] * len(inputs)
+        waveforms = {}
+        for i, x in enumerate(inputs):
+            if isinstance(x, (str, bytes, AudioBuffer)) or hasattr(x, "__fspath__"):
+                if self.mel_cache is not None:
+                    keys[i] = self.mel_cache.key(x, mel_params(self.n_mels, self.frontend))
+                    mels[i] = self.mel_cache.get(keys[i])
+                    if mels[i] is not None:
+                        continue
+                waveforms[i] = load_waveform(x) if self.frontend is not None or isinstance(x, AudioBuffer) else librosa.load(x, sr=SR)[0]
+            else:
+                waveforms[i] = np.asarray(x, dtype=np.float32)
+
+        if self.frontend is None:
+            for i, y in waveforms.items():
+                mels[i] = mel_from_waveform(y, n_mels=self.n_mels)
+        else:
+            order = sorted(waveforms, key=lambda i: len(waveforms[i]))
+            for b in range(0, len(order), bucket_size):
+                bucket = order[b:b + bucket_size]
+                lengths = torch.tensor([len(waveforms[i]) for i in bucket])
+                batch = torch.zeros(len(bucket), int(lengths.max()))
+                for row, i in enumerate(bucket):
+                    batch[row, :len(waveforms[i])] = torch.from_numpy(waveforms[i])
+                out, frames = self.frontend(batch.to(self.device), lengths)
+                out = out.cpu()
+                for row, i in enumerate(bucket):
+                    mels[i] = out[row, :, :int(frames[row])]
+
+        for i in waveforms:
+            if keys[i] is not None:
+                self.mel_cache.put(keys[i], mels[i])
+        return mels
+
+
+class ReducedPrecisionModel(nn.Module):
+    """Runs a classifier under bf16 autocast or with fp16 weights, returning float32 logits."""
+    def __init__(self, model, dtype, autocast):
+        super().__init__()
+        self.model = model
+        self.dtype = dtype
+        self.autocast = autocast
+
+    def forward(self, mel, lengths=None, gender=None):
+        if self.autocast:
+            with torch.autocast(device_type=mel.device.type, dtype=self.dtype):
+                return self.model(mel, lengths=lengths, gender=gender).float()
+        return self.model(mel.to(self.dtype), lengths=lengths, gender=gender).float()
+
+
+def with_precision(model, precision):
+    """
+    Prepare an eval-mode classifier for one of PRECISIONS:
+        fp32: unchanged.
+        int8: dynamic int8 quantization of every nn.Linear (CPU only).
+        bf16: float32 weights, forward under bfloat16 autocast.
+        fp16: weights stored and run in float16 (half the memory at rest).
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"precision must be one of {PRECISIONS}, got {precision}")
+    if precision == "int8":
+        if next(model.parameters()).device.type != "cpu":
+            raise ValueError("int8 dynamic quantization is only supported on CPU")
+        return torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+    if precision == "bf16":
+        return ReducedPrecisionModel(model, torch.bfloat16, autocast=True)
+    if precision == "fp16":
+        return ReducedPrecisionModel(model.half(), torch.float16, autocast=False)
+    return model
+
 
 def load_model(model_path, n_mels=80, num_classes=2):
     model = SpectrogramBERTClassifier(n_mels=n_mels, num_classes=num_classes)
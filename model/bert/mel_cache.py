@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+import torch
+
+
+class MelCache:
+    """
+    Content-addressed on-disk cache of mel-spectrograms.
+
+    Entries are keyed by a hash of the audio file bytes plus the mel parameters, so
+    a renamed or re-uploaded clip still hits and a change of SR/N_FFT/HOP/n_mels/
+    FMIN/FMAX/frontend never serves a stale feature. Each entry is one `.npy` file
+    read back with mmap (float32 entries without a copy); the directory is kept under
+    `max_bytes` by evicting the least recently used entries (file mtime is bumped on
+    every hit).
+
+    Example:
+        cache = MelCache("./data/mel_cache", max_bytes=2 * 1024**3)
+        mel = load_mel("clip.wav", n_mels=80, cache=cache)
+    """
+    def __init__(self, cache_dir, max_bytes=2 * 1024**3, dtype="float32", max_content_hashes=100_000):
+        if dtype not in ("float16", "float32"):
+            raise ValueError(f"dtype must be 'float16' or 'float32', got {dtype}")
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.dtype = dtype
+        self.max_content_hashes = max_content_hashes  # remembered file hashes, so long-running processes stay bounded
+        self._content_hashes = OrderedDict()  # (path, size, mtime_ns) -> sha256 of file bytes, least recently used first
+        self._content_hashes_lock = threading.Lock()
+        self._total_bytes = sum(f.stat().st_size for f in self.cache_dir.glob("*.npy"))
+
+    def content_hash(self, wav_file):
+        if hasattr(wav_file, "content_hash"):  # AudioBuffer: hash of the bytes it is saved as
+            return wav_file.content_hash
+        st = os.stat(wav_file)
+        file_key = (os.path.abspath(wav_file), st.st_size, st.st_mtime_ns)
+        with self._content_hashes_lock:
+            digest = self._content_hashes.get(file_key)
+            if digest is not None:
+                self._content_hashes.move_to_end(file_key)
+                return digest
+        h = hashlib.sha256()
+        with open(wav_file, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        digest = h.hexdigest()
+        with self._content_hashes_lock:
+            self._content_hashes[file_key] = digest
+            while len(self._content_hashes) > self.max_content_hashes:
+                self._content_hashes.popitem(last=False)
+        return digest
+
+    def key(self, wav_file, params):
+        params = json.dumps({**params, "dtype": self.dtype}, sort_keys=True)
+        return hashlib.sha256(f"{self.content_hash(wav_file)}|{params}".encode()).hexdigest()
+
+    def get(self, key):
+        """Return the cached mel as a float32 tensor, or None on a miss."""
+        path = self.cache_dir / f"{key}.npy"
+        try:
+            mel = np.load(path, mmap_mode="c")  # copy-on-write: pages are read lazily and writes never reach the file
+        except (FileNotFoundError, ValueError):
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        if mel.dtype != np.float32:  # float16 entries are the only ones that need a copy
+            mel = mel.astype(np.float32)
+        return torch.from_numpy(mel)
+
+    def put(self, key, mel):
+        path = self.cache_dir / f"{key}.npy"
+        tmp = self.cache_dir / f".{key}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, mel.numpy().astype(self.dtype))
+        try:
+            replaced = path.stat().st_size  # another writer got there first
+        except FileNotFoundError:
+            replaced = 0
+        os.replace(tmp, path)  # atomic, so concurrent readers never see a partial entry
+        self._total_bytes += path.stat().st_size - replaced
+        if self._total_bytes > self.max_bytes:
+            self.evict()
+
+    def get_or_compute(self, wav_file, params, compute):
+        key = self.key(wav_file, params)
+        mel = self.get(key)
+        if mel is None:
+            mel = compute()
+            self.put(key, mel)
+        return mel
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in `max_bytes`."""
+        entries = []
+        for f in self.cache_dir.glob("*.npy"):
+            try:
+                st = f.stat()
+            except FileNotFoundError:
+                continue  # removed by another process
+            entries.append((st.st_mtime, st.st_size, f))
+        entries.sort(key=lambda e: e[0])
+        total = sum(size for _, size, _ in entries)
+        for _, size, f in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                f.unlink(missing_ok=True)
+            except OSError:
+                continue  # still mapped by a reader on platforms that forbid deleting open files
+            total -= size
+        self._total_bytes = total
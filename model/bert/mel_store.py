@@ -0,0 +1,121 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import torch
+
+
+INDEX_FILE = "index.json"
+
+
+class MelStoreWriter:
+    """
+    Appends mel-spectrograms to a few large contiguous shard files.
+
+    Each mel is written as one [n_mels, T] row-major block; `index.json` records
+    the shard, element offset and frame count of every clip so `MelStore` can map
+    it back without copying.
+    """
+    def __init__(self, store_dir, n_mels, params, dtype="float32", shard_bytes=1024**3):
+        if dtype not in ("float16", "float32"):
+            raise ValueError(f"dtype must be 'float16' or 'float32', got {dtype}")
+        self.store_dir = Path(store_dir)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self.n_mels = n_mels
+        self.params = params
+        self.dtype = np.dtype(dtype)
+        self.shard_bytes = shard_bytes
+
+        self.shards = []
+        self.entries = {}
+        self._file = None
+        self._offset = 0  # elements written to the current shard
+
+    def _roll(self):
+        if self._file is not None:
+            self._file.close()
+        name = f"shard_{len(self.shards):03d}.bin"
+        self.shards.append(name)
+        self._file = open(self.store_dir / name, "wb")
+        self._offset = 0
+
+    def add(self, key, mel):
+        mel = np.ascontiguousarray(mel, dtype=self.dtype)
+        if mel.ndim != 2 or mel.shape[0] != self.n_mels:
+            raise ValueError(f"Expected mel of shape [{self.n_mels}, T], got {list(mel.shape)}")
+        if self._file is None or (self._offset * self.dtype.itemsize + mel.nbytes > self.shard_bytes and self._offset > 0):
+            self._roll()
+        self._file.write(mel.tobytes())
+        self.entries[str(key)] = [len(self.shards) - 1, self._offset, int(mel.shape[1])]
+        self._offset += mel.size
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        index = {
+            "n_mels": self.n_mels,
+            "dtype": self.dtype.name,
+            "params": self.params,
+            "shards": self.shards,
+            "entries": self.entries,
+        }
+        (self.store_dir / INDEX_FILE).write_text(json.dumps(index), encoding="utf-8")
+
+
+class MelStore:
+    """
+    Read-only view over a sharded mel store written by `precompute_mels.py`.
+
+    Shards are memory-mapped lazily (so each DataLoader worker maps its own) and
+    `get` returns a tensor that views the mapped pages directly; cropping a
+    window out of it only touches the pages of that window.
+
+    Example:
+        store = MelStore("./data/mel_store")
+        mel = store.get("clip.wav")  # [n_mels, T]
+    """
+    def __init__(self, store_dir):
+        self.store_dir = Path(store_dir)
+        index = json.loads((self.store_dir / INDEX_FILE).read_text(encoding="utf-8"))
+        self.n_mels = index["n_mels"]
+        self.dtype = np.dtype(index["dtype"])
+        self.params = index["params"]
+        self.shards = index["shards"]
+        self.entries = index["entries"]
+        self._maps = {}
+
+    def check_params(self, params):
+        """Raise ValueError unless the store was computed with the mel `params` (see `mel_params`)."""
+        stored = {"frontend": "librosa", **self.params}  # stores from before the frontend was recorded are librosa
+        differing = {k: (stored.get(k), v) for k, v in params.items() if stored.get(k) != v}
+        if differing:
+            details = ", ".join(f"{k}: store has {a!r}, expected {b!r}" for k, (a, b) in sorted(differing.items()))
+            raise ValueError(f"Mel store at {self.store_dir} was computed with different mel parameters ({details})")
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return str(key) in self.entries
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_maps"] = {}  # memmaps are reopened in the worker process
+        return state
+
+    def _shard(self, shard):
+        mm = self._maps.get(shard)
+        if mm is None:
+            # copy-on-write mapping: writable for torch.from_numpy, never written back
+            mm = np.memmap(self.store_dir / self.shards[shard], dtype=self.dtype, mode="c")
+            self._maps[shard] = mm
+        return mm
+
+    def get(self, key):
+        entry = self.entries.get(str(key))
+        if entry is None:
+            raise KeyError(f"{key} is not in the mel store at {self.store_dir}")
+        shard, offset, T = entry
+        flat = self._shard(shard)[offset:offset + self.n_mels * T]
+        return torch.from_numpy(flat.reshape(self.n_mels, T))  # [n_mels, T], no copy
@@ -0,0 +1,102 @@
+import json
+from pathlib import Path
+
+import torch
+import torch.nn as nn
+
+
+BACKENDS = ("torch", "torchscript", "onnx")
+
+
+class ExportWrapper(nn.Module):
+    """Fixed-signature view of SpectrogramBERTClassifier for tracing: (mel [B, n_mels, window_T], gender [B, 1]) -> logits [B, 2].
+
+    Every window handed to the classifier is full length, so the attention mask is
+    all ones and is left out of the graph.
+    """
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, mel, gender):
+        return self.model(mel, lengths=None, gender=gender)
+
+
+def metadata_path(graph_path):
+    return Path(str(graph_path) + ".json")
+
+
+def export_graph(model, out_path, fmt, n_mels, window_T, example_batch=2):
+    """Export an eval-mode classifier as a TorchScript or ONNX graph with a dynamic batch axis."""
+    if fmt not in ("torchscript", "onnx"):
+        raise ValueError(f"format must be 'torchscript' or 'onnx', got {fmt}")
+    wrapper = ExportWrapper(model.eval()).eval()
+    mel = torch.randn(example_batch, n_mels, window_T)
+    gender = torch.ones(example_batch, 1)
+
+    with torch.no_grad():
+        if fmt == "torchscript":
+            traced = torch.jit.trace(wrapper, (mel, gender), strict=False)
+            traced.save(str(out_path))
+        else:
+            batch = torch.export.Dim("batch")
+            torch.onnx.export(
+                wrapper, (mel, gender), str(out_path),
+                input_names=["mel", "gender"], output_names=["logits"],
+                dynamic_shapes={"mel": {0: batch}, "gender": {0: batch}},
+                dynamo=True,
+            )
+
+    metadata = {"format": fmt, "n_mels": n_mels, "window_T": window_T}
+    metadata_path(out_path).write_text(json.dumps(metadata, indent=4), encoding="utf-8")
+    return metadata
+
+
+class GraphModel:
+    """Runs an exported graph behind the `model(mel, lengths=..., gender=...)` interface used by inference.py."""
+    def __init__(self, graph_path, backend):
+        if backend not in ("torchscript", "onnx"):
+            raise ValueError(f"backend must be 'torchscript' or 'onnx', got {backend}")
+        meta_file = metadata_path(graph_path)
+        if not meta_file.exists():
+            raise FileNotFoundError(f"Missing {meta_file}; export the graph with export_model.py")
+        self.metadata = json.loads(meta_file.read_text(encoding="utf-8"))
+        if self.metadata["format"] != backend:
+            raise ValueError(f"{graph_path} is a {self.metadata['format']} graph, not {backend}")
+        self.n_mels = self.metadata["n_mels"]
+        self.window_T = self.metadata["window_T"]
+        self.backend = backend
+
+        if backend == "torchscript":
+            self.module = torch.jit.load(str(graph_path), map_location="cpu").eval()
+        else:
+            try:
+                import onnxruntime as ort
+            except ImportError as e:
+                raise ImportError("The onnx backend needs onnxruntime (uv add onnxruntime)") from e
+            options = ort.SessionOptions()
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            self.session = ort.InferenceSession(str(graph_path), sess_options=options, providers=["CPUExecutionProvider"])
+
+    def to(self, device):
+        if torch.device(device).type != "cpu":
+            raise ValueError(f"The {self.backend} backend only runs on CPU")
+        return self
+
+    def eval(self):
+        return self
+
+    @torch.no_grad()
+    def __call__(self, mel, lengths=None, gender=None):
+        if tuple(mel.shape[1:]) != (self.n_mels, self.window_T):
+            raise ValueError(f"Graph expects windows of shape [B, {self.n_mels}, {self.window_T}], got {list(mel.shape)}")
+        if lengths is not None and bool((lengths != self.window_T).any()):
+            raise ValueError("Exported graphs only score full-length windows")
+        if gender is None:
+            raise ValueError("gender tensor required")
+        gender = gender.to(torch.float32).view(-1, 1)
+
+        if self.backend == "torchscript":
+            return self.module(mel.float(), gender)
+        logits = self.session.run(None, {"mel": mel.float().cpu().numpy(), "gender": gender.cpu().numpy()})[0]
+        return torch.from_numpy(logits)
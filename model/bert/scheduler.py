@@ -0,0 +1,140 @@
+import threading
+import time
+from collections import deque
+
+import torch
+
+from model.bert.inference import load_mel_for_inference, unfold_windows, gender_to_value, score_windows
+from utils.metrics.metrics import STAGE_SECONDS, gauge, histogram, stage
+
+QUEUED_WINDOWS = gauge("inference_queued_windows", "Windows waiting for the inference scheduler")
+BATCH_WINDOWS = histogram("inference_batch_windows", "Windows per scheduled forward pass", buckets=(1, 2, 4, 8, 16, 32, 64, 128))
+
+
+class _Job:
+    """Windows of one clip waiting to be scored, plus the slot its caller waits on."""
+    def __init__(self, windows, gender):
+        self.windows = windows              # [N, n_mels, window_T]
+        self.gender = gender
+        self.next = 0                       # first window not yet handed to a batch
+        self.remaining = windows.shape[0]   # windows not yet scored
+        self.probs = torch.empty(windows.shape[0], 2)
+        self.error = None
+        self.arrived = time.monotonic()
+        self.done = threading.Event()
+
+
+class InferenceScheduler:
+    """
+    Dynamic micro-batching in front of a `Classifier`.
+
+    Windows from every in-flight `predict` call share one queue. A single worker
+    thread drains it into batches of at most `max_batch_size` windows, waiting at
+    most `max_wait_ms` after the oldest queued window for a batch to fill, and
+    hands each caller the mean probability over its own windows.
+
+    Example:
+        scheduler = InferenceScheduler(Classifier("best_model.pt"), max_batch_size=32, max_wait_ms=5)
+        pred, prob = scheduler.predict("clip.wav", gender="male")
+    """
+    def __init__(self, classifier, max_batch_size=32, max_wait_ms=5.0):
+        self.classifier = classifier
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._jobs = deque()
+        self._queued_windows = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name="inference-scheduler", daemon=True)
+        self._worker.start()
+        QUEUED_WINDOWS.set_function(lambda: self._queued_windows)
+
+    def predict(self, wav_file, gender):
+        c = self.classifier
+        with stage("mel"):
+            mel = load_mel_for_inference(wav_file, n_mels=c.n_mels, cache=c.mel_cache, frontend=c.frontend)  # [M, T]
+        return self.predict_mel(mel, gender)
+
+    def predict_mel(self, mel, gender):
+        windows = unfold_windows(mel, self.classifier.window_T, self.classifier.hop_T)
+        job = _Job(windows, gender_to_value(gender))
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("InferenceScheduler is closed")
+            self._jobs.append(job)
+            self._queued_windows += windows.shape[0]
+            self._cond.notify()
+
+        job.done.wait()
+        if job.error is not None:
+            raise job.error
+        mean_probs = job.probs.mean(0, keepdim=True)     # [1, 2]
+        pred = mean_probs.argmax(dim=1).item()
+        return float(pred), mean_probs.numpy().tolist()[0][1]  # return prob of class 1 (dysarthria)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._worker.join()
+
+    def _next_batch(self):
+        """Block until a batch is due, then pop up to `max_batch_size` windows off the queue."""
+        with self._cond:
+            while True:
+                if self._closed and not self._jobs:
+                    return None
+                if self._jobs:
+                    if self._queued_windows >= self.max_batch_size or self._closed:
+                        break
+                    wait = self._jobs[0].arrived + self.max_wait - time.monotonic()
+                    if wait <= 0:
+                        break
+                    self._cond.wait(wait)
+                else:
+                    self._cond.wait()
+
+            batch = []                      # (job, start, end) slices of each job's windows
+            size = 0
+            while self._jobs and size < self.max_batch_size:
+                job = self._jobs[0]
+                take = min(job.windows.shape[0] - job.next, self.max_batch_size - size)
+                if job.next == 0:
+                    STAGE_SECONDS.observe(time.monotonic() - job.arrived, stage="queue_wait")
+                batch.append((job, job.next, job.next + take))
+                job.next += take
+                size += take
+                if job.next == job.windows.shape[0]:
+                    self._jobs.popleft()
+            self._queued_windows -= size
+            return batch
+
+    def _score(self, batch):
+        X = torch.cat([job.windows[start:end] for job, start, end in batch])
+        g = torch.cat([torch.full((end - start,), job.gender) for job, start, end in batch])
+        BATCH_WINDOWS.observe(X.shape[0])
+        with stage("forward"):
+            logits = score_windows(self.classifier.model, X, g, self.classifier.device)
+        return torch.softmax(logits, dim=-1).cpu()        # [B, 2]
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            try:
+                probs = self._score(batch)
+            except Exception as e:
+                for job, _, _ in batch:
+                    job.error = e
+                    job.done.set()
+                continue
+
+            offset = 0
+            for job, start, end in batch:
+                job.probs[start:end] = probs[offset:offset + end - start]
+                offset += end - start
+                job.remaining -= end - start
+                if job.remaining == 0 and job.error is None:
+                    job.done.set()
@@ -0,0 +1,161 @@
+import threading
+import time
+
+import numpy as np
+import torch
+
+from model.bert.data import SR, N_FFT, HOP
+from model.bert.frontend import MelFrontend, AMIN, TOP_DB
+from model.bert.inference import unfold_windows, gender_to_value, score_windows
+
+
+class StreamTooLong(Exception):
+    """Raised by StreamingSession.feed when a chunk would take the recording past max_seconds."""
+
+
+class StreamingSession:
+    """
+    Incremental dysarthria scoring for audio that arrives in chunks.
+
+    PCM samples are turned into mel frames as soon as a full STFT frame is
+    available (same framing as `center=True`), and every `window_T`-frame window
+    is scored the moment it fills to give a running probability. Those preview
+    windows are normalized with running dB statistics (updated per chunk, the
+    top_db floor ignored), so they drift from the whole-clip statistics the
+    offline path uses. `finish` therefore rescores every window against the final
+    statistics: its result matches `/upload` on the same audio, and it skips
+    only the decoding and STFT work of an upload, not the model pass.
+
+    With `max_seconds` set, a chunk that would take the recording past it raises
+    StreamTooLong and is dropped, so the audio and frames held per stream stay bounded.
+
+    Example:
+        session = StreamingSession(classifier, gender="female", max_seconds=600)
+        session.feed(pcm_bytes)       # repeatedly, 16-bit mono PCM at SR
+        pred, prob = session.finish()
+    """
+    def __init__(self, classifier, gender, max_seconds=None):
+        self.classifier = classifier
+        self.gender = gender_to_value(gender)
+        self.max_seconds = max_seconds
+        frontend = classifier.frontend if classifier.frontend is not None else MelFrontend(classifier.n_mels)
+        self._window = frontend.window.cpu()
+        self._mel_fb = frontend.mel_fb.cpu()
+
+        self.pcm = bytearray()                              # raw audio, for saving once the stream ends
+        self._pending = torch.zeros(N_FFT // 2)             # center padding + samples not yet framed
+        self._frames = torch.empty(classifier.n_mels, 0)    # unreferenced dB frames [n_mels, T]
+        self._db_max = -torch.inf                           # running statistics of the dB frames
+        self._db_sum = 0.0
+        self._db_sq_sum = 0.0
+        self._odd_byte = b""
+        self._scored = 0
+        self._prob_sum = torch.zeros(2)
+        self._result = None
+        self._lock = threading.Lock()
+        self.finished = False
+        self.last_active = time.monotonic()
+
+    @property
+    def num_samples(self):
+        return len(self.pcm) // 2
+
+    @property
+    def duration(self):
+        return self.num_samples / SR
+
+    @property
+    def windows_scored(self):
+        return self._scored
+
+    def running_prob(self):
+        """Mean dysarthria probability over the preview windows scored so far (None before the first window)."""
+        if self._scored == 0:
+            return None
+        return (self._prob_sum / self._scored)[1].item()
+
+    def feed(self, chunk):
+        """Append a chunk of 16-bit mono PCM and score any windows it completes."""
+        with self._lock:
+            if self.finished:
+                raise RuntimeError("Stream already finished")
+            self.last_active = time.monotonic()
+            data = self._odd_byte + bytes(chunk)
+            usable = len(data) - len(data) % 2
+            if self.max_seconds is not None and (len(self.pcm) + usable) // 2 > self.max_seconds * SR:
+                raise StreamTooLong(f"Stream would exceed {self.max_seconds:g} s of audio; finish it instead")
+            self._odd_byte = data[usable:]
+            self.pcm += data[:usable]
+            samples = torch.from_numpy(np.frombuffer(data[:usable], dtype=np.int16).astype(np.float32) / 32768.0)
+            self._pending = torch.cat([self._pending, samples])
+            self._frame()
+            self._score_preview()
+            return self.running_prob()
+
+    def finish(self):
+        """Flush the trailing samples and return (pred, prob) over every window, scored with whole-clip statistics."""
+        with self._lock:
+            if self._result is None:
+                self.finished = True
+                pad = N_FFT // 2
+                if self.num_samples < N_FFT:  # load_mel pads clips shorter than N_FFT
+                    pad += N_FFT - self.num_samples
+                self._pending = torch.cat([self._pending, torch.zeros(pad)])
+                self._frame()
+                c = self.classifier
+                windows = unfold_windows(self._normalized(), c.window_T, c.hop_T)
+                mean_probs = self._probs(windows).mean(0)
+                self._result = float(mean_probs.argmax().item()), mean_probs[1].item()
+            return self._result
+
+    def _frame(self):
+        """Turn every complete STFT frame in the pending buffer into a dB mel frame."""
+        n = (len(self._pending) - N_FFT) // HOP + 1
+        if n <= 0:
+            return
+        used = (n - 1) * HOP + N_FFT
+        spec = torch.stft(
+            self._pending[:used], n_fft=N_FFT, hop_length=HOP, win_length=N_FFT,
+            window=self._window, center=False, return_complex=True,
+        )
+        power = spec.real.square() + spec.imag.square()
+        mel = torch.matmul(self._mel_fb, power)                           # [n_mels, n]
+        mel_db = 10.0 * torch.log10(torch.clamp(mel, min=AMIN))
+        self._frames = torch.cat([self._frames, mel_db], dim=1)
+        self._pending = self._pending[n * HOP:]
+
+        self._db_max = max(self._db_max, mel_db.max().item())
+        self._db_sum += mel_db.double().sum().item()
+        self._db_sq_sum += mel_db.double().square().sum().item()
+
+    def _normalized(self):
+        """power_to_db(ref=max) + per-utterance normalization over all frames, as in the offline path."""
+        mel_db = self._frames - self._frames.max()
+        mel_db = torch.clamp(mel_db, min=-TOP_DB)
+        return (mel_db - mel_db.mean()) / (mel_db.std(unbiased=False) + 1e-6)
+
+    def _score_preview(self):
+        """Score the windows completed since the last chunk, normalizing only their frames with the running statistics."""
+        c = self.classifier
+        T = self._frames.shape[1]
+        if T < c.window_T:
+            return
+        n_windows = (T - c.window_T) // c.hop_T + 1
+        if n_windows <= self._scored:
+            return
+
+        start, end = self._scored * c.hop_T, (n_windows - 1) * c.hop_T + c.window_T
+        count = self._frames.numel()
+        mean = self._db_sum / count
+        std = max(self._db_sq_sum / count - mean * mean, 0.0) ** 0.5
+        mel_db = torch.clamp(self._frames[:, start:end], min=self._db_max - TOP_DB)
+        windows = unfold_windows((mel_db - mean) / (std + 1e-6), c.window_T, c.hop_T)
+
+        self._prob_sum += self._probs(windows).sum(0)
+        self._scored += windows.shape[0]
+
+    def _probs(self, windows):
+        c = self.classifier
+        B = windows.shape[0]
+        logits = score_windows(c.model, windows, torch.full((B,), self.gender), c.device, c.batch_size)
+        return torch.softmax(logits, dim=-1).cpu()                        # [B, 2]
@@ -0,0 +1,58 @@
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from tqdm import tqdm
+
+from model.bert.data import load_mel, mel_params
+from model.bert.frontend import MelFrontend
+from model.bert.mel_store import MelStoreWriter
+
+
+_frontends = {}  # one MelFrontend per worker process and n_mels
+
+
+def _compute(job):
+    wav_file, n_mels, frontend_name = job
+    frontend = None
+    if frontend_name == 'torch':
+        if n_mels not in _frontends:
+            _frontends[n_mels] = MelFrontend(n_mels=n_mels)
+        frontend = _frontends[n_mels]
+    return wav_file, load_mel(wav_file, n_mels, frontend=frontend).numpy()
+
+
+def precompute():
+    parser = argparse.ArgumentParser(description='Precompute mel-spectrograms for a training CSV into a sharded memory-mapped store')
+    parser.add_argument('--data_csv', type=str, required=True, help='same CSV as train.py --data_csv')
+    parser.add_argument('--out_dir', type=str, required=True)
+    parser.add_argument('--n_mels', type=int, default=80)
+    parser.add_argument('--frontend', type=str, default='librosa', choices=['torch', 'librosa'], help='mel implementation; train.py --frontend must match it')
+    parser.add_argument('--dtype', type=str, default='float32', choices=['float16', 'float32'])
+    parser.add_argument('--shard_mb', type=int, default=1024, help='target size of each shard file in MB')
+    parser.add_argument('--num_workers', type=int, default=None, help='processes computing mels (default: all cores)')
+    parser.add_argument('--chunksize', type=int, default=8, help='rows handed to a worker at a time')
+
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.data_csv)
+    wav_files = list(dict.fromkeys(df.iloc[:, 2]))  # unique, in CSV order
+    jobs = [(wav_file, args.n_mels, args.frontend) for wav_file in wav_files]
+
+    writer = MelStoreWriter(
+        args.out_dir,
+        n_mels=args.n_mels,
+        params=mel_params(args.n_mels, args.frontend if args.frontend == 'torch' else None),
+        dtype=args.dtype,
+        shard_bytes=args.shard_mb * 1024**2,
+    )
+    with ProcessPoolExecutor(max_workers=args.num_workers) as pool:
+        for wav_file, mel in tqdm(pool.map(_compute, jobs, chunksize=args.chunksize), total=len(jobs), desc="Computing mels"):
+            writer.add(wav_file, mel)
+    writer.close()
+
+    print(f"Wrote {len(writer.entries)} mels to {len(writer.shards)} shard(s) in {args.out_dir}")
+
+
+if __name__ == "__main__":
+    precompute()
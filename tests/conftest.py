@@ -0,0 +1,29 @@
+import pytest
+import torch
+
+import model.bert.inference as inference
+from model.bert.bert import SpectrogramBERTClassifier
+
+
+N_MELS = 16
+WINDOW_T = 128
+HOP_T = 64
+
+
+@pytest.fixture(scope="session")
+def model():
+    """A small randomly initialised classifier with the production window geometry."""
+    torch.manual_seed(0)
+    model = SpectrogramBERTClassifier(n_mels=N_MELS, hidden_size=32, num_layers=2, num_heads=2, max_positions=WINDOW_T)
+    return model.eval()
+
+
+@pytest.fixture
+def make_classifier(model, monkeypatch):
+    """`Classifier` factory that serves the tiny `model` instead of loading a checkpoint."""
+    monkeypatch.setattr(inference, "load_model", lambda model_path, n_mels=80, num_classes=2: model)
+
+    def make(**kwargs):
+        kwargs.setdefault("frontend", "librosa")
+        return inference.Classifier("unused.pt", n_mels=N_MELS, window_T=WINDOW_T, hop_T=HOP_T, **kwargs)
+    return make
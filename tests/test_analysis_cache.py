@@ -0,0 +1,45 @@
+import time
+
+from model.agent.cache import AnalysisCache
+
+
+def test_ttl_is_absolute_even_for_entries_read_often(tmp_path, monkeypatch):
+    cache = AnalysisCache(tmp_path, ttl= 100)
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now)
+    cache.put("k", {"overview_en": "report"})
+
+    for step in (30, 60, 90):
+        monkeypatch.setattr(time, "time", lambda: now + step)
+        assert cache.get("k") == {"overview_en": "report"}
+
+    monkeypatch.setattr(time, "time", lambda: now + 101)
+    assert cache.get("k") is None
+    assert cache.stats()["expired"] == 1
+
+
+def test_evict_drops_expired_entries_despite_recent_reads(tmp_path, monkeypatch):
+    cache = AnalysisCache(tmp_path, ttl= 100)
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now)
+    cache.put("old", {"n": 1})
+    monkeypatch.setattr(time, "time", lambda: now + 90)
+    cache.get("old")
+    cache.put("new", {"n": 2})
+
+    monkeypatch.setattr(time, "time", lambda: now + 150)
+    cache.evict()
+    assert sorted(p.stem for p in tmp_path.glob("*.json")) == ["new"]
+
+
+def test_evict_removes_least_recently_read(tmp_path, monkeypatch):
+    cache = AnalysisCache(tmp_path, max_entries= 2, ttl= 1000)
+    now = time.time()
+    for i, key in enumerate(("a", "b")):
+        monkeypatch.setattr(time, "time", lambda: now + i)
+        cache.put(key, {"key": key})
+    monkeypatch.setattr(time, "time", lambda: now + 5)
+    cache.get("a")  # b is now the least recently used
+    monkeypatch.setattr(time, "time", lambda: now + 6)
+    cache.put("c", {"key": "c"})
+    assert sorted(p.stem for p in tmp_path.glob("*.json")) == ["a", "c"]
@@ -0,0 +1,74 @@
+import json
+
+import pytest
+
+from model.agent.chatbot import JsonStringField
+
+
+def decode(deltas, field="response"):
+    decoder = JsonStringField(field)
+    return "".join(decoder.feed(delta) for delta in deltas), decoder.done
+
+
+def every_split(raw):
+    """Every way of cutting `raw` into two deltas, plus one character per delta."""
+    yield from ([raw[:k], raw[k:]] for k in range(len(raw) + 1))
+    yield list(raw)
+
+
+TEXTS = [
+    "Hello, world",
+    'quote " backslash \\ slash / controls \b\f\n\r\t',
+    "مرحبا! كيف حالك؟",
+    "emoji 😀 and 𝄞 next to each other: 😀😀",
+    "é中\x01",
+]
+
+
+@pytest.mark.parametrize("text", TEXTS)
+@pytest.mark.parametrize("ensure_ascii", [True, False])
+def test_escapes_split_across_deltas(text, ensure_ascii):
+    raw = json.dumps({"accepted_msg": True, "response": text}, ensure_ascii=ensure_ascii)
+    for deltas in every_split(raw):
+        assert decode(deltas) == (text, True)
+
+
+def test_field_after_other_fields():
+    raw = json.dumps({"accepted_msg": True, "note": 'looks like "response": "no"', "response": "yes"})
+    for deltas in every_split(raw):
+        assert decode(deltas) == ("yes", True)
+
+
+def test_nothing_before_the_field_appears():
+    decoder = JsonStringField("response")
+    assert decoder.feed('{"accepted_msg": true, "respo') == ""
+    assert decoder.feed('nse"') == ""
+    assert decoder.feed(': "hi') == "hi"
+    assert not decoder.done
+    assert decoder.feed('"}') == ""
+    assert decoder.done
+    assert decoder.feed(' trailing') == ""
+
+
+def test_high_surrogate_waits_for_its_pair():
+    decoder = JsonStringField("response")
+    assert decoder.feed('{"response": "a\\ud83d') == "a"
+    assert decoder.feed('\\u') == ""
+    assert decoder.feed('de0') == ""
+    assert decoder.feed('0b"}') == "😀b"
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("\\ud83d", "�"),                 # high surrogate at the end of the string
+    ("\\ud83dx", "�x"),               # followed by a plain character
+    ("\\ud83d\\n", "�\n"),            # followed by another escape
+    ("\\ud83d\\u0041", "�A"),         # followed by a non-surrogate \u escape
+    ("\\ud83d\\ud83d\\ude00", "�😀"),  # two highs, the second one paired
+    ("\\ude00", "�"),                 # lone low surrogate
+    ("\\uzzzz", "�"),                 # not hex
+    ("\\u+1a2", "�"),
+])
+def test_invalid_surrogates_become_replacement_characters(value, expected):
+    raw = '{"response": "%s"}' % value
+    for deltas in every_split(raw):
+        assert decode(deltas) == (expected, True)
@@ -0,0 +1,194 @@
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+
+import httpx
+import openai
+import pytest
+
+from model.agent.client import ClientManager
+
+
+REQUEST = httpx.Request("POST", "https://api.openai.com/v1/responses")
+
+
+def status_error(status, retry_after=None):
+    headers = {"retry-after": str(retry_after)} if retry_after is not None else {}
+    return openai.APIStatusError(f"status {status}", response=httpx.Response(status, headers=headers, request=REQUEST), body=None)
+
+
+class FakeClient:
+    """Stands in for OpenAI/AsyncOpenAI: `errors` are raised by the first attempts, then `result` is returned."""
+    def __init__(self, errors=(), result="ok", duration=0.0):
+        self.errors = list(errors)
+        self.result = result
+        self.duration = duration
+        self.attempts = 0
+        self.timeouts = []
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def _enter(self, timeout):
+        with self._lock:
+            self.attempts += 1
+            self.timeouts.append(timeout)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            return self.errors.pop(0) if self.errors else None
+
+    def _exit(self):
+        with self._lock:
+            self.active -= 1
+
+    def create(self, timeout, **kwargs):
+        error = self._enter(timeout)
+        try:
+            if error is not None:
+                raise error
+            time.sleep(self.duration)
+            return self.result
+        finally:
+            self._exit()
+
+    async def acreate(self, timeout, **kwargs):
+        error = self._enter(timeout)
+        try:
+            if error is not None:
+                raise error
+            await asyncio.sleep(self.duration)
+            return self.result
+        finally:
+            self._exit()
+
+    @contextmanager
+    def _stream(self, timeout):
+        error = self._enter(timeout)
+        try:
+            if error is not None:
+                raise error
+            yield iter([self.result])
+        finally:
+            self._exit()
+
+    def stream(self, timeout, **kwargs):
+        return self._stream(timeout)
+
+
+def manager_for(fake, **kwargs):
+    kwargs = {"backoff_base": 0.01, "backoff_max": 0.02, **kwargs}
+    manager = ClientManager(**kwargs)
+    manager._client = manager._async_client = fake
+    return manager
+
+
+def call(manager, mode, **kwargs):
+    if mode == "call":
+        return manager.call(lambda c: c.create, **kwargs)
+    if mode == "stream":
+        with manager.stream(lambda c: c.stream, **kwargs) as events:
+            return next(events)
+    return asyncio.run(manager.acall(lambda c: c.acreate, **kwargs))
+
+
+MODES = ["call", "stream", "acall"]
+
+
+@pytest.mark.parametrize("mode", MODES)
+@pytest.mark.parametrize("error", [status_error(429), status_error(503), openai.APIConnectionError(request=REQUEST), openai.APITimeoutError(REQUEST)])
+def test_retryable_errors_are_retried(mode, error):
+    fake = FakeClient(errors=[error, error])
+    assert call(manager_for(fake, max_retries=3), mode) == "ok"
+    assert fake.attempts == 3
+
+
+@pytest.mark.parametrize("mode", MODES)
+@pytest.mark.parametrize("error", [status_error(400), status_error(401), status_error(404), ValueError("bug")])
+def test_other_errors_are_not_retried(mode, error):
+    fake = FakeClient(errors=[error, error])
+    with pytest.raises(type(error)):
+        call(manager_for(fake, max_retries=3), mode)
+    assert fake.attempts == 1
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_retries_stop_after_max_retries(mode):
+    fake = FakeClient(errors=[status_error(500)] * 10)
+    with pytest.raises(openai.APIStatusError):
+        call(manager_for(fake, max_retries=2), mode)
+    assert fake.attempts == 3
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_retries_stop_at_the_deadline(mode):
+    fake = FakeClient(errors=[status_error(503)] * 1000)
+    start = time.monotonic()
+    # the last error, or TimeoutError if the final backoff sleep overshot what was left
+    with pytest.raises((openai.APIStatusError, TimeoutError)):
+        call(manager_for(fake, max_retries=1000, backoff_base=0.05, backoff_max=0.05), mode, deadline=0.3)
+    assert time.monotonic() - start < 0.3 + 0.1  # scheduling slack on the last sleep
+    assert 1 < fake.attempts < 1000
+    assert all(0 < t <= 0.3 for t in fake.timeouts)  # each attempt only gets what is left of the deadline
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_retry_after_past_the_deadline_is_not_waited_for(mode):
+    fake = FakeClient(errors=[status_error(429, retry_after=30)])
+    start = time.monotonic()
+    with pytest.raises(openai.APIStatusError):
+        call(manager_for(fake), mode, deadline=1)
+    assert time.monotonic() - start < 1
+    assert fake.attempts == 1
+
+
+def test_retry_after_is_honoured():
+    fake = FakeClient(errors=[status_error(429, retry_after=0.2)])
+    start = time.monotonic()
+    assert call(manager_for(fake), "call") == "ok"
+    assert time.monotonic() - start >= 0.2
+
+
+@pytest.mark.parametrize("mode", ["call", "stream"])
+def test_sync_concurrency_stays_within_max_in_flight(mode):
+    fake = FakeClient(duration=0.05)
+    manager = manager_for(fake, max_in_flight=2)
+
+    def run():
+        if mode == "call":
+            manager.call(lambda c: c.create)
+        else:
+            with manager.stream(lambda c: c.stream) as events:
+                next(events)
+                time.sleep(0.05)  # the slot is held while the stream is read
+
+    threads = [threading.Thread(target=run) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert fake.attempts == 8
+    assert fake.peak == 2
+
+
+def test_async_concurrency_stays_within_max_in_flight():
+    fake = FakeClient(duration=0.05)
+    manager = manager_for(fake, max_in_flight=3)
+
+    async def run():
+        return await asyncio.gather(*(manager.acall(lambda c: c.acreate) for _ in range(10)))
+
+    assert asyncio.run(run()) == ["ok"] * 10
+    assert fake.peak == 3
+
+
+def test_waiting_for_a_slot_counts_against_the_deadline():
+    fake = FakeClient(duration=0.5)
+    manager = manager_for(fake, max_in_flight=1)
+    holder = threading.Thread(target=manager.call, args=(lambda c: c.create,))
+    holder.start()
+    time.sleep(0.05)
+    with pytest.raises(TimeoutError):
+        manager.call(lambda c: c.create, deadline=0.1)
+    holder.join()
+    assert fake.attempts == 1
@@ -0,0 +1,107 @@
+import json
+
+import pytest
+
+import model.agent.context as context
+from model.agent.context import build_context, estimate_tokens, shorten
+
+
+REPORT_LINE = "Your speech rate is 112.5 words per minute, which is below the class average of 140.25 wpm. " * 4
+
+
+def test_short_text_is_unchanged():
+    assert shorten("Practice daily.", 240) == "Practice daily."
+
+
+@pytest.mark.parametrize("limit", range(30, 240, 7))
+def test_cut_never_splits_numbers_or_words(limit):
+    out = shorten(REPORT_LINE, limit)
+    assert len(out) <= limit and out.endswith("…")
+    kept = out.rstrip(" …").split()
+    assert kept == REPORT_LINE.split()[:len(kept)]
+
+
+def test_prefers_a_sentence_boundary():
+    assert shorten(REPORT_LINE, 120) == REPORT_LINE[:REPORT_LINE.index("wpm.") + 4] + " …"
+
+
+def test_arabic_question_mark_ends_a_sentence():
+    text = "هل تحدثت اليوم بسرعة كافية؟ " + "نعم " * 40
+    assert shorten(text, 40) == "هل تحدثت اليوم بسرعة كافية؟ …"
+
+
+def test_long_run_without_spaces_is_cut_hard():
+    assert shorten("a" * 300, 20) == "a" * 19 + "…"
+
+
+REPORT = {
+    "overview_en": "Mild dysarthria with a slow speech rate.", "overview_ar": "عسر كلام خفيف مع بطء في الكلام.",
+    "speech_rate_comparison_en": "Below the class average.", "speech_rate_severity": "mild", "avg_class_wpm": 140.25,
+    "disorders_en": [{"disorder_name": "Dysarthria", "disorder_symptoms": ["slurred speech"], "disorder_lying_causes": ["weak muscles"]}],
+    "recommendations_en": [{"recommendation": "Read aloud", "priority": "high", "tips": ["slowly", "daily"]}],
+}
+
+
+@pytest.fixture
+def summaries(monkeypatch):
+    stored = {}
+    monkeypatch.setattr(context, "get_chat_summary", lambda uuid: stored.get(uuid))
+    monkeypatch.setattr(context, "store_chat_summary", lambda uuid, summary: stored.__setitem__(uuid, summary))
+    monkeypatch.setattr(context, "_encoding", False)  # byte estimate, so budgets don't depend on tiktoken
+    return stored
+
+
+def history(turns):
+    messages = [{"agent": REPORT}]
+    for i in range(turns):
+        messages.append({"user": f"Question {i}: how can I improve my speech rate in exercise {i}?"})
+        messages.append({"agent": {"response": f"Answer {i}: read the passage aloud slowly, then repeat it {i} times."}})
+    messages.append({"user": "What should I practise today?"})
+    return messages
+
+
+def size(ctx):
+    return estimate_tokens(json.dumps(ctx, ensure_ascii=False))
+
+
+def texts(ctx):
+    return [next(iter(m.values())) for m in ctx if "user" in m or ("agent" in m and isinstance(m["agent"], str))]
+
+
+@pytest.mark.parametrize("max_tokens", [120, 150, 180, 250, 300, 400, 600, 1000, 3000])
+def test_stays_within_budget_and_keeps_report_and_newest_turn(summaries, max_tokens):
+    chat = history(20)
+    ctx = build_context("u", chat, max_tokens=max_tokens, recent_messages=6)
+    assert size(ctx) <= max_tokens
+    assert ctx[0] == {"agent": context.summarize_report(REPORT, "en")}
+    assert ctx[-1] == {"user": "What should I practise today?"}
+
+
+@pytest.mark.parametrize("max_tokens", [120, 150, 180, 250, 300, 400, 600, 1000])
+def test_drops_the_oldest_turns_first(summaries, max_tokens):
+    chat = history(20)
+    ctx = build_context("u", chat, max_tokens=max_tokens, recent_messages=6)
+    all_lines = summaries["u"]["lines"]
+    lines = next((m["summary_of_earlier_turns"] for m in ctx if "summary_of_earlier_turns" in m), [])
+    verbatim = texts(ctx)
+
+    # what survives is the newest stretch of the conversation: a suffix of the summary, then a suffix of the messages
+    everything = [context._summary_line(m) for m in chat[1:]]
+    assert lines == all_lines[len(all_lines) - len(lines):]
+    assert verbatim == [context._text(m)[1] for m in chat[len(chat) - len(verbatim):]]
+    if lines:
+        assert lines[-1] == everything[len(chat) - 1 - len(verbatim) - 1]
+
+
+def test_everything_fits_in_a_large_budget(summaries):
+    chat = history(20)
+    ctx = build_context("u", chat, max_tokens=100_000, recent_messages=6)
+    assert len(texts(ctx)) == 6
+    assert len(ctx[1]["summary_of_earlier_turns"]) == len(chat) - 1 - 6
+
+
+def test_summary_is_extended_turn_by_turn(summaries):
+    build_context("u", history(5), max_tokens=3000, recent_messages=4)
+    covered = summaries["u"]["covered"]
+    build_context("u", history(6), max_tokens=3000, recent_messages=4)
+    assert summaries["u"]["covered"] == covered + 2
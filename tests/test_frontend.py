@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+import soundfile as sf
+import torch
+
+from model.bert.data import SR
+from model.bert.frontend import MelFrontend
+from model.bert.inference import load_mel_for_inference, mel_from_waveform
+
+
+N_MELS = 80
+ATOL = 1e-4  # normalized mel_db units (about unit variance); measured differences are ~3e-6
+
+
+def sine_and_noise(seconds, seed):
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(SR * seconds)) / SR
+    y = 0.5 * np.sin(2 * np.pi * 220.0 * t) + 0.2 * np.sin(2 * np.pi * 1830.0 * t) + 0.05 * rng.standard_normal(t.shape)
+    return y.astype(np.float32)
+
+
+@pytest.fixture(scope="module")
+def frontend():
+    return MelFrontend(n_mels=N_MELS)
+
+
+@pytest.mark.parametrize("seconds", [0.03, 1.0, 7.3])
+def test_load_mel_matches_librosa(frontend, tmp_path, seconds):
+    path = tmp_path / "clip.wav"
+    sf.write(path, sine_and_noise(seconds, seed=1), SR, subtype="FLOAT")
+
+    expected = load_mel_for_inference(str(path), n_mels=N_MELS, frontend=None)
+    mel = load_mel_for_inference(str(path), n_mels=N_MELS, frontend=frontend)
+
+    assert mel.shape == expected.shape
+    torch.testing.assert_close(mel, expected, atol=ATOL, rtol=0)
+
+
+def test_padded_batch_matches_librosa_per_clip(frontend):
+    clips = [sine_and_noise(seconds, seed=i) for i, seconds in enumerate((0.02, 0.5, 3.1, 2.0))]
+    lengths = torch.tensor([len(y) for y in clips])
+    batch = torch.zeros(len(clips), int(lengths.max()))
+    for row, y in enumerate(clips):
+        batch[row, :len(y)] = torch.from_numpy(y)
+
+    mels, frames = frontend(batch, lengths)
+
+    for row, y in enumerate(clips):
+        expected = mel_from_waveform(y, n_mels=N_MELS)
+        assert int(frames[row]) == expected.shape[-1]
+        torch.testing.assert_close(mels[row, :, :int(frames[row])], expected, atol=ATOL, rtol=0)
+        assert torch.count_nonzero(mels[row, :, int(frames[row]):]) == 0  # padding frames are zeroed
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+import soundfile as sf
+import torch
+import torch.nn as nn
+
+from model.bert.data import SR
+from model.bert.frontend import load_waveform
+from model.bert.inference import classify_long_clip, slide_windows, unfold_windows
+from tests.conftest import HOP_T, N_MELS, WINDOW_T
+
+
+DEVICE = torch.device("cpu")
+
+
+@torch.no_grad()
+def classify_per_window(model, mel, gender, window_T, hop_T, device, criterion=None, y=None):
+    """The one-window-per-forward loop classify_long_clip replaced."""
+    windows = slide_windows(mel, window_T, hop_T)
+    probs_list, losses = [], []
+    g = torch.tensor([[gender]], dtype=torch.float32, device=device)
+    for w in windows:
+        X = w.to(device)
+        lengths = torch.tensor([X.shape[-1]], device=device)
+        logits = model(X, lengths=lengths, gender=g)
+        probs_list.append(torch.softmax(logits, dim=-1))
+        if criterion is not None and y is not None:
+            losses.append(criterion(logits, torch.tensor([y], device=device)))
+    mean_probs = torch.stack(probs_list).mean(0)
+    mean_loss = torch.stack(losses).mean().item() if losses else None
+    return mean_probs.argmax(dim=1).item(), mean_loss, mean_probs
+
+
+# shorter than one window, exactly one window, and k hops past it with a partial tail of r frames
+CLIP_FRAMES = [1, 37, WINDOW_T - 1, WINDOW_T, WINDOW_T + HOP_T, WINDOW_T + 3 * HOP_T, WINDOW_T + 2 * HOP_T + 17, WINDOW_T + 5 * HOP_T + 63]
+
+
+@pytest.mark.parametrize("T", CLIP_FRAMES)
+def test_unfold_windows_matches_slide_windows(T):
+    mel = torch.randn(N_MELS, T, generator=torch.Generator().manual_seed(T))
+    expected = torch.cat(slide_windows(mel, WINDOW_T, HOP_T))
+    assert torch.equal(unfold_windows(mel, WINDOW_T, HOP_T), expected)
+
+
+@pytest.mark.parametrize("T", CLIP_FRAMES)
+@pytest.mark.parametrize("batch_size", [None, 1, 3])
+@pytest.mark.parametrize("gender", [0.0, 1.0])
+def test_classify_long_clip_matches_per_window_loop(model, T, batch_size, gender):
+    mel = torch.randn(N_MELS, T, generator=torch.Generator().manual_seed(T))
+    criterion = nn.CrossEntropyLoss()
+
+    pred, loss, probs = classify_long_clip(model, mel, gender, WINDOW_T, HOP_T, DEVICE, criterion=criterion, y=1, batch_size=batch_size)
+    ref_pred, ref_loss, ref_probs = classify_per_window(model, mel, gender, WINDOW_T, HOP_T, DEVICE, criterion=criterion, y=1)
+
+    assert probs.shape == ref_probs.shape == (1, 2)
+    torch.testing.assert_close(probs, ref_probs, atol=1e-5, rtol=0)
+    assert loss == pytest.approx(ref_loss, abs=1e-5)
+    assert pred == ref_pred
+
+
+@pytest.mark.parametrize("frontend", ["librosa", "torch"])
+def test_predict_batch_matches_predict(make_classifier, tmp_path, frontend):
+    classifier = make_classifier(frontend=frontend)
+    rng = np.random.default_rng(0)
+    # mixed lengths, one under N_FFT samples, in unsorted order so buckets reorder them
+    seconds = [3.1, 0.05, 1.7, 6.4, 0.9, 2.2, 0.03, 4.8, 1.2]
+    genders = ["male", "female"] * 5
+    paths = []
+    for i, s in enumerate(seconds):
+        path = tmp_path / f"clip{i}.wav"
+        sf.write(path, (rng.standard_normal(int(SR * s)) * 0.1).astype(np.float32), SR, subtype="FLOAT")
+        paths.append(str(path))
+    inputs = paths[:-3] + [load_waveform(p) for p in paths[-3:]]  # paths and decoded waveforms together
+
+    results = classifier.predict_batch(inputs, genders[:len(inputs)], bucket_size=4)
+    for path, gender, (pred, prob) in zip(paths, genders, results):
+        ref_pred, ref_prob = classifier.predict(path, gender)
+        assert pred == ref_pred
+        assert prob == pytest.approx(ref_prob, abs=1e-5)
@@ -0,0 +1,92 @@
+import threading
+
+import pytest
+from werkzeug.exceptions import abort
+
+import utils.jobs.jobs as jobs_module
+from utils.jobs.jobs import Job, JobManager, JobQueueFull
+
+
+@pytest.fixture
+def manager():
+    manager = JobManager(max_workers=1, max_pending=2, ttl=60)
+    yield manager
+    manager.shutdown()
+
+
+def wait_finished(job, timeout=5):
+    index = 0
+    while not job.finished:
+        events = job.events_since(index, timeout=timeout)
+        assert events, f"job {job.id} did not finish"
+        index += len(events)
+
+
+def test_submit_past_max_pending_raises(manager):
+    release = threading.Event()
+    blocked = [manager.submit(f"job{i}", lambda job: release.wait(5) and {}) for i in range(2)]
+    with pytest.raises(JobQueueFull):
+        manager.submit("job2", lambda job: {})
+    assert manager.pending() == 2
+
+    release.set()
+    for job in blocked:
+        wait_finished(job)
+    wait_finished(manager.submit("job2", lambda job: {}))  # finished jobs free their slot
+
+
+def test_results_and_events(manager):
+    def run(job, x):
+        job.update("halfway", half=x / 2)
+        return {"value": x}
+
+    job = manager.submit("job", run, 4)
+    wait_finished(job)
+    assert job.status == "done"
+    assert job.snapshot()["result"] == {"half": 2.0, "value": 4}
+    assert [e["status"] for e in job.events] == ["queued", "running", "halfway", "done"]
+
+
+def test_abort_description_reaches_the_error(manager):
+    def run(job):
+        abort(400, description="Text not attached with request")
+
+    job = manager.submit("job", run)
+    wait_finished(job)
+    assert job.status == "failed"
+    assert job.error == "Text not attached with request"
+    assert job.events[-1] == {"status": "failed", "error": "Text not attached with request"}
+
+
+def test_other_exceptions_are_reported_with_repr(manager):
+    def run(job):
+        raise ValueError("bad clip")
+
+    job = manager.submit("job", run)
+    wait_finished(job)
+    assert job.error == repr(ValueError("bad clip"))
+
+
+def test_finished_jobs_expire_after_ttl(manager, monkeypatch):
+    job = manager.submit("old", lambda job: {})
+    wait_finished(job)
+    now = job.updated
+    monkeypatch.setattr(jobs_module.time, "time", lambda: now + 59)
+    wait_finished(manager.submit("young", lambda job: {}))
+    assert manager.get("old") is job
+
+    monkeypatch.setattr(jobs_module.time, "time", lambda: now + 61)
+    manager.submit("new", lambda job: {})
+    assert manager.get("old") is None
+    assert manager.get("young") is not None
+
+
+def test_events_since_resumes_and_waits():
+    job = Job("job")
+    job.update("running")
+    assert job.events_since(1, timeout=0) == [{"status": "running"}]
+    assert job.events_since(2, timeout=0.01) == []  # times out empty
+
+    threading.Timer(0.05, job.update, args=("rates",), kwargs={"speech_rate": 3.0}).start()
+    assert job.events_since(2, timeout=5) == [{"status": "rates", "speech_rate": 3.0}]
+    assert [e["status"] for e in job.events_since(0, timeout=0)] == ["queued", "running", "rates"]
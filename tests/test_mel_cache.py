@@ -0,0 +1,68 @@
+import os
+
+import numpy as np
+import pytest
+import torch
+
+from model.bert.data import mel_params
+from model.bert.mel_cache import MelCache
+
+
+@pytest.fixture
+def wav(tmp_path):
+    path = tmp_path / "clip.wav"
+    path.write_bytes(b"RIFF" + bytes(range(256)) * 4)
+    return path
+
+
+def test_float32_entries_are_memory_mapped(tmp_path, monkeypatch):
+    cache = MelCache(tmp_path / "cache")
+    mel = torch.randn(80, 50)
+    cache.put("k", mel)
+    wrapped = []
+    from_numpy = torch.from_numpy
+    monkeypatch.setattr(torch, "from_numpy", lambda a: wrapped.append(a) or from_numpy(a))
+    out = cache.get("k")
+    monkeypatch.undo()
+    assert isinstance(wrapped[0], np.memmap)
+    assert torch.equal(out, mel)
+    out += 1  # copy-on-write: the entry on disk is untouched
+    assert torch.equal(cache.get("k"), mel)
+
+
+def test_float16_entries_come_back_as_float32(tmp_path):
+    cache = MelCache(tmp_path / "cache", dtype="float16")
+    mel = torch.randn(80, 50)
+    cache.put("k", mel)
+    out = cache.get("k")
+    assert out.dtype == torch.float32
+    torch.testing.assert_close(out, mel.half().float())
+
+
+def test_key_separates_frontends(tmp_path, wav):
+    cache = MelCache(tmp_path / "cache")
+    assert cache.key(wav, mel_params(80)) != cache.key(wav, mel_params(80, frontend=object()))
+    assert cache.key(wav, mel_params(80)) == cache.key(wav, mel_params(80))
+
+
+def test_overwriting_an_entry_does_not_grow_the_size_estimate(tmp_path):
+    cache = MelCache(tmp_path / "cache")
+    mel = torch.randn(80, 50)
+    cache.put("k", mel)
+    size = cache._total_bytes
+    for _ in range(3):
+        cache.put("k", mel)
+    assert cache._total_bytes == size == (tmp_path / "cache" / "k.npy").stat().st_size
+
+
+def test_remembered_file_hashes_are_bounded(tmp_path):
+    cache = MelCache(tmp_path / "cache", max_content_hashes=3)
+    paths = []
+    for i in range(5):
+        paths.append(tmp_path / f"{i}.wav")
+        paths[-1].write_bytes(bytes([i]) * 64)
+        cache.content_hash(paths[-1])
+    cache.content_hash(paths[2])  # most recently used again
+
+    remembered = [os.path.basename(key[0]) for key in cache._content_hashes]
+    assert remembered == ["3.wav", "4.wav", "2.wav"]
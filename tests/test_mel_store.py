@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+import torch
+
+from model.bert.data import mel_params
+from model.bert.mel_store import MelStore, MelStoreWriter
+
+
+def write_store(path, params, n_mels=16):
+    writer = MelStoreWriter(path, n_mels=n_mels, params=params, shard_bytes=1024)
+    for i in range(5):
+        writer.add(f"clip{i}.wav", np.full((n_mels, 10 + i), i, dtype=np.float32))
+    writer.close()
+    return MelStore(path)
+
+
+def test_round_trip_across_shards(tmp_path):
+    store = write_store(tmp_path / "store", mel_params(16))
+    assert len(store) == 5 and len(store.shards) > 1
+    for i in range(5):
+        assert torch.equal(store.get(f"clip{i}.wav"), torch.full((16, 10 + i), float(i)))
+    with pytest.raises(KeyError):
+        store.get("missing.wav")
+
+
+def test_check_params_accepts_matching_params(tmp_path):
+    store = write_store(tmp_path / "store", mel_params(16, "torch"))
+    store.check_params(mel_params(16, "torch"))
+
+
+@pytest.mark.parametrize("expected", [mel_params(16, "torch"), mel_params(32)])
+def test_check_params_rejects_a_mismatch(tmp_path, expected):
+    store = write_store(tmp_path / "store", mel_params(16))
+    with pytest.raises(ValueError, match="different mel parameters"):
+        store.check_params(expected)
+
+
+def test_stores_without_a_frontend_are_librosa(tmp_path):
+    params = mel_params(16)
+    del params["frontend"]
+    store = write_store(tmp_path / "store", params)
+    store.check_params(mel_params(16))
+    with pytest.raises(ValueError, match="frontend"):
+        store.check_params(mel_params(16, "torch"))
@@ -0,0 +1,38 @@
+import math
+
+from utils.metrics.metrics import Counter, Gauge, Histogram, Registry
+
+
+def test_non_finite_gauge_values_render_per_exposition_format():
+    registry = Registry()
+    gauge = registry.get_or_create(Gauge, "g", "help", labels= ("kind",))
+    gauge.set_function(lambda: math.inf, kind= "pos")
+    gauge.set_function(lambda: -math.inf, kind= "neg")
+    gauge.set_function(lambda: math.nan, kind= "nan")
+    gauge.set(2.5, kind= "finite")
+
+    lines = registry.render().splitlines()
+    assert 'g{kind="pos"} +Inf' in lines
+    assert 'g{kind="neg"} -Inf' in lines
+    assert 'g{kind="nan"} NaN' in lines
+    assert 'g{kind="finite"} 2.5' in lines
+
+
+def test_one_bad_gauge_does_not_break_the_scrape():
+    registry = Registry()
+    registry.get_or_create(Gauge, "bad", "help").set_function(lambda: float("inf"))
+    registry.get_or_create(Counter, "requests", "help").inc(3)
+    text = registry.render()
+    assert "bad +Inf" in text and "requests 3" in text
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    histogram = registry.get_or_create(Histogram, "h", "help", buckets= (0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value)
+    lines = registry.render().splitlines()
+    assert 'h_bucket{le="0.1"} 1' in lines
+    assert 'h_bucket{le="1"} 2' in lines
+    assert 'h_bucket{le="+Inf"} 3' in lines
+    assert "h_sum 5.55" in lines and "h_count 3" in lines
@@ -0,0 +1,80 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from utils.phonemes.arabic_phonetiser.phonetise_arabic import iterPronunciations, phonetise, phonetise_batch
+
+
+# (input, (with boundaries, plain, dictionary)) produced by the rule engine before it was
+# precompiled: the Arabic passages of data/text/user_text.json, every fixedWords entry and
+# random diacritised text
+GOLDEN = json.loads((Path(__file__).parent / "fixtures" / "arabic_phonetise_golden.json").read_text(encoding= "utf-8"))
+
+
+@pytest.mark.parametrize("case", GOLDEN, ids= range(len(GOLDEN)))
+def test_matches_golden_output(case):
+    assert list(phonetise(case["text"])) == case["expected"]
+
+
+# Spacing and standalone punctuation made the previous engine crash; they must leave the golden output unchanged
+NOISE = {
+    "double spaces": lambda line: line.replace(u' ', u'  '),
+    "surrounding spaces": lambda line: u'  ' + line + u' ',
+    "standalone punctuation": lambda line: u' . '.join(line.split(u' ')) + u' ، ؟ !',
+    "quotes and brackets": lambda line: u'« ' + line + u' ) "',
+}
+
+
+@pytest.mark.parametrize("noise", NOISE)
+def test_spacing_and_punctuation_match_golden_output(noise):
+    for case in GOLDEN[:60]:
+        text = u'\n'.join(NOISE[noise](line) for line in case["text"].splitlines())
+        assert list(phonetise(text)) == case["expected"], text
+
+
+@pytest.mark.parametrize("text", [u' ', u'   ', u'.', u' ، . ؟ '])
+def test_line_without_words_is_silence(text):
+    assert phonetise(text) == ([u'sil'], [u'sil'], u'')
+
+
+@pytest.mark.parametrize("processes", [None, 2])
+def test_batch_keeps_order_and_matches_phonetise(processes):
+    texts = [case["text"] for case in GOLDEN]
+    results = phonetise_batch(texts, processes= processes, chunksize= 16)
+    assert [list(r) for r in results] == [case["expected"] for case in GOLDEN]
+
+
+def test_pronunciations_come_most_likely_first():
+    phones = [u'b', [u'aa', u''], u'k', [u'u0', u'u1', u'']]
+    assert list(iterPronunciations(phones)) == [
+        [u'b', u'aa', u'k', u'u0'], [u'b', u'k', u'u0'],
+        [u'b', u'aa', u'k', u'u1'], [u'b', u'k', u'u1'],
+        [u'b', u'aa', u'k'], [u'b', u'k'],
+    ]
+
+
+def test_pronunciations_are_generated_lazily():
+    first = next(iterPronunciations([[u'aa', u'']] * 64))  # 2**64 combinations
+    assert first == [u'aa'] * 64
+
+
+@pytest.mark.parametrize("topk", [1, 2])
+def test_topk_keeps_the_utterance_pronunciations(topk):
+    for case in GOLDEN:
+        withBoundaries, plain, dictionary = phonetise(case["text"], topk= topk)
+        assert [withBoundaries, plain] == case["expected"][:2]
+        assert set(dictionary.splitlines()) <= set(case["expected"][2].splitlines())
+
+
+def test_topk_limits_dictionary_entries_per_word():
+    words = [line.split(u' ', 1)[0] for line in phonetise(u'وَالْكِتَابُ', topk= 1)[2].splitlines()]
+    assert len(words) == len(set(words)) == 1
+
+
+@pytest.mark.parametrize("topk", [0, -1, 1.5, True])
+def test_invalid_topk_is_rejected(topk):
+    with pytest.raises(ValueError):
+        phonetise(u'كتاب', topk= topk)
+    with pytest.raises(ValueError):
+        phonetise_batch([u'كتاب'], topk= topk)
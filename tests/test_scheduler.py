@@ -0,0 +1,126 @@
+import threading
+import time
+
+import pytest
+import torch
+import torch.nn as nn
+
+from model.bert.inference import classify_long_clip, gender_to_value
+from model.bert.scheduler import InferenceScheduler
+from tests.conftest import HOP_T, N_MELS, WINDOW_T
+
+
+class Recording(nn.Module):
+    """Wraps a model and records the number of windows in every forward pass."""
+    def __init__(self, model, fail=False):
+        super().__init__()
+        self.model = model
+        self.fail = fail
+        self.batches = []
+
+    def forward(self, mel, lengths=None, gender=None):
+        self.batches.append(mel.shape[0])
+        if self.fail:
+            raise RuntimeError("forward failed")
+        return self.model(mel, lengths=lengths, gender=gender)
+
+
+@pytest.fixture
+def scheduler_for(make_classifier):
+    schedulers = []
+
+    def make(model, **kwargs):
+        classifier = make_classifier()
+        classifier.model = model
+        schedulers.append(InferenceScheduler(classifier, **kwargs))
+        return schedulers[-1]
+    yield make
+    for scheduler in schedulers:
+        scheduler.close()
+
+
+def mel(frames, seed):
+    return torch.randn(N_MELS, frames, generator=torch.Generator().manual_seed(seed))
+
+
+def expected(model, clip, gender):
+    pred, _, probs = classify_long_clip(model, clip, gender_to_value(gender), WINDOW_T, HOP_T, torch.device("cpu"))
+    return float(pred), probs[0, 1].item()
+
+
+def run_concurrently(fn, args):
+    results = [None] * len(args)
+    start = threading.Barrier(len(args))
+
+    def call(i):
+        start.wait()
+        try:
+            results[i] = fn(*args[i])
+        except Exception as e:
+            results[i] = e
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(len(args))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_concurrent_callers_are_batched_and_match_classify_long_clip(model, scheduler_for):
+    recording = Recording(model)
+    scheduler = scheduler_for(recording, max_batch_size=8, max_wait_ms=200)
+    clips = [(mel(WINDOW_T + k * HOP_T - 5, seed=k), "male" if k % 2 else "female") for k in range(6)]  # 1-6 windows each
+
+    results = run_concurrently(scheduler.predict_mel, clips)
+
+    for (clip, gender), (pred, prob) in zip(clips, results):
+        ref_pred, ref_prob = expected(model, clip, gender)
+        assert prob == pytest.approx(ref_prob, abs=1e-5)
+        assert pred == ref_pred
+    assert sum(recording.batches) == sum(k + 1 for k in range(6))
+    assert max(recording.batches) == 8  # windows of several callers shared a forward pass
+
+
+def test_a_lone_window_waits_at_most_max_wait_ms(model, scheduler_for):
+    scheduler = scheduler_for(Recording(model), max_batch_size=64, max_wait_ms=150)
+    start = time.monotonic()
+    scheduler.predict_mel(mel(WINDOW_T, seed=0), "male")
+    elapsed = time.monotonic() - start
+    assert 0.14 <= elapsed < 2.0
+
+
+def test_a_full_batch_does_not_wait_for_the_deadline(model, scheduler_for):
+    scheduler = scheduler_for(Recording(model), max_batch_size=4, max_wait_ms=60_000)
+    start = time.monotonic()
+    scheduler.predict_mel(mel(WINDOW_T + 3 * HOP_T, seed=0), "male")  # exactly 4 windows
+    assert time.monotonic() - start < 10
+
+
+def test_a_job_larger_than_a_batch_is_split(model, scheduler_for):
+    recording = Recording(model)
+    scheduler = scheduler_for(recording, max_batch_size=2, max_wait_ms=1)
+    clip = mel(WINDOW_T + 4 * HOP_T, seed=3)  # 5 windows
+
+    pred, prob = scheduler.predict_mel(clip, "female")
+
+    assert recording.batches == [2, 2, 1]
+    ref_pred, ref_prob = expected(model, clip, "female")
+    assert prob == pytest.approx(ref_prob, abs=1e-5)
+    assert pred == ref_pred
+
+
+@pytest.mark.parametrize("max_batch_size", [2, 64])
+def test_a_failing_forward_raises_in_every_caller(model, scheduler_for, max_batch_size):
+    scheduler = scheduler_for(Recording(model, fail=True), max_batch_size=max_batch_size, max_wait_ms=100)
+    clips = [(mel(WINDOW_T + k * HOP_T, seed=k), "male") for k in range(4)]
+
+    results = run_concurrently(scheduler.predict_mel, clips)
+
+    assert all(isinstance(r, RuntimeError) and str(r) == "forward failed" for r in results)
+
+
+def test_closed_scheduler_rejects_new_work(model, scheduler_for):
+    scheduler = scheduler_for(Recording(model))
+    scheduler.close()
+    with pytest.raises(RuntimeError):
+        scheduler.predict_mel(mel(WINDOW_T, seed=0), "male")
@@ -0,0 +1,116 @@
+import sys
+
+import numpy as np
+import pytest
+
+import migrate_storage
+from utils.audio.audio import AudioBuffer
+from utils.storage.backends import FilesystemBackend, SQLiteBackend
+
+
+UUID = "0b7e6c1e-5d0a-4c4e-9a51-2f0f8c3d1a77"
+DATA = {"0": "female", "1": "نعم", "speech_rate": 3.5}
+CONVO = [("user", "hello"), ("agent", {"answer": ["مرحبا", "hi"]}), ("user", "again")]
+SUMMARY = {"turns": 4, "text": "Asked about speech rate."}
+
+
+def filesystem(root):
+    return FilesystemBackend(root / "audio", data_dir=root / "responses", convo_dir=root / "convo")
+
+
+def sqlite(root):
+    return SQLiteBackend(root / "storage.db", audio_dir=root / "audio")
+
+
+@pytest.fixture(params=[filesystem, sqlite], ids=["filesystem", "sqlite"])
+def backend(request, tmp_path):
+    return request.param(tmp_path)
+
+
+def audio():
+    samples = (np.random.default_rng(0).standard_normal(8000) * 3000).astype(np.int16)
+    return AudioBuffer.from_pcm(samples.tobytes())
+
+
+def fill(backend):
+    backend.save_data(UUID, DATA)
+    for role, content in CONVO:
+        backend.store_response(UUID, is_agent=role == "agent", response=content)
+    backend.store_chat_summary(UUID, SUMMARY)
+
+
+def test_session_data_round_trip(backend):
+    with pytest.raises(KeyError):
+        backend.get_data(UUID)
+    backend.save_data(UUID, DATA)
+    assert backend.get_data(UUID) == DATA
+    backend.save_data(UUID, {**DATA, "0": "male"})  # overwrites
+    assert backend.get_data(UUID)["0"] == "male"
+
+
+def test_chat_round_trip(backend):
+    assert backend.get_chat(UUID) == [{}]
+    fill(backend)
+    assert backend.get_chat(UUID) == [{role: content} for role, content in CONVO]
+    assert backend.get_chat("another") == [{}]
+
+
+def test_chat_summary_round_trip(backend):
+    assert backend.get_chat_summary(UUID) is None
+    backend.store_chat_summary(UUID, SUMMARY)
+    assert backend.get_chat_summary(UUID) == SUMMARY
+    backend.store_chat_summary(UUID, {**SUMMARY, "turns": 6})
+    assert backend.get_chat_summary(UUID)["turns"] == 6
+
+
+def test_audio_is_written_atomically(backend):
+    buffer = audio()
+    backend.save_audio(UUID, buffer)
+    path = backend.get_audio_path(UUID)
+    assert AudioBuffer.from_wav_bytes(open(path, "rb").read()).content_hash == buffer.content_hash
+    assert [p.name for p in backend.audio_dir.iterdir()] == [f"{UUID}.wav"]
+
+
+def test_sqlite_indexes_audio_metadata(tmp_path):
+    backend = sqlite(tmp_path)
+    buffer = audio()
+    backend.save_audio(UUID, buffer)
+    meta = backend.get_audio_metadata(UUID)
+    assert meta["path"] == backend.get_audio_path(UUID)
+    assert meta["num_frames"] == buffer.num_frames
+    assert meta["content_hash"] == buffer.content_hash
+    assert backend.get_audio_metadata("another") is None
+
+
+def run_migration(monkeypatch, root, *extra):
+    monkeypatch.setattr(sys, "argv", [
+        "migrate_storage.py", "--db", str(root / "storage.db"), "--responses_dir", str(root / "responses"),
+        "--convo_dir", str(root / "convo"), "--audio_dir", str(root / "audio"), *extra,
+    ])
+    migrate_storage.migrate()
+
+
+def test_migrate_filesystem_to_sqlite(tmp_path, monkeypatch, capsys):
+    source = filesystem(tmp_path)
+    fill(source)
+    source.save_data("other", {"0": "male"})
+    source.store_response("other", is_agent=False, response="only one")
+    buffer = audio()
+    source.save_audio(UUID, buffer)
+    (tmp_path / "responses" / "broken.json").write_text("{not json")
+    (tmp_path / "audio" / "recording.wav").write_bytes(b"\x1aE\xdf\xa3 webm, not wav")
+
+    run_migration(monkeypatch, tmp_path)
+    run_migration(monkeypatch, tmp_path)  # re-running replaces instead of duplicating
+    out = capsys.readouterr().out
+    assert "Imported 2 sessions, 4 messages from 2 conversations, 1 chat summaries and 1 audio files" in out
+    assert "Skipped" in out and "broken.json" in out and "recording.wav" in out
+
+    target = sqlite(tmp_path)
+    for uuid in (UUID, "other"):
+        assert target.get_data(uuid) == source.get_data(uuid)
+        assert target.get_chat(uuid) == source.get_chat(uuid)
+    assert target.get_chat_summary(UUID) == SUMMARY
+    assert target.get_chat_summary("other") is None
+    assert target.get_audio_metadata(UUID)["content_hash"] == buffer.content_hash
+    assert target.get_audio_metadata("recording") is None
@@ -0,0 +1,56 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+import torch
+
+from model.bert.bert import SpectrogramBERTClassifier
+from model.bert.data import SR
+from model.bert.streaming import StreamingSession, StreamTooLong
+
+
+@pytest.fixture(scope="module")
+def classifier():
+    torch.manual_seed(0)
+    model = SpectrogramBERTClassifier(n_mels=80, hidden_size=32, num_layers=1, num_heads=2, max_positions=128).eval()
+    return SimpleNamespace(model=model, frontend=None, n_mels=80, window_T=128, hop_T=64, device=torch.device("cpu"), batch_size=None)
+
+
+def pcm(seconds):
+    y = np.random.default_rng(0).standard_normal(int(SR * seconds)) * 0.1
+    return (y * 32767).astype(np.int16).tobytes()
+
+
+def test_chunk_past_max_seconds_is_rejected_and_dropped(classifier):
+    session = StreamingSession(classifier, "male", max_seconds=2)
+    session.feed(pcm(1.5))
+    with pytest.raises(StreamTooLong):
+        session.feed(pcm(1.0))
+    assert session.duration == pytest.approx(1.5)
+    session.feed(pcm(0.5))  # exactly at the limit is fine
+    pred, prob = session.finish()
+    assert 0.0 <= prob <= 1.0
+
+
+def test_unbounded_without_max_seconds(classifier):
+    session = StreamingSession(classifier, "female")
+    for _ in range(3):
+        session.feed(pcm(1.0))
+    assert session.duration == pytest.approx(3.0)
+
+
+@pytest.mark.parametrize("frontend", ["librosa", "torch"])
+def test_finish_matches_the_offline_result(make_classifier, frontend):
+    classifier = make_classifier(frontend=frontend)
+    audio = pcm(5.3)
+    session = StreamingSession(classifier, "female")
+    for start in range(0, len(audio), 7001):  # odd sizes split samples across chunks
+        session.feed(audio[start:start + 7001])
+    assert session.windows_scored > 0
+
+    y = np.frombuffer(audio, dtype=np.int16).astype(np.float32) / 32768.0
+    (offline_pred, offline_prob), = classifier.predict_batch([y], ["female"])
+    pred, prob = session.finish()
+    assert pred == offline_pred
+    assert prob == pytest.approx(offline_prob, abs=1e-5)
+    assert session.finish() == (pred, prob)
@@ -0,0 +1,25 @@
+import pytest
+
+from utils.text_sampler.text_sampler import SentencePool
+
+
+@pytest.fixture
+def pool():
+    sentences = {str(i): {"text": f"sentence {i}", "phonemes": f"p{i}"} for i in range(10)}
+    return SentencePool.from_json(sentences, separator= ". ")
+
+
+def test_same_seed_same_passage(pool):
+    assert pool.sample(4, seed= 7) == pool.sample(4, seed= 7)
+    assert pool.sample(4, seed= 2**70) == pool.sample(4, seed= 2**70)
+
+
+def test_sentences_are_not_repeated_until_the_pool_is_used_up(pool):
+    texts = pool.sample(10, seed= 1)["text"].split(". ")
+    assert sorted(texts) == sorted(pool.texts)
+
+
+def test_negative_seed_is_rejected_by_numpy(pool):
+    # /request_text answers 400 before a negative seed gets here
+    with pytest.raises(ValueError):
+        pool.sample(4, seed= -1)
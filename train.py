@@ -1,6 +1,9 @@
 import os
 from model.bert.bert import SpectrogramBERTClassifier
-from model.bert.data import TrainWindowDataset, FullClipDataset
+from model.bert.frontend import MelFrontend
+from model.bert.data import TrainWindowDataset, FullClipDataset, StoreTrainWindowDataset, StoreFullClipDataset, mel_params
+from model.bert.mel_cache import MelCache
+from model.bert.mel_store import MelStore
 # import torch
 # import torch.nn as nn
 # import torch.optim as optim
@@ -64,14 +67,34 @@ def train():
     parser.add_argument('--eta_min', type=float, default=1e-6, help='min LR for cosine annealing')
     parser.add_argument('--max_grad_norm', type=float, default=1.0, help='global grad norm clip')
     parser.add_argument('--warmup_start_factor', type=float, default=1e-3, help='initial LR multiplier for LinearLR warmup (>0, <=1)')
+    parser.add_argument('--mel_cache_dir', type=str, default=None, help='directory for the on-disk mel cache (disabled if unset)')
+    parser.add_argument('--mel_cache_max_mb', type=int, default=8192, help='size bound of the mel cache in MB')
+    parser.add_argument('--mel_cache_dtype', type=str, default='float32', choices=['float16', 'float32'])
+    parser.add_argument('--frontend', type=str, default='librosa', choices=['torch', 'librosa'], help='mel implementation used when decoding audio (torch matches librosa to ~3e-6, see tests/test_frontend.py)')
+    parser.add_argument('--mel_store', type=str, default=None, help='mel store written by precompute_mels.py; skips audio decoding entirely')
 
     args = parser.parse_args()
 
     df = pd.read_csv(args.data_csv)
     train_df, val_df = train_test_split(df, test_size=0.2, stratify=df.iloc[:, 0], random_state=42)
 
-    train_dataset = TrainWindowDataset(train_df, n_mels=args.n_mels, window_T=args.window_T)
-    val_dataset = FullClipDataset(val_df, n_mels=args.n_mels)
+    cache = None
+    if args.mel_cache_dir:
+        cache = MelCache(args.mel_cache_dir, max_bytes=args.mel_cache_max_mb * 1024**2, dtype=args.mel_cache_dtype)
+
+    frontend = MelFrontend(n_mels=args.n_mels) if args.frontend == 'torch' else None
+
+    if args.mel_store:
+        if args.mel_cache_dir:
+            parser.error("--mel_cache_dir has no effect with --mel_store, which already holds every mel")
+        store = MelStore(args.mel_store)
+        # the features served later must be the ones trained on, so --frontend has to match the store
+        store.check_params(mel_params(args.n_mels, frontend))
+        train_dataset = StoreTrainWindowDataset(train_df, store, window_T=args.window_T)
+        val_dataset = StoreFullClipDataset(val_df, store)
+    else:
+        train_dataset = TrainWindowDataset(train_df, n_mels=args.n_mels, window_T=args.window_T, cache=cache, frontend=frontend)
+        val_dataset = FullClipDataset(val_df, n_mels=args.n_mels, cache=cache, frontend=frontend)
 
     train_loader = DataLoader(train_dataset, batch_size=args.batch_size, shuffle=True)
     val_loader = DataLoader(val_dataset, batch_size=1, shuffle=False)
@@ -0,0 +1,126 @@
+import hashlib
+import io
+import wave
+from typing import Dict, Optional
+
+import numpy as np
+
+
+PCM_SAMPLE_RATE = 16000  # rate of headerless 16-bit mono uploads (see save_pcm_wav)
+
+
+class AudioBuffer:
+
+    """
+    One upload, decoded once and shared by every stage of the pipeline.
+
+    `samples` is a read-only int16 NumPy view straight into the uploaded bytes
+    (no copy) for WAV/PCM input. The float32 waveform, the WAV file bytes and
+    the content hash are derived lazily and cached, so storage, speech rate,
+    the mel cache and the classifier never reopen or re-decode the file.
+    `content_hash` is the sha256 of `wav_bytes()`, i.e. of the file that gets
+    persisted, so it matches MelCache's hash of the saved path.
+
+    Example:
+        audio = AudioBuffer.from_upload(request.files['audio_file'].read())
+        audio.duration, audio.sample_rate, audio.content_hash
+    """
+    def __init__(self, samples: np.ndarray, sample_rate: int, wav: Optional[bytes] = None):
+
+        self.samples = samples              # int16 [N] or [N, channels]
+        self.sample_rate = sample_rate
+        self._wav = wav                     # original file bytes when the upload already was a WAV
+        self._hash: Optional[str] = None
+        self._waveforms: Dict[int, np.ndarray] = {}
+
+    @classmethod
+    def from_upload(cls, raw: bytes) -> "AudioBuffer":
+
+        """WAV bytes, or headerless 16-bit mono PCM at PCM_SAMPLE_RATE (what the recorder sends)."""
+        if raw[:4] == b"RIFF" and raw[8:12] == b"WAVE":
+            return cls.from_wav_bytes(raw)
+        return cls.from_pcm(raw)
+
+    @classmethod
+    def from_pcm(cls, raw: bytes, sample_rate: int = PCM_SAMPLE_RATE) -> "AudioBuffer":
+
+        usable = len(raw) - len(raw) % 2
+        return cls(np.frombuffer(raw, dtype= np.int16, count= usable // 2), sample_rate)
+
+    @classmethod
+    def from_wav_bytes(cls, raw: bytes) -> "AudioBuffer":
+
+        try:
+            with wave.open(io.BytesIO(raw), "rb") as wf:
+                channels, width, rate, frames = wf.getnchannels(), wf.getsampwidth(), wf.getframerate(), wf.getnframes()
+        except (wave.Error, EOFError):
+            return cls._decode(raw)  # float/extensible WAV that the wave module can't parse
+        offset = _data_offset(raw)
+        if width != 2 or offset is None:
+            return cls._decode(raw)
+        available = (len(raw) - offset) // (2 * channels) * channels  # tolerate a header that overstates nframes
+        samples = np.frombuffer(raw, dtype= np.int16, count= min(frames * channels, available), offset= offset)
+        return cls(samples.reshape(-1, channels) if channels > 1 else samples, rate, wav= raw)
+
+    @classmethod
+    def _decode(cls, raw: bytes) -> "AudioBuffer":
+
+        import soundfile as sf
+        samples, rate = sf.read(io.BytesIO(raw), dtype= "int16")
+        return cls(samples, rate)
+
+    @property
+    def num_frames(self) -> int:
+
+        return self.samples.shape[0]
+
+    @property
+    def duration(self) -> float:
+
+        return self.num_frames / float(self.sample_rate)
+
+    @property
+    def content_hash(self) -> str:
+
+        if self._hash is None:
+            self._hash = hashlib.sha256(self.wav_bytes()).hexdigest()
+        return self._hash
+
+    def wav_bytes(self) -> bytes:
+
+        """The bytes persisted as <uuid>.wav; the upload itself when it already was a 16-bit WAV."""
+        if self._wav is None:
+            out = io.BytesIO()
+            with wave.open(out, "wb") as wf:
+                wf.setnchannels(1 if self.samples.ndim == 1 else self.samples.shape[1])
+                wf.setsampwidth(2)
+                wf.setframerate(self.sample_rate)
+                wf.writeframes(self.samples.tobytes())
+            self._wav = out.getvalue()
+        return self._wav
+
+    def waveform(self, sample_rate: Optional[int] = None) -> np.ndarray:
+
+        """Mono float32 in [-1, 1), resampled to `sample_rate` if given, like `librosa.load(path, sr=sample_rate)`."""
+        sample_rate = sample_rate or self.sample_rate
+        y = self._waveforms.get(sample_rate)
+        if y is None:
+            samples = self.samples if self.samples.ndim == 1 else self.samples.mean(axis= 1)
+            y = (samples.astype(np.float32) / 32768.0).astype(np.float32)
+            if sample_rate != self.sample_rate:
+                import librosa
+                y = librosa.resample(y, orig_sr= self.sample_rate, target_sr= sample_rate, res_type= "soxr_hq")
+            self._waveforms[sample_rate] = y
+        return y
+
+
+def _data_offset(raw: bytes) -> Optional[int]:
+
+    """Byte offset of the 'data' chunk payload in a RIFF/WAVE file."""
+    pos = 12
+    while pos + 8 <= len(raw):
+        chunk_id, size = raw[pos:pos + 4], int.from_bytes(raw[pos + 4:pos + 8], "little")
+        if chunk_id == b"data":
+            return pos + 8
+        pos += 8 + size + (size & 1)
+    return None
@@ -0,0 +1,135 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+
+class JobQueueFull(Exception):
+    """Raised by JobManager.submit when max_pending jobs are already queued or running."""
+
+
+class Job:
+
+    """
+    State of one background pipeline run.
+
+    Every `update` appends an event (the new status plus the fields that became
+    available) so that pollers see the merged `result` and event-stream readers
+    can replay everything they missed with `events_since`.
+    """
+    def __init__(self, job_id: str):
+
+        self.id = job_id
+        self.status = "queued"
+        self.result: Dict[str, Any] = {}
+        self.error: Optional[str] = None
+        self.events: List[Dict[str, Any]] = [{"status": "queued"}]
+        self.created = time.time()
+        self.updated = self.created
+        self._cond = threading.Condition()
+
+    @property
+    def finished(self) -> bool:
+
+        return self.status in ("done", "failed")
+
+    def update(self, status: str, **fields) -> None:
+
+        with self._cond:
+            self.status = status
+            self.result.update(fields)
+            self.events.append({"status": status, **fields})
+            self.updated = time.time()
+            self._cond.notify_all()
+
+    def fail(self, error: str) -> None:
+
+        with self._cond:
+            self.error = error
+        self.update("failed", error= error)
+
+    def snapshot(self) -> Dict[str, Any]:
+
+        with self._cond:
+            return {
+                "id": self.id,
+                "status": self.status,
+                "result": dict(self.result),
+                "error": self.error,
+                "created": self.created,
+                "updated": self.updated,
+            }
+
+    def events_since(self, index: int, timeout: float) -> List[Dict[str, Any]]:
+
+        """Events after the first `index`, waiting up to `timeout` seconds for one if there are none yet."""
+        with self._cond:
+            self._cond.wait_for(lambda: len(self.events) > index, timeout= timeout)
+            return self.events[index:]
+
+
+class JobManager:
+
+    """
+    Runs pipeline functions on a bounded thread pool and keeps their Job state.
+
+    `fn(job, *args)` reports intermediate results with `job.update(...)` and
+    returns the final fields; exceptions mark the job failed. Finished jobs are
+    dropped `ttl` seconds after their last update.
+
+    Example:
+        jobs = JobManager(max_workers= 2)
+        job = jobs.submit(str(uuid4()), run_assessment, request_id, data)
+        jobs.get(job.id).snapshot()
+    """
+    def __init__(self, max_workers: int = 2, max_pending: int = 64, ttl: float = 3600):
+
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers= max_workers, thread_name_prefix= "job")
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, job_id: str, fn: Callable[..., Dict[str, Any]], *args) -> Job:
+
+        with self._lock:
+            self._expire()
+            pending = sum(not job.finished for job in self._jobs.values())
+            if pending >= self.max_pending:
+                raise JobQueueFull(f"{pending} jobs already pending")
+            job = Job(job_id)
+            self._jobs[job_id] = job
+        self._executor.submit(self._run, job, fn, args)
+        return job
+
+    def pending(self) -> int:
+
+        """Jobs queued or running."""
+        with self._lock:
+            return sum(not job.finished for job in self._jobs.values())
+
+    def get(self, job_id: str) -> Optional[Job]:
+
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def shutdown(self) -> None:
+
+        self._executor.shutdown(wait= True)
+
+    def _run(self, job: Job, fn, args) -> None:
+
+        job.update("running")
+        try:
+            result = fn(job, *args) or {}
+        except Exception as e:
+            # werkzeug HTTPExceptions raised by abort() carry the client-facing message in .description
+            job.fail(getattr(e, "description", None) or repr(e))
+            return
+        job.update("done", **result)
+
+    def _expire(self) -> None:
+
+        now = time.time()
+        for job_id in [k for k, job in self._jobs.items() if job.finished and now - job.updated > self.ttl]:
+            del self._jobs[job_id]
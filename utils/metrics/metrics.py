@@ -0,0 +1,263 @@
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+
+load_dotenv(override= True)
+
+# METRICS=0 turns every observe/inc/set into an immediate return and /metrics into a 404
+ENABLED = os.environ.get("METRICS", "1") == "1"
+
+# seconds; from sub-millisecond stages (decode, storage appends) up to LLM calls
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+
+    value = float(value)
+    if not math.isfinite(value):  # spelled as the exposition format expects
+        return "NaN" if math.isnan(value) else ("+Inf" if value > 0 else "-Inf")
+    return repr(value) if value != int(value) else str(int(value))
+
+
+class Metric:
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def samples(self) -> List[str]: ...
+
+    def render(self) -> str:
+
+        return "\n".join([f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}", *self.samples()])
+
+
+class Counter(Metric):
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+
+        super().__init__(name, help, labels)
+        self._values: Dict[LabelValues, float] = {} if labels else {(): 0}  # unlabelled metrics report 0 from the start
+
+    def inc(self, amount: float = 1, **labels) -> None:
+
+        if not ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> List[str]:
+
+        with self._lock:
+            return [f"{self.name}{_labels(self.labelnames, k)} {_number(v)}" for k, v in sorted(self._values.items())]
+
+
+class Gauge(Metric):
+
+    """A value that goes up and down; `set_function` makes it read a callable at scrape time instead."""
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+
+        super().__init__(name, help, labels)
+        self._values: Dict[LabelValues, float] = {} if labels else {(): 0}  # unlabelled metrics report 0 from the start
+        self._functions: Dict[LabelValues, Callable[[], float]] = {}
+
+    def set(self, value: float, **labels) -> None:
+
+        if not ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+
+        if not ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track(self, **labels) -> Iterator[None]:
+
+        """+1 for the duration of the block."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def set_function(self, fn: Callable[[], float], **labels) -> None:
+
+        with self._lock:
+            self._functions[self._key(labels)] = fn
+
+    def samples(self) -> List[str]:
+
+        with self._lock:
+            values = dict(self._values)
+            functions = dict(self._functions)
+        for key, fn in functions.items():
+            try:
+                values[key] = fn()
+            except Exception:
+                continue  # a failing callback drops its sample rather than the scrape
+        return [f"{self.name}{_labels(self.labelnames, k)} {_number(v)}" for k, v in sorted(values.items())]
+
+
+class Histogram(Metric):
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelValues, List[float]] = {}  # per-bucket counts, then +Inf, then sum
+
+    def observe(self, value: float, **labels) -> None:
+
+        if not ENABLED:
+            return
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+
+        """Observe the wall-clock seconds spent in the block, also when it raises."""
+        if not ENABLED:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> List[str]:
+
+        with self._lock:
+            series = {k: list(v) for k, v in self._series.items()}
+        lines = []
+        for key, counts in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="%s"' % ("+Inf" if bound == float("inf") else _number(bound))
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(counts[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+
+    """
+    Process-wide set of metrics rendered in the Prometheus text exposition format.
+
+    Metrics are created with get-or-create semantics, so the modules that record
+    into the same metric (e.g. the pipeline stage histogram) can each declare it.
+
+    Example:
+        STAGE = histogram("pipeline_stage_seconds", "Time spent per stage", labels= ("stage",))
+        with STAGE.time(stage= "mel"):
+            ...
+        REGISTRY.render()
+    """
+    def __init__(self):
+
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def get_or_create(self, cls, name: str, help: str, **kwargs) -> Metric:
+
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"{name} is already registered as a {metric.kind}")
+            return metric
+
+    def render(self) -> str:
+
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(m.render() for m in metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, help: str, labels: Tuple[str, ...] = ()) -> Counter:
+
+    return REGISTRY.get_or_create(Counter, name, help, labels= labels)
+
+
+def gauge(name: str, help: str, labels: Tuple[str, ...] = ()) -> Gauge:
+
+    return REGISTRY.get_or_create(Gauge, name, help, labels= labels)
+
+
+def histogram(name: str, help: str, labels: Tuple[str, ...] = (), buckets: Optional[Tuple[float, ...]] = None) -> Histogram:
+
+    return REGISTRY.get_or_create(Histogram, name, help, labels= labels, buckets= buckets or DEFAULT_BUCKETS)
+
+
+# shared by every step of /upload and the chatbot, wherever it runs (request thread, job worker, audio writer)
+STAGE_SECONDS = histogram("pipeline_stage_seconds", "Seconds spent in each stage of the assessment and chatbot pipelines", labels= ("stage",))
+
+
+def stage(name: str):
+
+    """`with stage("mel"): ...` records the block into pipeline_stage_seconds."""
+    return STAGE_SECONDS.time(stage= name)
@@ -1,8 +1,9 @@
-def findStressIndex(sequence): #Find stress syllable in word starting from "start"
-	if(sequence == u'' or len(sequence) == 0):
-		return ''
-	#print(sequence)
-	consonants = [
+import collections
+import functools
+
+__all__ = ['findStressIndex', 'findStressIndices', 'unknownSymbols']
+
+consonants = [
 	"r", "g", "y","G",
 	"b", "z", "f","v",
 	"t", "s", "q","p",
@@ -12,7 +13,7 @@ def findStressIndex(sequence): #Find stress syllable in word starting from "star
 	"x", "T", "n",
 	"d", "Z", "h",
 	"*", "E", "w", "^"]
-	geminatedConsonants = [
+geminatedConsonants = [
 	"<<", "rr", "gg","vv",
 	"bb", "zz", "ff","GG",
 	"tt", "ss", "qq","pp",
@@ -20,85 +21,93 @@ def findStressIndex(sequence): #Find stress syllable in word starting from "star
 	"jj", "SS", "ll",
 	"HH", "DD", "mm",
 	"xx", "TT", "nn",
-	"dd", "ZZ", "hh", 
+	"dd", "ZZ", "hh",
 	"**", "EE", "ww", "^^"]
-	longVowels = ["aa", "AA",
+longVowels = ["aa", "AA",
 	"uu0","uu1",
 	"ii0","ii1",
 	"UU0", "UU1",
 	"II0", "II1"]
-	shortVowels = ["a", "A",
+shortVowels = ["a", "A",
 	"u0","u1",
 	"i0","i1",
 	"U0", "U1",
 	"I0", "I1"]
-	syllableString = ""
-	i = 0
-	while i < len(sequence):
-		if(sequence[i] in geminatedConsonants):
-			syllableString += "C"
-		elif(sequence[i] in consonants):
-			syllableString += "c"
-		elif(sequence[i] in longVowels):
-			syllableString += "V"
-		elif(sequence[i] in shortVowels):
-			syllableString += "v"
-		else:
-			#print('Unacceptable char when finding stress syllable: ' + sequence[i] +  ' ' + syllableString + '\n')
-			file = open("errors", "a")
-			file.write(sequence[i])
-			file.close()
-			return 0
-		i += 1
-	if(syllableString[0] in ['v', 'V']):
-		return -1
+
+#Phone -> syllable skeleton symbol: C geminated consonant, c consonant, V long vowel, v short vowel
+phoneClasses = {}
+for phones, symbol in ((shortVowels, "v"), (longVowels, "V"), (consonants, "c"), (geminatedConsonants, "C")):
+	phoneClasses.update(dict.fromkeys(phones, symbol))
+
+#Phones that have no skeleton symbol, with how often they were seen (they used to be appended to an "errors" file)
+unknownSymbols = collections.Counter()
+
+#Skeleton endings, tested with a single str.endswith call each
+superHeavy = ("cvvc", "cvcc", "cVcc", "Cvvc", "Cvcc", "CVcc")
+monosyllables = ("cvv", "cvc")
+heavy = ("cvv", "cvc", "Cvv", "Cvc", "cVc", "cVC", "CVc")
+openLong = ("cV", "CV")
+light = ("cV", "cv", "CV", "Cv")
+
+def dropLastSyllable(syllableString):
+	#A geminated consonant closes the previous syllable, so it leaves a single consonant behind
+	if(syllableString.endswith(("cvv", "cvc"))):
+		return syllableString[0:-3]
+	if(syllableString.endswith(("Cvv", "Cvc"))):
+		return syllableString[0:-3] + 'c'
+	if(syllableString.endswith(("cV", "cv"))):
+		return syllableString[0:-2]
+	if(syllableString.endswith(("CV", "Cv"))):
+		return syllableString[0:-2] + 'c'
+	return syllableString
+
+@functools.lru_cache(maxsize=4096)
+def stressOffset(syllableString): #Stress index relative to the end of the skeleton, -1 when the word starts with a vowel
+	if(syllableString[0] in 'vV'):
+		return None
 	#Stress falls on the last syllable if it is super heavy
-	if(syllableString.endswith("cVc") and syllableString.endswith("CVc")): 
-		return i - 2#3
-	if(syllableString.endswith("cvvc") or syllableString.endswith("cvcc") or syllableString.endswith("cVcc") or syllableString.endswith("Cvvc") or syllableString.endswith("Cvcc") or syllableString.endswith("CVcc")):
-		return i - 3#4
-	if(syllableString.endswith("cvvcc") and syllableString.endswith("Cvvcc")):
-		return i - 4#5
+	if(syllableString.endswith(superHeavy)):
+		return -3
 	#Stress is at the beginning if it is a monosyllabic word
-	if(syllableString == "cvv" or syllableString == "cvc"):
-		return i - 2#3
+	if(syllableString in monosyllables):
+		return -2
 	if(syllableString == "cV"):
-		return i - 1#2
+		return -1
 	#Remove last syllable if first two rules miss
-	if(syllableString.endswith("cvv") or syllableString.endswith("cvc")):
-		syllableString = syllableString[0:-3]
-		i = i - 3
-	elif(syllableString.endswith("Cvv") or syllableString.endswith("Cvc")):
-		syllableString = syllableString[0:-3]
-		syllableString += 'c'
-		i = i - 2
-	elif(syllableString.endswith("cV") or syllableString.endswith("cv")):
-		syllableString = syllableString[0:-2]
-		i = i - 2
-	elif(syllableString.endswith("CV") or syllableString.endswith("Cv")):
-		syllableString = syllableString[0:-2]
-		syllableString += 'c'
-		i = i - 1
+	remaining = dropLastSyllable(syllableString)
+	shift = len(remaining) - len(syllableString)
 	#Stress is at penultimate syllable if disyllabic word
-	if(syllableString == "cvv" or syllableString == "cvc"):
-		return i - 2#3
-	if(syllableString == "cV" or syllableString == "cv"):
-		return i - 1#2
+	if(remaining in monosyllables):
+		return shift - 2
+	if(remaining in ("cV", "cv")):
+		return shift - 1
 	#Stress is at penultimate syllable if it is heavy
-	if(syllableString.endswith("cvv") or syllableString.endswith("cvc") or syllableString.endswith("Cvv") or syllableString.endswith("Cvc") or syllableString.endswith("cVc") or syllableString.endswith("cVC") or syllableString.endswith("CVc")):
-		return i - 2#3
-	if(syllableString.endswith("cV") or syllableString.endswith("CV")):
-		return i - 1#2
-	if(syllableString.endswith("cv")):
-		i = i - 2
-		syllableString = syllableString[0:-2]
-	elif(syllableString.endswith("Cv")):
-		i = i - 1
-		syllableString = syllableString[0:-2]
-		syllableString += 'c'
+	if(remaining.endswith(heavy)):
+		return shift - 2
+	if(remaining.endswith(openLong)):
+		return shift - 1
+	if(remaining.endswith("cv")):
+		remaining = remaining[0:-2]
+	elif(remaining.endswith("Cv")):
+		remaining = remaining[0:-2] + 'c'
+	shift = len(remaining) - len(syllableString)
 	#Stress is at antepenultimate syllable otherwise
-	if(syllableString.endswith("cvv") or syllableString.endswith("cvc") or syllableString.endswith("Cvv") or syllableString.endswith("Cvc") or syllableString.endswith("cVc") or syllableString.endswith("cVC") or syllableString.endswith("CVc")):
-		return i - 2#3
-	if(syllableString.endswith("cV") or syllableString.endswith("cv") or syllableString.endswith("CV") or syllableString.endswith("Cv")):
-		return i - 1#2
-	return i + 1
\ No newline at end of file
+	if(remaining.endswith(heavy)):
+		return shift - 2
+	if(remaining.endswith(light)):
+		return shift - 1
+	return shift + 1
+
+def findStressIndex(sequence): #Find stress syllable in word starting from "start", -1 when there is none
+	if(len(sequence) == 0):
+		return -1
+	try:
+		syllableString = "".join([phoneClasses[phone] for phone in sequence])
+	except KeyError:
+		unknownSymbols.update(phone for phone in sequence if phone not in phoneClasses)
+		return 0
+	offset = stressOffset(syllableString)
+	return -1 if offset is None else len(sequence) + offset
+
+def findStressIndices(sequences): #findStressIndex of every pronunciation
+	return [findStressIndex(sequence) for sequence in sequences]
@@ -3,6 +3,8 @@
 
 import sys
 import codecs
+import functools
+import itertools
 import re
 import os
 from .findstress import *
@@ -35,23 +37,14 @@ ArabicScript = { #mapping from Buckwalter to Arabic script
 	u'u': u'\u064f' , u'i': u'\u0650' , u'~': u'\u0651' , u'o': u'\u0652'
 }
 
+toBuckwalterTable = str.maketrans(buckwalter)
+toArabicTable = str.maketrans(ArabicScript)
+
 def arabicToBuckwalter(word): #Convert input string to Buckwalter
-	res = u''
-	for letter in word:
-		if(letter in buckwalter):
-			res += buckwalter[letter]
-		else:
-			res += letter
-	return res
+	return word.translate(toBuckwalterTable)
 
 def buckwalterToArabic(word): #Convert input string to Arabic
-	res = u''
-	for letter in word:
-		if(letter in ArabicScript):
-			res += ArabicScript[letter]
-		else:
-			res += letter
-	return res
+	return word.translate(toArabicTable)
 
 #----------------------------------------------------------------------------
 #Grapheme to Phoneme mappings------------------------------------------------
@@ -94,6 +87,27 @@ emphatics = [u'D', u'S', u'T', u'Z', u'g', u'x', u'q']
 forwardEmphatics = [u'g', u'x']
 consonants = [u'>', u'<', u'}', u'&', u'\'', u'b', u't', u'^', u'j', u'H', u'x', u'd', u'*', u'r', u'z', u's', u'$', u'S', u'D', u'T', u'Z', u'E', u'g', u'f', u'q', u'k', u'l', u'm', u'n', u'h', u'|']
 
+#------------------------------------------------------------------------------------
+#Character classes used by the rules, built once---------------------------------------
+#------------------------------------------------------------------------------------
+CONSONANTS = frozenset(consonants)
+CONSONANTS_WY = CONSONANTS | {u'w', u'y'}
+CONSONANTS_E = CONSONANTS | {u'e'}
+CONSONANTS_UI = CONSONANTS | {u'u', u'i'}
+EMPHATICS = frozenset(emphatics)
+BACKWARD_EMPHATICS = EMPHATICS - frozenset(forwardEmphatics)
+DIACRITICS = frozenset(diacritics)
+DIACRITICS_AWY = DIACRITICS | {u'A', u'w', u'y'}
+DIACRITICS_NO_SHADDA = frozenset(diacriticsWithoutShadda)
+DIACRITICS_NO_SHADDA_AY = DIACRITICS_NO_SHADDA | {u'A', u'Y'}
+WAW_YA = frozenset([u'w', u'y'])
+DAMMA_KASRA = frozenset([u'u', u'i'])
+FATHA_ALIF = frozenset([u'a', u'A', u'Y'])
+LAM_PRECEDERS = frozenset([u'A', u'l', u'b'])
+LONG_VOWELS = frozenset([u'aa', u'uu0', u'ii0', u'AA', u'UU0', u'II0'])
+SHORT_VOWELS = frozenset([u'u0', u'i0'])
+SKIPPED_WORDS = frozenset([u'-', u'sil'])
+
 #------------------------------------------------------------------------------------
 #Words with fixed irregular pronunciations-------------------------------------------
 #------------------------------------------------------------------------------------
@@ -166,6 +180,8 @@ fixedWords = {
 	u'lndn': u'l A n d u1 n'
 }
 
+nonFixedLetters = re.compile(u'[^h*Ahn\'>wl}kmyTtfdb]')
+
 def isFixedWord(word, results, orthography, pronunciations):
 	lastLetter = ''
 	if(len(word) > 0):
@@ -180,7 +196,7 @@ def isFixedWord(word, results, orthography, pronunciations):
 		lastLetter = [u'i0']
 	elif(lastLetter in unambiguousConsonantMap):
 		lastLetter = [unambiguousConsonantMap[lastLetter]]
-	wordConsonants = re.sub(u'[^h*Ahn\'>wl}kmyTtfdb]', u'', word)  # Remove all dacritics from word
+	wordConsonants = nonFixedLetters.sub(u'', word)  # Remove all dacritics from word
 	if(wordConsonants in fixedWords):  # check if word is in the fixed word lookup table
 		if(isinstance(fixedWords[wordConsonants], list)):
 			done = False
@@ -197,242 +213,226 @@ def isFixedWord(word, results, orthography, pronunciations):
 			pronunciations.append(fixedWords[wordConsonants].split(u' '))
 	return results
 
-def phonetise(text):
-	utterances = text.splitlines()
-	result = u'' #Pronunciations Dictionary
+#------------------------------------------------------------------------------------
+#Utterance normalisation, applied in this order---------------------------------------
+#------------------------------------------------------------------------------------
+removedLetters = str.maketrans(u'', u'', u'ـo') #Tatweel and sukun
+expandedLetters = str.maketrans({u'F': u'an', u'N': u'un', u'K': u'in', u'|': u'>A'}) #Nunation and madda
+hamzaVowels = {u'i': u'<i', u'a': u'>a', u'u': u'>u'}
+
+normalisation = [
+	(re.compile(u'([^\\-]) A'), u'\\1 '),
+	expandedLetters,
+	#Deal with Hamza types that when not followed by a short vowel letter,
+	#this short vowel is added automatically
+	(re.compile(u'A([iau])'), lambda match: hamzaVowels[match.group(1)]),
+	(re.compile(u'^Al'), u'>al'),
+	(re.compile(u' - Al'), u' - >al'),
+	(re.compile(u'^- Al'), u'- >al'),
+	(re.compile(u'^>([^auAw])'), u'>a\\1'),
+	(re.compile(u' >([^auAw ])'), u' >a\\1'),
+	(re.compile(u'<([^i])'), u'<i\\1'),
+	(re.compile(u' A([^aui])'), u' \\1'),
+	(re.compile(u'^A([^aui])'), u'\\1'),
+]
+
+def normalise(utterance):
+	utterance = utterance.replace(u'AF', u'F')
+	utterance = utterance.translate(removedLetters)
+	utterance = utterance.replace(u'aA', u'A')
+	utterance = utterance.replace(u'aY', u'Y')
+	for step in normalisation:
+		if(isinstance(step, dict)):
+			utterance = utterance.translate(step)
+		else:
+			utterance = step[0].sub(step[1], utterance)
+	return utterance
+
+def wordPhones(word):
+	emphaticContext = False #Indicates whether current character is in an emphatic context or not. Starts with False
+	word = u'bb' + word + u'ee' #This is the end/beginning of word symbol. just for convenience
+
+	phones = [] #Empty list which will hold individual possible word's pronunciation
+
+	#-----------------------------------------------------------------------------------
+	#MAIN LOOP: here is where the Modern Standard Arabic phonetisation rule-set starts--
+	#-----------------------------------------------------------------------------------
+	for index in range(2, len(word) - 2):
+		letter = word[index] #Current Character
+		letter1 = word[index + 1] #Next Character
+		letter2 = word[index + 2] #Next-Next Character
+		letter_1 = word[index - 1] #Previous Character
+		letter_2 = word[index - 2] #Before Previous Character
+		#----------------------------------------------------------------------------------------------------------------
+		if(letter in CONSONANTS_WY and not letter in EMPHATICS): #non-emphatic consonants (Lam and Ra included) change emphasis back to False
+			emphaticContext = False
+		if(letter in EMPHATICS): #Emphatic consonants change emphasis context to True
+			emphaticContext = True
+		if(letter1 in BACKWARD_EMPHATICS): #If following letter is backward emphatic, emphasis state is set to True
+			emphaticContext = True
+		#----------------------------------------------------------------------------------------------------------------
+		if(letter in unambiguousConsonantMap): #Unambiguous consonant phones. These map to a predetermined phoneme
+			phones.append(unambiguousConsonantMap[letter])
+		#----------------------------------------------------------------------------------------------------------------
+		if(letter == u'l'): #Lam is a consonant which requires special treatment
+			if((not letter1 in DIACRITICS and not letter1 in vowelMap) and letter2 == u'~' and ((letter_1 in LAM_PRECEDERS) or (letter_1 in DIACRITICS and letter_2 in LAM_PRECEDERS))):#Lam could be omitted in definite article (sun letters)
+				phones.append(ambiguousConsonantMap[u'l'][1]) #omit
+			else:
+				phones.append(ambiguousConsonantMap[u'l'][0]) #do not omit
+		#----------------------------------------------------------------------------------------------------------------
+		if(letter == u'~' and not letter_1 in WAW_YA and len(phones) > 0):#shadda just doubles the letter before it
+			phones[-1] = phones[-1] + phones[-1] #a new object, the maps may be shared
+		#----------------------------------------------------------------------------------------------------------------
+		if(letter == u'|'): #Madda only changes based in emphaticness
+			phones.append(maddaMap[u'|'][1] if emphaticContext else maddaMap[u'|'][0])
+		#----------------------------------------------------------------------------------------------------------------
+		if(letter == u'p'): #Ta' marboota is determined by the following if it is a diacritic or not
+			phones.append(ambiguousConsonantMap[u'p'][0] if letter1 in DIACRITICS else ambiguousConsonantMap[u'p'][1])
+		#----------------------------------------------------------------------------------------------------------------
+		if(letter in vowelMap):
+			forms = vowelMap[letter][1] if emphaticContext else vowelMap[letter][0]
+			if(letter in WAW_YA): #Waw and Ya are complex they could be consonants or vowels and their gemination is complex as it could be a combination of a vowel and consonants
+				if(letter1 in DIACRITICS_NO_SHADDA_AY or (letter1 in WAW_YA and not letter2 in DIACRITICS_AWY) or (letter_1 in DIACRITICS_NO_SHADDA and letter1 in CONSONANTS_E)):
+					if((letter == u'w' and letter_1 == u'u' and not letter1 in FATHA_ALIF and letter1 != u'i') or (letter == u'y' and letter_1 == u'i' and not letter1 in FATHA_ALIF and letter1 != u'u')):
+						phones.append(forms[0])
+					else:
+						if(letter1 == u'A' and letter == u'w' and letter2 == u'e'):
+							phones.append([vowelMap[letter][0][0], ambiguousConsonantMap[letter]])
+						else:
+							phones.append(ambiguousConsonantMap[letter])
+				elif(letter1 == u'~'):
+					if(letter_1 == u'a' or (letter == u'w' and letter_1 in (u'i', u'y')) or (letter == u'y' and letter_1 in (u'w', u'u'))):
+						phones += [ambiguousConsonantMap[letter], ambiguousConsonantMap[letter]]
+					else:
+						phones += [vowelMap[letter][0][0], ambiguousConsonantMap[letter]]
+				else: #Waws and Ya's at the end of the word could be shortened
+					if(letter_1 in CONSONANTS_UI and letter1 == u'e'):
+						phones.append([forms[0], forms[0][1:]])
+					else:
+						phones.append(forms[0])
+			if(letter in DAMMA_KASRA): #Kasra and Damma could be mildened if before a final silent consonant
+				if((letter1 in unambiguousConsonantMap or letter1 == u'l') and letter2 == u'e' and len(word) > 7):
+					phones.append(forms[1])
+				else:
+					phones.append(forms[0])
+			if(letter in FATHA_ALIF): #Alif could be ommited in definite article and beginning of some words
+				if(letter == u'A' and letter_1 in (u'w', u'k') and letter_2 == u'b' and letter1 == u'l'):
+					phones.append([u'a', vowelMap[letter][0][0]])
+				elif(letter == u'A' and letter_1 in DAMMA_KASRA):
+					pass #do nothing
+				elif(letter == u'A' and letter_1 == u'w' and letter1 == u'e'): #Waw al jama3a: The Alif after is optional
+					phones.append([vowelMap[letter][0][1], vowelMap[letter][0][0]])
+				elif(letter in (u'A', u'Y') and letter1 == u'e'):
+					phones.append([forms[0], vowelMap[u'a'][1] if emphaticContext else vowelMap[u'a'][0]])
+				else:
+					phones.append(forms[0])
+	return phones
+
+def cleanPronunciation(pronunciation):
+	# 1- Remove duplicate vowels
+	# 2- Remove duplicate y and w
+	prevLetter = u''
+	toDelete = []
+	for i in range(0, len(pronunciation)):
+		letter = pronunciation[i]
+		if(letter in LONG_VOWELS and prevLetter.lower() == letter[1:].lower()):#Delete duplicate consecutive vowels
+			toDelete.append(i - 1)
+			pronunciation[i] = pronunciation[i - 1][0] + pronunciation[i - 1]
+		if(letter in SHORT_VOWELS and prevLetter.lower() == letter.lower()):#Delete duplicates
+			toDelete.append(i - 1)
+			pronunciation[i] = pronunciation[i - 1]
+		if(letter in WAW_YA and prevLetter == letter):#delete duplicate
+			pronunciation[i - 1] += pronunciation[i - 1]
+			toDelete.append(i)
+		if(letter == u'a' and prevLetter == letter):#delete duplicate
+			toDelete.append(i)
+
+		prevLetter = letter
+	for i in reversed(range(0, len(toDelete))):
+		del(pronunciation[toDelete[i]])
+	return pronunciation
+
+def iterPronunciations(phones):
+	#Yields the possible pronunciations of a word lazily, most likely first: every ambiguous
+	#slot starts with its preferred alternative and the first slot varies fastest
+	slots = [letter if isinstance(letter, list) else [letter] for letter in phones]
+	for combination in itertools.product(*reversed(slots)):
+		yield [letter for letter in reversed(combination) if letter != u'']
+
+def checkTopk(topk): #Every word needs at least one pronunciation
+	if(topk is not None and (isinstance(topk, bool) or not isinstance(topk, int) or topk < 1)):
+		raise ValueError(u'topk must be None or an integer >= 1, got %r' % (topk,))
+
+def phonetise(text, topk=None): #One utterance per line. Returns (pronunciations with word boundaries, pronunciations, dictionary)
+	#topk keeps only the k most likely pronunciations of each word (fixed ones first); None keeps all
+	checkTopk(topk)
 	utterancesPronuncations = [] #Most likely pronunciation for all utterances
 	utterancesPronuncationsWithBoundaries = [] #Most likely pronunciation for all utterances
+	result = [] #Pronunciations Dictionary lines
 
 	#-----------------------------------------------------------------------------------------------------
 	#Loop through utterances------------------------------------------------------------------------------
 	#-----------------------------------------------------------------------------------------------------
-	utteranceNumber = 1
-	for utterance in utterances:
-		utteranceNumber += 1
-		utterancesPronuncations.append('') # Add empty entry that will hold this utterance's pronuncation
-		utterancesPronuncationsWithBoundaries.append('') # Add empty entry that will hold this utterance's pronuncation
-
-		utterance = arabicToBuckwalter(utterance)
-		return utterance
-		print(utterance)
+	for utterance in text.splitlines():
+		plain = []
+		withBoundaries = []
+
+		#Drop standalone punctuation and extra spaces, so the utterance-initial rules see the first real word
+		words = [word for word in arabicToBuckwalter(utterance).split(u' ') if word in SKIPPED_WORDS or any(c in ArabicScript for c in word)]
+
 		#Do some normalisation work and split utterance to words
-		utterance = utterance.replace(u'AF', u'F')
-		utterance = utterance.replace(u'\u0640', u'')
-		utterance = utterance.replace(u'o', u'')
-		utterance = utterance.replace(u'aA', u'A')
-		utterance = utterance.replace(u'aY', u'Y')
-		utterance = re.sub(u'([^\\-]) A', u'\\1 ', utterance)
-		utterance = utterance.replace(u'F', u'an')
-		utterance = utterance.replace(u'N', u'un')
-		utterance = utterance.replace(u'K', u'in')
-		utterance = utterance.replace(u'|', u'>A')
-		
-		#Deal with Hamza types that when not followed by a short vowel letter,
-		#this short vowel is added automatically
-		utterance = re.sub(u'^Ai', u'<i', utterance)
-		utterance = re.sub(u'^Aa', u'>a', utterance)
-		utterance = re.sub(u'^Au', u'>u', utterance)
-		utterance = re.sub(u'Ai', u'<i', utterance)
-		utterance = re.sub(u'Aa', u'>a', utterance)
-		utterance = re.sub(u'Au', u'>u', utterance)
-		utterance = re.sub(u'^Al', u'>al', utterance)
-		utterance = re.sub(u' - Al', u' - >al', utterance)
-		utterance = re.sub(u'^- Al', u'- >al', utterance)
-		utterance = re.sub(u'^>([^auAw])', u'>a\\1', utterance)
-		utterance = re.sub(u' >([^auAw ])', u' >a\\1', utterance)
-		utterance = re.sub(u'<([^i])', u'<i\\1', utterance)
-		utterance = re.sub(u' A([^aui])', u' \\1', utterance)
-		utterance = re.sub(u'^A([^aui])', u'\\1', utterance)
-		
-		utterance = utterance.split(u' ')
-		#---------------------------
-		wordIndex = -1
-		
+		utterance = normalise(u' '.join(words))
+
 		#Loop through words
-		for word in utterance:
-			wordIndex += 1
-			if(not word in [u'-', u'sil']):
-				pronunciations = [] #Start with empty set of possible pronunciations of current word
-				result = isFixedWord(word, result, word, pronunciations) #Add fixed irregular pronunciations if possible
-
-				emphaticContext = False #Indicates whether current character is in an emphatic context or not. Starts with False
-				word = u'bb' + word + u'ee' #This is the end/beginning of word symbol. just for convenience
-
-				phones = [] #Empty list which will hold individual possible word's pronunciation
-
-				#-----------------------------------------------------------------------------------
-				#MAIN LOOP: here is where the Modern Standard Arabic phonetisation rule-set starts--
-				#-----------------------------------------------------------------------------------
-				for index in range(2, len(word) - 2):
-					letter = word[index] #Current Character
-					letter1 = word[index + 1] #Next Character
-					letter2 = word[index + 2] #Next-Next Character
-					letter_1 = word[index - 1] #Previous Character
-					letter_2 = word[index - 2] #Before Previous Character
-					#----------------------------------------------------------------------------------------------------------------
-					if(letter in consonants + [u'w', u'y'] and not letter in emphatics + [u'r'""", u'l'"""]): #non-emphatic consonants (except for Lam and Ra) change emphasis back to False
-						emphaticContext = False
-					if(letter in emphatics): #Emphatic consonants change emphasis context to True
-						emphaticContext = True
-					if(letter1 in emphatics and not letter1 in forwardEmphatics): #If following letter is backward emphatic, emphasis state is set to True
-						emphaticContext = True
-					#----------------------------------------------------------------------------------------------------------------
-					#----------------------------------------------------------------------------------------------------------------
-					if(letter in unambiguousConsonantMap): #Unambiguous consonant phones. These map to a predetermined phoneme
-						phones += [unambiguousConsonantMap[letter]]
-					#----------------------------------------------------------------------------------------------------------------
-					if(letter == u'l'): #Lam is a consonant which requires special treatment
-						if((not letter1 in diacritics and not letter1 in vowelMap) and letter2 in [u'~'] and ((letter_1 in [u'A', u'l', u'b']) or (letter_1 in diacritics and letter_2 in [u'A', u'l', u'b']))):#Lam could be omitted in definite article (sun letters)
-							phones += [ambiguousConsonantMap[u'l'][1]] #omit
-						else:
-							phones += [ambiguousConsonantMap[u'l'][0]] #do not omit
-					#----------------------------------------------------------------------------------------------------------------
-					if(letter == u'~' and not letter_1 in [u'w', u'y'] and len(phones) > 0):#shadda just doubles the letter before it 
-						phones[-1] += phones[-1]
-					#----------------------------------------------------------------------------------------------------------------
-					if(letter == u'|'): #Madda only changes based in emphaticness
-						if(emphaticContext):
-							phones += [maddaMap[u'|'][1]]
-						else:
-							phones += [maddaMap[u'|'][0]]
-					#----------------------------------------------------------------------------------------------------------------
-					if(letter == u'p'): #Ta' marboota is determined by the following if it is a diacritic or not
-						if(letter1 in diacritics):
-							phones += [ambiguousConsonantMap[u'p'][0]]
-						else:
-							phones += [ambiguousConsonantMap[u'p'][1]]
-					#----------------------------------------------------------------------------------------------------------------
-					if(letter in vowelMap):
-						if(letter in [u'w', u'y']): #Waw and Ya are complex they could be consonants or vowels and their gemination is complex as it could be a combination of a vowel and consonants
-							if(letter1 in diacriticsWithoutShadda + [u'A', u'Y'] or (letter1 in [u'w', u'y'] and not letter2 in diacritics + [u'A', u'w', u'y']) or (letter_1 in diacriticsWithoutShadda and letter1 in consonants + [u'e'])):
-								if((letter in [u'w'] and letter_1 in [u'u'] and not letter1 in [u'a', u'i', u'A', u'Y']) or (letter in [u'y'] and letter_1 in [u'i'] and not letter1 in [u'a', u'u', u'A', u'Y'])):
-									if(emphaticContext):
-										phones += [vowelMap[letter][1][0]]
-									else:
-										phones += [vowelMap[letter][0][0]]
-								else:
-									if(letter1 in [u'A'] and letter in [u'w'] and letter2 in [u'e']):
-										phones += [[vowelMap[letter][0][0], ambiguousConsonantMap[letter]]]
-									else:
-										phones += [ambiguousConsonantMap[letter]]
-							elif(letter1 in [u'~']):
-								if(letter_1 in [u'a'] or (letter in [u'w'] and letter_1 in [u'i', u'y']) or (letter in [u'y'] and letter_1 in [u'w', u'u'])):
-									phones += [ambiguousConsonantMap[letter], ambiguousConsonantMap[letter]]
-								else:
-									phones += [vowelMap[letter][0][0], ambiguousConsonantMap[letter]]
-							else: #Waws and Ya's at the end of the word could be shortened
-								if(emphaticContext):
-									if(letter_1 in consonants + [u'u', u'i'] and letter1 in [u'e']):
-										phones += [[vowelMap[letter][1][0], vowelMap[letter][1][0][1:]]]
-									else:
-										phones += [vowelMap[letter][1][0]]
-								else:
-									if(letter_1 in consonants + [u'u', u'i'] and letter1 in [u'e']):
-										phones += [[vowelMap[letter][0][0], vowelMap[letter][0][0][1:]]]
-									else:
-										phones += [vowelMap[letter][0][0]]
-						if(letter in [u'u', u'i']): #Kasra and Damma could be mildened if before a final silent consonant
-							if(emphaticContext):
-								if((letter1 in unambiguousConsonantMap or letter1 == u'l') and letter2 == u'e' and len(word) > 7):
-									phones += [vowelMap[letter][1][1]]
-								else:
-									phones += [vowelMap[letter][1][0]]
-							else:
-								if((letter1 in unambiguousConsonantMap or letter1 == u'l') and letter2 == u'e' and len(word) > 7):
-									phones += [vowelMap[letter][0][1]]
-								else:
-									phones += [vowelMap[letter][0][0]]
-						if(letter in [u'a', u'A', u'Y']): #Alif could be ommited in definite article and beginning of some words
-							if(letter in [u'A'] and letter_1 in [u'w', u'k'] and letter_2 == u'b' and letter1 in [u'l']):
-								phones += [[u'a', vowelMap[letter][0][0]]]
-							elif(letter in [u'A'] and letter_1 in [u'u', u'i']):
-								temp = True #do nothing
-							elif(letter in [u'A'] and letter_1 in [u'w'] and letter1 in [u'e']): #Waw al jama3a: The Alif after is optional
-								phones += [[vowelMap[letter][0][1], vowelMap[letter][0][0]]]
-							elif(letter in [u'A', u'Y'] and letter1 in [u'e']):
-								if(emphaticContext):
-									phones += [[vowelMap[letter][1][0], vowelMap[u'a'][1]]]
-								else:
-									phones += [[vowelMap[letter][0][0], vowelMap[u'a'][0]]]
-							else:
-								if(emphaticContext):
-									phones += [vowelMap[letter][1][0]]
-								else:
-									phones += [vowelMap[letter][0][0]]
-				#-------------------------------------------------------------------------------------------------------------------------
-				#End of main loop---------------------------------------------------------------------------------------------------------
-				#-------------------------------------------------------------------------------------------------------------------------
-				possibilities = 1 #Holds the number of possible pronunciations of a word
-
-				#count the number of possible pronunciations
-				for letter in phones:
-					if(isinstance(letter, list)):
-						possibilities = possibilities * len(letter)
-			
-				#Generate all possible pronunciations
-				for i in range(0, possibilities):
-					pronunciations.append([])
-					iterations = 1
-					for index, letter in enumerate(phones):
-						if(isinstance(letter, list)):
-							curIndex = int((i / iterations) % len(letter))
-							if(letter[curIndex] != u''):
-								pronunciations[-1].append(letter[curIndex])
-							iterations = iterations * len(letter)
-						else:
-							if(letter != u''):
-								pronunciations[-1].append(letter)
-					
-				#Iterate through each pronunciation to perform some house keeping. And append pronunciation to dictionary
-				# 1- Remove duplicate vowels
-				# 2- Remove duplicate y and w
-				for pronunciation in pronunciations:
-					prevLetter = u''
-					toDelete = []
-					for i in range(0, len(pronunciation)):
-						letter = pronunciation[i]
-						if(letter in [u'aa', u'uu0', u'ii0', u'AA', u'UU0', u'II0'] and prevLetter.lower() == letter[1:].lower()):#Delete duplicate consecutive vowels
-							toDelete.append(i - 1)
-							pronunciation[i] = pronunciation[i - 1][0] + pronunciation[i - 1]
-						if(letter in [u'u0', u'i0'] and prevLetter.lower() == letter.lower()):#Delete duplicates
-							toDelete.append(i - 1)
-							pronunciation[i] = pronunciation[i - 1]
-						if(letter in [u'y', u'w'] and prevLetter == letter):#delete duplicate
-							pronunciation[i - 1] += pronunciation[i - 1]
-							toDelete.append(i);
-						if(letter in [u'a'] and prevLetter == letter):#delete duplicate
-							toDelete.append(i);
-						
-						prevLetter = letter
-					for i in reversed(range(0, len(toDelete))):
-						del(pronunciation[toDelete[i]])
-					result += word[2:-2] + u' ' + u' '.join(pronunciation) + u'\n'
-
-				#Append utterance pronunciation to utterancesPronunciations
-				utterancesPronuncations[-1] += u" " + u" ".join(pronunciations[0])
-
-				#Add Stress to each pronunciation
-				pIndex = 0
-				for pronunciation in pronunciations:
-					stressIndex = findStressIndex(pronunciation)
-					if(stressIndex < len(pronunciation) and stressIndex != -1):
-						pronunciation[stressIndex] += u'\''
-					else:
-						if(pIndex == 0):
-							pass
-							#print (pronunciation)
-					pIndex += 1
-				#Append utterance pronunciation to utterancesPronunciations
-				utterancesPronuncationsWithBoundaries[-1] += u" " + u"".join(pronunciations[0])
-			else:
-				utterancesPronuncations[-1] += u" sil"
-				utterancesPronuncationsWithBoundaries[-1] += u" sil"
-		
-		#Add sound file name back
-		utterancesPronuncations[-1] = utterancesPronuncations[-1].strip() + u" sil"
-		utterancesPronuncationsWithBoundaries[-1] = utterancesPronuncationsWithBoundaries[-1].strip() + u" sil"
-
-	return (utterancesPronuncationsWithBoundaries, utterancesPronuncations, result)
+		for word in utterance.split(u' '):
+			if(word == u''): #Left behind by a normalisation rule that deletes a whole word
+				continue
+			if(word in SKIPPED_WORDS):
+				plain.append(u'sil')
+				withBoundaries.append(u'sil')
+				continue
+
+			pronunciations = [] #Start with empty set of possible pronunciations of current word
+			result.append(isFixedWord(word, u'', word, pronunciations)) #Add fixed irregular pronunciations if possible
+
+			#Only the pronunciations taken here are generated, cleaned and stressed
+			pronunciations = list(itertools.islice(itertools.chain(pronunciations, iterPronunciations(wordPhones(word))), topk))
+
+			#Iterate through each pronunciation to perform some house keeping. And append pronunciation to dictionary
+			for pronunciation in pronunciations:
+				cleanPronunciation(pronunciation)
+			#Punctuation and other symbols have no phones, so there is nothing to pronounce
+			pronunciations = [pronunciation for pronunciation in pronunciations if pronunciation]
+			if(not pronunciations):
+				continue
+			for pronunciation in pronunciations:
+				result.append(word + u' ' + u' '.join(pronunciation) + u'\n')
+
+			#Append utterance pronunciation to utterancesPronunciations
+			plain.append(u" ".join(pronunciations[0]))
+
+			#Add Stress to each pronunciation
+			for pronunciation, stressIndex in zip(pronunciations, findStressIndices(pronunciations)):
+				if(stressIndex < len(pronunciation) and stressIndex != -1):
+					pronunciation[stressIndex] += u'\''
+			#Append utterance pronunciation to utterancesPronunciations
+			withBoundaries.append(u"".join(pronunciations[0]))
+
+		utterancesPronuncations.append((u" ".join(plain).strip() + u" sil").lstrip())
+		utterancesPronuncationsWithBoundaries.append((u" ".join(withBoundaries).strip() + u" sil").lstrip())
+
+	return (utterancesPronuncationsWithBoundaries, utterancesPronuncations, u''.join(result))
+
+def phonetise_batch(texts, processes=None, chunksize=64, topk=None): #phonetise() of every text, in order
+	#The rules are pure Python, so large batches are spread over processes rather than threads
+	checkTopk(topk)
+	texts = list(texts)
+	if(not processes or processes <= 1 or len(texts) < 2 * chunksize):
+		return [phonetise(text, topk) for text in texts]
+	from concurrent.futures import ProcessPoolExecutor
+	with ProcessPoolExecutor(max_workers=processes) as pool:
+		return list(pool.map(functools.partial(phonetise, topk=topk), texts, chunksize=chunksize))
+
 #-----------------------------------------------------------------------------------------------------
 #Read input file--------------------------------------------------------------------------------------
 #-----------------------------------------------------------------------------------------------------
@@ -1,14 +1,26 @@
-from phonemizer import phonemize
 from enum import Enum
+import ctypes.util
 import json
 import os
+import sys
+import threading
+from collections import OrderedDict
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 from dotenv import load_dotenv
-from phonemizer.backend.espeak.wrapper import EspeakWrapper
-from .arabic_phonetiser.phonetise_arabic import phonetise
+from .arabic_phonetiser.phonetise_arabic import arabicToBuckwalter
 
 
-EspeakWrapper.set_library('C:\Program Files\eSpeak NG\libespeak-ng.dll')
+load_dotenv(override= True)
+PHONEME_CACHE_SIZE = int(os.environ.get("PHONEME_CACHE_SIZE", 4096))
+
+# tried in order when ESPEAK_LIBRARY is unset and the system loader does not know espeak
+ESPEAK_CANDIDATES = {
+    "win32": [r"C:\Program Files\eSpeak NG\libespeak-ng.dll", r"C:\Program Files (x86)\eSpeak NG\libespeak-ng.dll"],
+    "darwin": ["/opt/homebrew/lib/libespeak-ng.dylib", "/usr/local/lib/libespeak-ng.dylib", "/opt/local/lib/libespeak-ng.dylib"],
+    "linux": ["/usr/lib/x86_64-linux-gnu/libespeak-ng.so.1", "/usr/lib/aarch64-linux-gnu/libespeak-ng.so.1",
+              "/usr/lib/libespeak-ng.so.1", "/usr/local/lib/libespeak-ng.so.1", "/usr/lib64/libespeak-ng.so.1"],
+}
 
 
 
@@ -17,16 +29,151 @@ class Language(str, Enum):
     english = "en-us"
     arabic = "ar"
 
+
+def find_espeak_library() -> Optional[str]:
+
+    """
+    Path of the espeak-ng shared library: ESPEAK_LIBRARY if set, else whatever the
+    system loader finds, else the usual install locations of this platform.
+    None lets phonemizer apply its own lookup (which also honours PHONEMIZER_ESPEAK_LIBRARY).
+    """
+    configured = os.environ.get("ESPEAK_LIBRARY")
+    if configured:
+        if not Path(configured).is_file():
+            raise FileNotFoundError(f"ESPEAK_LIBRARY={configured} is not a file")
+        return configured
+
+    if os.environ.get("PHONEMIZER_ESPEAK_LIBRARY"):
+        return None
+
+    found = ctypes.util.find_library("espeak-ng") or ctypes.util.find_library("espeak")
+    if found:
+        return found
+
+    platform = "linux" if sys.platform.startswith("linux") else sys.platform
+    return next((path for path in ESPEAK_CANDIDATES.get(platform, []) if Path(path).is_file()), None)
+
+
+def normalize(text: str) -> str:
+
+    # espeak reads each list item as one utterance, so line breaks would split it
+    return " ".join(text.split())
+
+
+class Phonemizer:
+
+    """
+    Long-lived espeak phonemizer with batching and an LRU cache.
+
+    One espeak backend is created per espeak language on first use and reused,
+    instead of `phonemize()` starting a fresh backend on every call. `phonemize`
+    takes a list of texts and sends all cache misses to espeak in one call. Results
+    are cached by (language, whitespace-normalized text), keeping `cache_size`
+    entries. espeak keeps global state, so each backend is used under its own lock.
+
+    Example:
+        phonemizer = get_phonemizer()
+        phonemizer.phonemize(["The north wind", "and the sun"], Language.english)
+    """
+    def __init__(self, cache_size: int = PHONEME_CACHE_SIZE):
+
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self._cache: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._backends: Dict[str, Tuple[object, threading.Lock]] = {}
+        self._backends_lock = threading.Lock()
+
+    def _backend(self, espeak_language: str):
+
+        with self._backends_lock:
+            if espeak_language not in self._backends:
+                from phonemizer.backend import EspeakBackend
+                from phonemizer.backend.espeak.wrapper import EspeakWrapper
+
+                if not self._backends:
+                    library = find_espeak_library()
+                    if library is not None:
+                        EspeakWrapper.set_library(library)
+                self._backends[espeak_language] = (EspeakBackend(espeak_language), threading.Lock())
+            return self._backends[espeak_language]
+
+    def _espeak(self, texts: List[str], espeak_language: str) -> List[str]:
+
+        from phonemizer.separator import Separator
+
+        backend, lock = self._backend(espeak_language)
+        with lock:
+            # same separators as phonemize()'s default: words split by spaces, phones joined
+            return backend.phonemize(texts, separator= Separator(phone= "", syllable= "", word= " "), strip= True)
+
+    def phonemize(self, texts: List[str], language: Language) -> List[str]:
+
+        keys = [(language.value, normalize(text)) for text in texts]
+        results: Dict[Tuple[str, str], str] = {}
+        with self._cache_lock:
+            for key in keys:
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    results[key] = self._cache[key]
+            self.hits += sum(key in results for key in keys)
+            self.misses += sum(key not in results for key in keys)
+
+        # espeak drops empty utterances, so they never reach it
+        missing = [key for key in dict.fromkeys(keys) if key not in results and key[1]]
+        for key in dict.fromkeys(keys):
+            if not key[1]:
+                results[key] = ""
+
+        if missing:
+            if language == Language.arabic:
+                # Arabic is transliterated to Buckwalter and read by the English voice
+                phonemes = self._espeak([arabicToBuckwalter(text) for _, text in missing], Language.english.value)
+            else:
+                phonemes = self._espeak([text for _, text in missing], language.value)
+            if len(phonemes) != len(missing):
+                raise RuntimeError(f"espeak returned {len(phonemes)} results for {len(missing)} texts")
+
+            with self._cache_lock:
+                for key, value in zip(missing, phonemes):
+                    results[key] = value
+                    self._cache[key] = value
+                    self._cache.move_to_end(key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last= False)
+
+        return [results[key] for key in keys]
+
+    def stats(self) -> Dict[str, int]:
+
+        with self._cache_lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._cache), "backends": len(self._backends)}
+
+
+_phonemizer = None
+_phonemizer_lock = threading.Lock()
+
+
+def get_phonemizer() -> Phonemizer:
+
+    """The process-wide Phonemizer; espeak itself is loaded on the first cache miss."""
+    global _phonemizer
+    with _phonemizer_lock:
+        if _phonemizer is None:
+            _phonemizer = Phonemizer()
+    return _phonemizer
+
+
 def get_phonemes(text : str , language : Language):
 
-    if language.value == "ar":
+    return get_phonemizer().phonemize([text], language)[0]
 
-        return phonemize(phonetise(text), language= "en-us", backend='espeak', strip=True)
 
+def get_phonemes_batch(texts : List[str], language : Language) -> List[str]:
+
+    return get_phonemizer().phonemize(texts, language)
 
-    else:
-        return phonemize(text, language= language.value, backend='espeak', strip=True)
-    
 
 if __name__ == "__main__":
 
@@ -37,12 +184,11 @@ if __name__ == "__main__":
     english_sentences = text_json.get("english_sentences")
     arabic_sentences = text_json.get("arabic_sentences")
 
-    for k, v in english_sentences.items():
-        english_sentences[k] = {"text": v, "phonemes": get_phonemes(v, language= Language.english)}
-    
-    for k, v in arabic_sentences.items():
-        arabic_sentences[k] = {"text": v, "phonemes": get_phonemes(v, language= Language.arabic)}
-    
+    for sentences, language in ((english_sentences, Language.english), (arabic_sentences, Language.arabic)):
+        phonemes = get_phonemes_batch(list(sentences.values()), language= language)
+        for (k, v), p in zip(list(sentences.items()), phonemes):
+            sentences[k] = {"text": v, "phonemes": p}
+
     print(text_json)
     TEXT_FOLDER.write_text(json.dumps(text_json, indent= 4))
 
@@ -1,8 +1,10 @@
 from dotenv import load_dotenv
 import os
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 import wave
+from utils.audio.audio import AudioBuffer
+from utils.metrics.metrics import stage
 #from utils.phonemes.text_to_phoneme import get_phonemes, Language
 
 load_dotenv(override= True)
@@ -30,40 +32,44 @@ def get_wav_duration(file_path):
         return None
 
 
-def get_speech_rate(wav_file_path : str, text : str) -> float:
+def get_duration(audio: str | AudioBuffer) -> Optional[float]:
+
+    """Duration of an AudioBuffer (no I/O) or of the WAV file at a path."""
+    with stage("duration"):
+        if isinstance(audio, AudioBuffer):
+            return audio.duration
+
+        if not Path(audio).exists():
+            return None
+
+        return get_wav_duration(audio)
+
+
+def get_speech_rate(wav_file_path : str | AudioBuffer, text : str) -> float:
 
     text_count = len(text.split(" ")) if text is not None else 0
 
     if text_count == 0:
         return 0
     
-    wav_file = Path(wav_file_path)
+    wav_time_duration = get_duration(wav_file_path)
 
-    if wav_file.exists():
-        wav_time_duration = get_wav_duration(wav_file_path)
-
-        if wav_time_duration is None:
-            return 0
+    if not wav_time_duration:
+        return 0
         
-        return text_count / wav_time_duration * 60
-    return 0
+    return text_count / wav_time_duration * 60
 
-def get_phoneme_rate(wav_file_path: str, phonemes: List) -> float:
+def get_phoneme_rate(wav_file_path: str | AudioBuffer, phonemes: List) -> float:
 
     if len(phonemes) == 0:
         return 0
     
-    wav_file = Path(wav_file_path)
-
-    if wav_file.exists():
-        wav_time_duration = get_wav_duration(wav_file_path)
+    wav_time_duration = get_duration(wav_file_path)
 
-        if wav_time_duration is None:
-            return 0
+    if not wav_time_duration:
+        return 0
         
-        return len(phonemes) / wav_time_duration * 60
-    
-    return 0
+    return len(phonemes) / wav_time_duration * 60
 
 
 if __name__ == "__main__":
@@ -0,0 +1,262 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, List
+from uuid import UUID
+
+from utils.audio.audio import AudioBuffer
+
+
+class StorageBackend(ABC):
+
+    """
+    Where sessions (background answers), chat messages and audio live.
+
+    Audio is always written as `<audio_dir>/<uuid>.wav` so the file can be served
+    and re-read by path; backends only differ in how sessions, messages and the
+    audio metadata are kept. `get_chat` returns `[{}]` for an unknown uuid, which
+    the chatbot uses to detect a conversation that was never started.
+    """
+    def __init__(self, audio_dir: str | Path):
+
+        self.audio_dir = Path(audio_dir)
+        self.audio_dir.mkdir(parents= True, exist_ok= True)
+
+    def get_audio_path(self, uuid: UUID | str) -> str:
+
+        return str(self.audio_dir / f"{uuid}.wav")
+
+    def save_audio(self, uuid: UUID | str, audio: AudioBuffer) -> None:
+
+        audio_file = self.audio_dir / f"{uuid}.wav"
+        tmp_file = self.audio_dir / f".{uuid}.wav.tmp"
+
+        # written under a temporary name so readers never see a partial file
+        tmp_file.write_bytes(audio.wav_bytes())
+        os.replace(tmp_file, audio_file)
+        self.record_audio(uuid, audio, str(audio_file))
+
+    def record_audio(self, uuid: UUID | str, audio: AudioBuffer, path: str) -> None:
+
+        """Hook for backends that index audio metadata; the file itself is already written."""
+
+    @abstractmethod
+    def save_data(self, uuid: UUID | str, data: Dict[str, Any]) -> None: ...
+
+    @abstractmethod
+    def get_data(self, uuid: UUID | str) -> Dict[str, Any]:
+
+        """Background answers of a session; raises KeyError if there are none."""
+
+    @abstractmethod
+    def store_response(self, uuid: UUID | str, is_agent: bool, response: Dict[str, List] | str) -> None: ...
+
+    @abstractmethod
+    def get_chat(self, uuid: UUID | str) -> List[Dict]: ...
+
+    @abstractmethod
+    def store_chat_summary(self, uuid: UUID | str, summary: Dict[str, Any]) -> None: ...
+
+    @abstractmethod
+    def get_chat_summary(self, uuid: UUID | str) -> Dict[str, Any] | None:
+
+        """Rolling summary written by the chatbot context builder, or None."""
+
+
+class FilesystemBackend(StorageBackend):
+
+    """The original layout: one JSON file per session and one JSON list per conversation."""
+    def __init__(self, audio_dir: str | Path, data_dir: str | Path, convo_dir: str | Path):
+
+        super().__init__(audio_dir)
+        self.data_dir = Path(data_dir)
+        self.convo_dir = Path(convo_dir)
+        self.data_dir.mkdir(parents= True, exist_ok= True)
+        self.convo_dir.mkdir(parents= True, exist_ok= True)
+        self.summary_dir = self.convo_dir / "summaries"  # kept out of convo_dir so its *.json are all conversations
+        self.summary_dir.mkdir(exist_ok= True)
+        self._convo_lock = threading.Lock()
+
+    def get_data_path(self, uuid: UUID | str) -> str:
+
+        return str(self.data_dir / f"{uuid}.json")
+
+    def save_data(self, uuid: UUID | str, data: Dict[str, Any]) -> None:
+
+        Path(self.get_data_path(uuid)).write_text(json.dumps(data, indent= 4), encoding= "utf-8")
+
+    def get_data(self, uuid: UUID | str) -> Dict[str, Any]:
+
+        try:
+            return json.loads(Path(self.get_data_path(uuid)).read_text(encoding= "utf-8"))
+        except FileNotFoundError:
+            raise KeyError(f"No data stored for {uuid}") from None
+
+    def store_response(self, uuid: UUID | str, is_agent: bool, response: Dict[str, List] | str) -> None:
+
+        # the whole conversation is rewritten on every message (O(n) per append)
+        with self._convo_lock:
+            file = self.convo_dir / f"{uuid}.json"
+            convo = json.loads(file.read_text()) if file.exists() else []
+            convo.append({"agent": response} if is_agent else {"user": response})
+            file.write_text(json.dumps(convo, indent= 4), encoding= "utf-8")
+
+    def get_chat(self, uuid: UUID | str) -> List[Dict]:
+
+        file = self.convo_dir / f"{uuid}.json"
+
+        if not file.exists():
+            return [{}]
+
+        return json.loads(file.read_text())
+
+    def store_chat_summary(self, uuid: UUID | str, summary: Dict[str, Any]) -> None:
+
+        (self.summary_dir / f"{uuid}.json").write_text(json.dumps(summary, ensure_ascii= False), encoding= "utf-8")
+
+    def get_chat_summary(self, uuid: UUID | str) -> Dict[str, Any] | None:
+
+        file = self.summary_dir / f"{uuid}.json"
+        return json.loads(file.read_text(encoding= "utf-8")) if file.exists() else None
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    uuid TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    uuid TEXT NOT NULL,
+    role TEXT NOT NULL CHECK (role IN ('agent', 'user')),
+    content TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS messages_by_uuid ON messages (uuid, id);
+CREATE TABLE IF NOT EXISTS chat_summaries (
+    uuid TEXT PRIMARY KEY,
+    summary TEXT NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS audio (
+    uuid TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    sample_rate INTEGER NOT NULL,
+    num_frames INTEGER NOT NULL,
+    duration REAL NOT NULL,
+    content_hash TEXT NOT NULL,
+    created REAL NOT NULL
+);
+"""
+
+
+class SQLiteBackend(StorageBackend):
+
+    """
+    Sessions, messages and audio metadata in one SQLite database in WAL mode.
+
+    Appending a message is a single indexed INSERT, lookups by uuid hit the
+    primary key or the (uuid, id) index, and WAL lets readers run alongside the
+    writer. Each thread gets its own connection; concurrent writers queue on
+    SQLite's lock for up to `busy_timeout` ms instead of failing.
+
+    Example:
+        backend = SQLiteBackend("./data/storage.db", audio_dir= "./data/audio")
+        backend.store_response(uuid, is_agent= False, response= "hello")
+    """
+    def __init__(self, db_path: str | Path, audio_dir: str | Path, busy_timeout: int = 5000):
+
+        super().__init__(audio_dir)
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents= True, exist_ok= True)
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self.connection().executescript(SCHEMA)
+
+    def connection(self) -> sqlite3.Connection:
+
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout= self.busy_timeout / 1000, isolation_level= None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")  # durable at checkpoints; safe against corruption in WAL mode
+            conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout)}")
+            self._local.conn = conn
+        return conn
+
+    def save_data(self, uuid: UUID | str, data: Dict[str, Any]) -> None:
+
+        now = time.time()
+        self.connection().execute(
+            "INSERT INTO sessions (uuid, data, created, updated) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (uuid) DO UPDATE SET data = excluded.data, updated = excluded.updated",
+            (str(uuid), json.dumps(data, ensure_ascii= False), now, now)
+        )
+
+    def get_data(self, uuid: UUID | str) -> Dict[str, Any]:
+
+        row = self.connection().execute("SELECT data FROM sessions WHERE uuid = ?", (str(uuid),)).fetchone()
+        if row is None:
+            raise KeyError(f"No data stored for {uuid}")
+        return json.loads(row[0])
+
+    def record_audio(self, uuid: UUID | str, audio: AudioBuffer, path: str) -> None:
+
+        self.connection().execute(
+            "INSERT OR REPLACE INTO audio (uuid, path, sample_rate, num_frames, duration, content_hash, created) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (str(uuid), path, audio.sample_rate, audio.num_frames, audio.duration, audio.content_hash, time.time())
+        )
+
+    def store_response(self, uuid: UUID | str, is_agent: bool, response: Dict[str, List] | str) -> None:
+
+        self.connection().execute(
+            "INSERT INTO messages (uuid, role, content, created) VALUES (?, ?, ?, ?)",
+            (str(uuid), "agent" if is_agent else "user", json.dumps(response, ensure_ascii= False), time.time())
+        )
+
+    def get_chat(self, uuid: UUID | str) -> List[Dict]:
+
+        rows = self.connection().execute(
+            "SELECT role, content FROM messages WHERE uuid = ? ORDER BY id", (str(uuid),)
+        ).fetchall()
+
+        if not rows:
+            return [{}]
+
+        return [{role: json.loads(content)} for role, content in rows]
+
+    def store_chat_summary(self, uuid: UUID | str, summary: Dict[str, Any]) -> None:
+
+        self.connection().execute(
+            "INSERT OR REPLACE INTO chat_summaries (uuid, summary, updated) VALUES (?, ?, ?)",
+            (str(uuid), json.dumps(summary, ensure_ascii= False), time.time())
+        )
+
+    def get_chat_summary(self, uuid: UUID | str) -> Dict[str, Any] | None:
+
+        row = self.connection().execute("SELECT summary FROM chat_summaries WHERE uuid = ?", (str(uuid),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_audio_metadata(self, uuid: UUID | str) -> Dict[str, Any] | None:
+
+        cursor = self.connection().execute("SELECT * FROM audio WHERE uuid = ?", (str(uuid),))
+        row = cursor.fetchone()
+        return dict(zip([c[0] for c in cursor.description], row)) if row else None
+
+    def import_conversation(self, uuid: UUID | str, convo: List[Dict], created: float) -> int:
+
+        """Replace the stored messages of `uuid` with a legacy conversation list; returns the number of messages."""
+        rows = [(str(uuid), role, json.dumps(content, ensure_ascii= False), created) for message in convo for role, content in message.items()]
+        conn = self.connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM messages WHERE uuid = ?", (str(uuid),))
+            conn.executemany("INSERT INTO messages (uuid, role, content, created) VALUES (?, ?, ?, ?)", rows)
+        return len(rows)
@@ -1,28 +1,41 @@
 from pathlib import Path
 from dotenv import load_dotenv
 import os
-import json
 from typing import Dict, List
+from concurrent.futures import Future, ThreadPoolExecutor
 from werkzeug.datastructures import FileStorage 
 from uuid import UUID, uuid4
-import io
-import wave
-import numpy as np
+
+from utils.audio.audio import AudioBuffer
+from utils.storage.backends import StorageBackend, FilesystemBackend, SQLiteBackend
+from utils.metrics.metrics import gauge, stage
 
 load_dotenv(override= True)
 
 audio_path = Path(os.environ.get("WAV_STORAGE_DIR", "./data/audio"))
 data_path = Path(os.environ.get("BACKGROUND_ANSWER_STORAGE_DIR", "./data/background/user_responses"))
 convo_path = Path(os.environ.get("AGENT_CONVO_DIR", "./data/agent_convo"))
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "files")
+SQLITE_DB = os.environ.get("STORAGE_SQLITE_DB", "./data/storage.db")
+
+def make_backend(name: str = STORAGE_BACKEND) -> StorageBackend:
+
+    if name == "files":
+        return FilesystemBackend(audio_dir= audio_path, data_dir= data_path, convo_dir= convo_path)
+    if name == "sqlite":
+        return SQLiteBackend(SQLITE_DB, audio_dir= audio_path)
+    raise ValueError(f"STORAGE_BACKEND must be 'files' or 'sqlite', got {name}")
 
-audio_path.mkdir(parents=True, exist_ok=True)
-data_path.mkdir(parents=True, exist_ok=True)
-convo_path.mkdir(parents=True, exist_ok=True)
+backend = make_backend()
+
+# a single writer keeps audio persistence off the request path while preserving write order
+_audio_writer = ThreadPoolExecutor(max_workers= 1, thread_name_prefix= "audio-writer")
+AUDIO_WRITER_QUEUE = gauge("audio_writer_queue_depth", "Uploads waiting for or being written by the audio writer")
 
 def save_audio(uuid: UUID, audio_wav: FileStorage) -> bool:
 
     try:
-        audio_file = audio_path / f"{uuid}.wav"
+        audio_file = Path(get_audio_path(uuid))
         audio_file.write_bytes(audio_wav.read())
         audio_wav.seek(0)
         return True
@@ -32,41 +45,45 @@ def save_audio(uuid: UUID, audio_wav: FileStorage) -> bool:
         return False
  
 def save_audio_wav(uuid: UUID, audio_wav: FileStorage) -> bool:
-    try:
-        audio_file_name = audio_path / f"{uuid}.wav"
-        raw_audio = audio_wav.read()
 
-        # Convert bytes → numpy array (16-bit PCM)
-        audio_data = np.frombuffer(raw_audio, dtype=np.int16)
+    return save_audio_buffer(uuid= uuid, audio= AudioBuffer.from_upload(audio_wav.read()))
+
+def save_pcm_wav(uuid: UUID, raw_audio: bytes) -> bool:
 
-        # Create a valid .wav file
-        with wave.open(str(audio_file_name), "wb") as wf:
-            wf.setnchannels(1)       # mono
-            wf.setsampwidth(2)       # 16-bit PCM
-            wf.setframerate(16000)   # 16kHz sample rate
-            wf.writeframes(audio_data.tobytes())
+    return save_audio_buffer(uuid= uuid, audio= AudioBuffer.from_pcm(raw_audio))
 
+def save_audio_buffer(uuid: UUID, audio: AudioBuffer) -> bool:
+    try:
+        with stage("audio_save"):
+            backend.save_audio(uuid, audio)
         return True
 
     except Exception as e:
         print(f"Exception in saving audio wav file: {e}")
         return False
+
+def save_audio_buffer_async(uuid: UUID, audio: AudioBuffer) -> Future:
+
+    """Persist the buffer on the background writer; the Future resolves to save_audio_buffer's result."""
+    AUDIO_WRITER_QUEUE.inc()
+    future = _audio_writer.submit(save_audio_buffer, uuid, audio)
+    future.add_done_callback(lambda _: AUDIO_WRITER_QUEUE.dec())
+    return future
     
 def save_data(uuid: UUID, data: Dict[str, str]) -> bool:
 
     try:
-
-        data_file = data_path / f"{str(uuid)}.json"
-        data_file.write_text(json.dumps(data, indent= 4), encoding= "utf-8")
+        with stage("save_data"):
+            backend.save_data(uuid, data)
         return True
     
     except Exception as e:
-        print(f"Exception in saving response data JSON: {e}")
+        print(f"Exception in saving response data: {e}")
         return False
     
 def get_audio_path(uuid: UUID) -> str:
 
-    return str(audio_path / f"{str(uuid)}.wav")
+    return backend.get_audio_path(uuid)
 
 def get_data_path(uuid: UUID) -> str:
 
@@ -74,45 +91,37 @@ def get_data_path(uuid: UUID) -> str:
 
 def get_data(uuid: UUID) -> Dict[str, str]:
 
-    file = data_path / f"{str(uuid)}.json"
-    return json.loads(file.read_text(encoding= "utf-8"))
+    return backend.get_data(uuid)
 
 
 def store_response(uuid: UUID, is_agent: bool, response: Dict[str, List] | str) -> bool:
 
     try:
-        file = convo_path / f"{str(uuid)}.json"
-
-        if file.exists():
-            convo = json.loads(file.read_text())
-        
-        else:
-            convo = []
-        
-        message = None
-        if is_agent:
-            message = {"agent": response}
-        
-        else:
-            message = {"user": response}
-        convo.append(message)
-
-        file.write_text(json.dumps(convo, indent= 4), encoding="utf-8")
-
+        with stage("store_response"):
+            backend.store_response(uuid, is_agent, response)
         return True
     
     except Exception as e:
-        print(f"Error while storing message in convo file: {e}")
+        print(f"Error while storing message in convo: {e}")
         return False
     
 def get_chat(uuid: UUID) -> List[Dict]:
 
-    file = convo_path / f"{str(uuid)}.json"
+    return backend.get_chat(uuid)
 
-    if not file.exists():
-        return [{}]
-    
-    return json.loads(file.read_text())
+def store_chat_summary(uuid: UUID, summary: Dict) -> bool:
+
+    try:
+        backend.store_chat_summary(uuid, summary)
+        return True
+
+    except Exception as e:
+        print(f"Error while storing chat summary: {e}")
+        return False
+
+def get_chat_summary(uuid: UUID) -> Dict | None:
+
+    return backend.get_chat_summary(uuid)
     
 
 
@@ -123,5 +132,3 @@ if __name__ == "__main__":
 
     print(uuid4())
     print(type(uuid4()))
-
-
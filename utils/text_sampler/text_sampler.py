@@ -1,41 +1,91 @@
 import json
 import os
+import threading
 from dotenv import load_dotenv
 from pathlib import Path
-from typing import Dict
-from random import randint
+from typing import Dict, Optional, Tuple
+
+import numpy as np
 
 load_dotenv(override= True)
 text_path = Path(os.environ.get("USER_TEXT_FILE", "./data/text/user_text.json"))
-text_json = json.loads(text_path.read_text(encoding="utf-8"))
 NO_SENTENCES = int(os.environ.get("NO_SENTENCES", 4))
 
-def sample_text_phoneme(lang: str) -> Dict[str, str]:
 
-    if lang not in ["en", "ar"]:
+class SentencePool:
+
+    """
+    Read-only sentences of one language, compiled once into parallel tuples.
+
+    `sample` draws sentence indices without replacement in one vectorized call
+    and joins them into a new passage, so the pool itself never changes and
+    memory stays flat however many passages are requested. Passages longer than
+    the pool reuse sentences only after every sentence has been used.
+
+    Example:
+        pool = SentencePool.from_json(text_json["english_sentences"], separator= ". ")
+        pool.sample(4, seed= 7)
+    """
+    def __init__(self, texts: Tuple[str, ...], phonemes: Tuple[str, ...], separator: str):
+
+        if len(texts) != len(phonemes) or not texts:
+            raise ValueError(f"Need one phoneme string per sentence, got {len(texts)} texts and {len(phonemes)} phonemes")
+        self.texts = texts
+        self.phonemes = phonemes
+        self.separator = separator
+        self._local = threading.local()  # numpy Generators are not thread-safe
+
+    @classmethod
+    def from_json(cls, sentences: Dict[str, Dict[str, str]], separator: str) -> "SentencePool":
+
+        ordered = [sentences[k] for k in sorted(sentences, key= int)]
+        return cls(tuple(s["text"] for s in ordered), tuple(s["phonemes"] for s in ordered), separator)
+
+    def __len__(self) -> int:
+
+        return len(self.texts)
+
+    def _rng(self, seed: Optional[int]) -> np.random.Generator:
+
+        if seed is not None:
+            return np.random.default_rng(seed)
+        rng = getattr(self._local, "rng", None)
+        if rng is None:
+            rng = self._local.rng = np.random.default_rng()
+        return rng
+
+    def indices(self, count: int, seed: Optional[int] = None) -> np.ndarray:
+
+        rng = self._rng(seed)
+        n = len(self.texts)
+        if count <= n:
+            return rng.choice(n, size= count, replace= False)
+        rounds = -(-count // n)
+        return np.concatenate([rng.permutation(n) for _ in range(rounds)])[:count]
+
+    def sample(self, count: int = NO_SENTENCES, seed: Optional[int] = None) -> Dict[str, str]:
+
+        picked = self.indices(count, seed).tolist()
+        return {
+            "text": self.separator.join(self.texts[i] for i in picked),
+            "phonemes": self.separator.join(self.phonemes[i] for i in picked),
+        }
+
+
+def load_pools(path: Path = text_path) -> Dict[str, SentencePool]:
+
+    text_json = json.loads(path.read_text(encoding="utf-8"))
+    return {
+        "en": SentencePool.from_json(text_json["english_sentences"], separator= ". "),
+        "ar": SentencePool.from_json(text_json["arabic_sentences"], separator= ""),
+    }
+
+
+POOLS = load_pools()
+
+def sample_text_phoneme(lang: str, seed: Optional[int] = None) -> Dict[str, str]:
+
+    if lang not in POOLS:
         return {"data": f"LANGUAGE {lang} NOT SUPPORTED. CHOOSE BETWEEN en AND ar"}
-    
-
-    if lang == "en":
-        
-        sentences = text_json["english_sentences"]
-        rand_key = str(randint(1, len(sentences.keys())))
-        init_sentence = sentences[rand_key]
-        for i in range(NO_SENTENCES - 1):
-            sentences = text_json["english_sentences"]
-            rand_key = str(randint(1, len(sentences.keys())))
-            init_sentence['text'] +=  '. ' + sentences[rand_key]['text']
-            init_sentence['phonemes'] += '. ' + sentences[rand_key]['phonemes']
-    
-        return {"data": init_sentence}
-    
-    sentences = text_json["arabic_sentences"]
-    rand_key = str(randint(1, len(sentences.keys())))
-    init_sentence = sentences[rand_key]
-    for i in range(NO_SENTENCES - 1):
-        sentences = text_json["arabic_sentences"]
-        rand_key = str(randint(1, len(sentences.keys())))
-        init_sentence['text'] +=  sentences[rand_key]['text']
-        init_sentence['phonemes'] += sentences[rand_key]['phonemes']
-
-    return {"data": init_sentence}
+
+    return {"data": POOLS[lang].sample(NO_SENTENCES, seed= seed)}